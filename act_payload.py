@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Wire format for the agent's /act endpoint.
+
+Analyses can be referenced by path (analyzer and agent share a filesystem)
+or sent inline, so the agent can run on its own host:
+
+    {"analysis_path": "captures/analysis/main/x_analysis.json"}
+    {"analysis": {...}}                      # one inline document
+    {"analyses": [{...}, {...}]}             # a batch
+    {"analysis_gzip": "<base64>"}            # gzip'd JSON: one document or a list
+
+build_act_request() picks the inline form and gzips it once the JSON is
+larger than AGENT_GZIP_THRESHOLD bytes; decode_act_request() turns any of
+the forms back into a list of documents.
+"""
+
+import base64
+import gzip
+import io
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+AGENT_GZIP_THRESHOLD = int(os.getenv("AGENT_GZIP_THRESHOLD", "16384"))
+# Decompressed size limit, so a small gzip body cannot expand without bound
+MAX_INLINE_BYTES = int(os.getenv("AGENT_MAX_INLINE_BYTES", str(32 * 1024 * 1024)))
+
+
+class PayloadError(ValueError):
+    """The /act request body is missing, malformed or too large."""
+
+
+def build_act_request(analyses, gzip_threshold: int = AGENT_GZIP_THRESHOLD) -> Dict[str, Any]:
+    """
+    Request body carrying one analysis (dict) or a batch (list) inline.
+
+    Args:
+        analyses: Analysis document or list of documents
+        gzip_threshold: Compress when the JSON is at least this many bytes (0 = always)
+
+    Returns:
+        JSON-serialisable body for POST /act
+    """
+    raw = json.dumps(analyses, separators=(",", ":")).encode("utf-8")
+    if len(raw) >= gzip_threshold:
+        return {"analysis_gzip": base64.b64encode(gzip.compress(raw, compresslevel=6)).decode("ascii")}
+    if isinstance(analyses, list):
+        return {"analyses": analyses}
+    return {"analysis": analyses}
+
+
+def _gunzip_json(blob: str):
+    try:
+        with gzip.GzipFile(fileobj=io.BytesIO(base64.b64decode(blob, validate=True))) as f:
+            raw = f.read(MAX_INLINE_BYTES + 1)
+    except (ValueError, OSError, EOFError) as e:
+        raise PayloadError(f"analysis_gzip is not valid base64 gzip: {e}")
+    if len(raw) > MAX_INLINE_BYTES:
+        raise PayloadError(f"analysis_gzip expands beyond {MAX_INLINE_BYTES} bytes")
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        raise PayloadError(f"analysis_gzip does not contain JSON: {e}")
+
+
+def read_analysis_file(analysis_path: str) -> Dict[str, Any]:
+    with open(analysis_path, "r") as f:
+        return json.load(f)
+
+
+def decode_act_request(analysis_path: Optional[str] = None,
+                       analysis: Optional[Dict[str, Any]] = None,
+                       analyses: Optional[List[Dict[str, Any]]] = None,
+                       analysis_gzip: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Analysis documents carried by an /act request, in order.
+
+    Exactly one of the fields must be set. A path is read from disk; raises
+    FileNotFoundError when it does not exist and PayloadError for anything
+    else that is wrong with the request.
+    """
+    given = [name for name, value in (("analysis_path", analysis_path), ("analysis", analysis),
+                                      ("analyses", analyses), ("analysis_gzip", analysis_gzip)) if value is not None]
+    if not given:
+        raise PayloadError("one of analysis_path, analysis, analyses or analysis_gzip is required.")
+    if len(given) > 1:
+        raise PayloadError(f"only one of {', '.join(given)} may be set.")
+    if analyses is not None and not analyses:
+        raise PayloadError("analyses must not be empty.")
+
+    if analysis_path is not None:
+        docs = [read_analysis_file(analysis_path)]
+    elif analysis is not None:
+        docs = [analysis]
+    elif analyses is not None:
+        docs = list(analyses)
+    else:
+        decoded = _gunzip_json(analysis_gzip)
+        docs = decoded if isinstance(decoded, list) else [decoded]
+
+    if not all(isinstance(d, dict) for d in docs):
+        raise PayloadError("every analysis must be a JSON object.")
+    return docs
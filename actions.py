@@ -6,11 +6,17 @@ This module contains all external API calls (Jira, Slack, GitHub)
 that can be used by both the code analysis agent and screenshot analysis service.
 """
 
+import asyncio
+import contextlib
+import json
 import os
 import requests
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Optional, Sequence
 from dotenv import load_dotenv
 
+import metrics
+
 # ---------------------------------------------------------------------
 # Load environment variables
 # ---------------------------------------------------------------------
@@ -31,20 +37,16 @@ SLACK_CHANNEL_ID = os.getenv("SLACK_CHANNEL_ID")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 GITHUB_REPO = os.getenv("GITHUB_REPO")  # format: owner/repo
 
+JSON_HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
+
 # ---------------------------------------------------------------------
-# Jira Actions
+# Request builders (shared by the sync and async clients)
 # ---------------------------------------------------------------------
 
-def create_jira_ticket(summary: str, description: str, risk: str) -> Optional[Dict[str, Any]]:
-    """Create a new Jira Task or Bug in the specified project."""
-    if not all([JIRA_BASE_URL, JIRA_USER_EMAIL, JIRA_API_TOKEN, JIRA_PROJECT_KEY]):
-        print("❌ Jira credentials missing in .env (Check BASE_URL, EMAIL, TOKEN, PROJECT_KEY)")
-        return None
-
+def jira_ticket_request(summary: str, description: str, risk: str):
+    """Returns (url, body, issue_type) for creating a Jira Task or Bug."""
     issue_type = "Bug" if "vulnerability" in summary.lower() else "Task"
     url = f"{JIRA_BASE_URL}/rest/api/3/issue"
-    auth = (JIRA_USER_EMAIL, JIRA_API_TOKEN)
-    headers = {"Accept": "application/json", "Content-Type": "application/json"}
 
     adf_description = {
         "type": "doc",
@@ -62,27 +64,12 @@ def create_jira_ticket(summary: str, description: str, risk: str) -> Optional[Di
             "description": adf_description,
         }
     }
-
-    response = requests.post(url, auth=auth, headers=headers, json=data)
-    if response.status_code in (200, 201):
-        issue_key = response.json().get("key", "Unknown Key")
-        print(f"✅ Jira {issue_type} created successfully! Key: {issue_key}")
-        return response.json()
-    else:
-        print(f"❌ Jira issue creation failed with status {response.status_code}:")
-        print(response.text)
-        return None
+    return url, data, issue_type
 
 
-def create_jira_comment(summary: str, description: str, risk: str) -> Optional[Dict[str, Any]]:
-    """Add a comment to an existing Jira issue for fallback/testing."""
-    if not all([JIRA_BASE_URL, JIRA_USER_EMAIL, JIRA_API_TOKEN]):
-        print("❌ Jira credentials missing in .env")
-        return None
-
+def jira_comment_request(summary: str, description: str, risk: str):
+    """Returns (url, body) for the fallback comment on TARGET_ISSUE_KEY."""
     url = f"{JIRA_BASE_URL}/rest/api/3/issue/{TARGET_ISSUE_KEY}/comment"
-    auth = (JIRA_USER_EMAIL, JIRA_API_TOKEN)
-    headers = {"Accept": "application/json", "Content-Type": "application/json"}
 
     comment_body = f"""
 --- Agent Action Log ---
@@ -102,6 +89,114 @@ Description: {description[:500]}
             ]
         }
     }
+    return url, data
+
+
+def slack_request(text: str):
+    """Returns (url, headers, body) for chat.postMessage."""
+    url = "https://slack.com/api/chat.postMessage"
+    headers = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}", "Content-Type": "application/json"}
+    payload = {"channel": SLACK_CHANNEL_ID, "text": text}
+    return url, headers, payload
+
+
+def github_request(issue_summary: str, description: str, risk: str, pr_number: Optional[int] = None):
+    """
+    Returns (kind, url, headers, body) for the GitHub action, or None when
+    there is nothing to do. kind is "issue" (HIGH risk) or "pr_comment".
+    """
+    headers = {
+        "Authorization": f"Bearer {GITHUB_TOKEN}",
+        "Accept": "application/vnd.github.v3+json"
+    }
+
+    body_text = (
+        f"🚨 **Compliance Finding Detected** 🚨\n\n"
+        f"**Risk Level:** {risk.upper()}\n"
+        f"**Summary:** {issue_summary}\n\n"
+        f"**Description:**\n{description}\n\n"
+        f"---\n"
+        f"*This issue was automatically created by the Shift-Left Compliance Dashboard.*"
+    )
+
+    # HIGH risk → Create GitHub Issue
+    if risk.lower() == "high":
+        url = f"https://api.github.com/repos/{GITHUB_REPO}/issues"
+        data = {
+            "title": f"[{risk.upper()}] {issue_summary}",
+            "body": body_text,
+            "labels": ["security", "compliance", risk.lower()]
+        }
+        return "issue", url, headers, data
+
+    # MEDIUM/LOW risk → Comment on PR (if pr_number provided)
+    if pr_number:
+        url = f"https://api.github.com/repos/{GITHUB_REPO}/pulls/{pr_number}/comments"
+        data = {
+            "body": body_text,
+            "commit_id": "HEAD",
+            "path": "compliance-finding.md",
+            "position": 1
+        }
+        return "pr_comment", url, headers, data
+
+    return None
+
+
+def slack_finding_text(summary: str, risk: str, control_id: Optional[str], action_result: str,
+                       related: Optional[Sequence[str]] = None) -> str:
+    """Slack text for a finding; `related` controls are looked up in the crosswalk (SQLite) when not given."""
+    if related is None:
+        # Imported here so importing actions does not require the database
+        from crosswalk import related_controls
+
+        related = related_controls(control_id)
+    return (
+        f"🚨 *[{risk.upper()}]-Risk Finding Detected!*\n"
+        f"• *Summary:* {summary}\n"
+        f"• *Risk:* {risk.upper()}\n"
+        f"• *Control:* {control_id or 'N/A'}\n"
+        + (f"• *Also affects:* {', '.join(related)}\n" if related else "")
+        + f"• *Action Taken:* {action_result}\n"
+    )
+
+
+# ---------------------------------------------------------------------
+# Jira Actions
+# ---------------------------------------------------------------------
+
+@metrics.timed("jira_ticket")
+def create_jira_ticket(summary: str, description: str, risk: str) -> Optional[Dict[str, Any]]:
+    """Create a new Jira Task or Bug in the specified project."""
+    if not all([JIRA_BASE_URL, JIRA_USER_EMAIL, JIRA_API_TOKEN, JIRA_PROJECT_KEY]):
+        print("❌ Jira credentials missing in .env (Check BASE_URL, EMAIL, TOKEN, PROJECT_KEY)")
+        return None
+
+    url, data, issue_type = jira_ticket_request(summary, description, risk)
+    auth = (JIRA_USER_EMAIL, JIRA_API_TOKEN)
+    headers = JSON_HEADERS
+
+    response = requests.post(url, auth=auth, headers=headers, json=data)
+    if response.status_code in (200, 201):
+        issue_key = response.json().get("key", "Unknown Key")
+        print(f"✅ Jira {issue_type} created successfully! Key: {issue_key}")
+        return response.json()
+    else:
+        print(f"❌ Jira issue creation failed with status {response.status_code}:")
+        print(response.text)
+        return None
+
+
+@metrics.timed("jira_comment")
+def create_jira_comment(summary: str, description: str, risk: str) -> Optional[Dict[str, Any]]:
+    """Add a comment to an existing Jira issue for fallback/testing."""
+    if not all([JIRA_BASE_URL, JIRA_USER_EMAIL, JIRA_API_TOKEN]):
+        print("❌ Jira credentials missing in .env")
+        return None
+
+    url, data = jira_comment_request(summary, description, risk)
+    auth = (JIRA_USER_EMAIL, JIRA_API_TOKEN)
+    headers = JSON_HEADERS
 
     response = requests.post(url, auth=auth, headers=headers, json=data)
     if response.status_code == 201:
@@ -117,16 +212,14 @@ Description: {description[:500]}
 # Slack Actions
 # ---------------------------------------------------------------------
 
+@metrics.timed("slack")
 def send_slack_message(text: str):
     """Send a message to a Slack channel."""
     if not SLACK_BOT_TOKEN or not SLACK_CHANNEL_ID:
         print("⚠️ Slack credentials missing. Skipping Slack alert.")
         return
 
-    url = "https://slack.com/api/chat.postMessage"
-    headers = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}", "Content-Type": "application/json"}
-    payload = {"channel": SLACK_CHANNEL_ID, "text": text}
-
+    url, headers, payload = slack_request(text)
     response = requests.post(url, headers=headers, json=payload)
     print("🧩 Slack raw response:", response.text)
     if response.status_code != 200 or not response.json().get("ok"):
@@ -139,61 +232,26 @@ def send_slack_message(text: str):
 # GitHub Actions
 # ---------------------------------------------------------------------
 
+@metrics.timed("github")
 def handle_github_action(issue_summary: str, description: str, risk: str, pr_number: Optional[int] = None):
     """Hybrid GitHub action: HIGH risk → Issue | MEDIUM/LOW risk → PR Comment."""
     if not GITHUB_TOKEN or not GITHUB_REPO:
         print("⚠️ GitHub credentials missing. Skipping GitHub action.")
         return None
 
-    headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-
-    body_text = (
-        f"🚨 **Compliance Finding Detected** 🚨\n\n"
-        f"**Risk Level:** {risk.upper()}\n"
-        f"**Summary:** {issue_summary}\n\n"
-        f"**Description:**\n{description}\n\n"
-        f"---\n"
-        f"*This issue was automatically created by the Shift-Left Compliance Dashboard.*"
-    )
-
-    # HIGH risk → Create GitHub Issue
-    if risk.lower() == "high":
-        url = f"https://api.github.com/repos/{GITHUB_REPO}/issues"
-        data = {
-            "title": f"[{risk.upper()}] {issue_summary}",
-            "body": body_text,
-            "labels": ["security", "compliance", risk.lower()]
-        }
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code == 201:
-            issue_data = response.json()
-            print(f"✅ GitHub Issue created: {issue_data.get('html_url')}")
-            return issue_data
-        else:
-            print(f"❌ GitHub Issue creation failed: {response.text}")
-            return None
-
-    # MEDIUM/LOW risk → Comment on PR (if pr_number provided)
-    elif pr_number:
-        url = f"https://api.github.com/repos/{GITHUB_REPO}/pulls/{pr_number}/comments"
-        data = {
-            "body": body_text,
-            "commit_id": "HEAD",
-            "path": "compliance-finding.md",
-            "position": 1
-        }
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code == 201:
-            comment_data = response.json()
-            print(f"✅ GitHub PR comment created: {comment_data.get('html_url')}")
-            return comment_data
-        else:
-            print(f"❌ GitHub PR comment failed: {response.text}")
-            return None
+    request = github_request(issue_summary, description, risk, pr_number)
+    if request is None:
+        return None
+    kind, url, headers, data = request
 
+    response = requests.post(url, headers=headers, json=data)
+    if response.status_code == 201:
+        result = response.json()
+        label = "Issue created" if kind == "issue" else "PR comment created"
+        print(f"✅ GitHub {label}: {result.get('html_url')}")
+        return result
+    label = "Issue creation" if kind == "issue" else "PR comment"
+    print(f"❌ GitHub {label} failed: {response.text}")
     return None
 
 
@@ -236,14 +294,7 @@ def take_actions(summary: str, description: str, risk: str, control_id: Optional
             github_link = gh_response.get("html_url")
         
         # Send Slack notification
-        slack_text = (
-            f"🚨 *[{risk.upper()}]-Risk Finding Detected!*\n"
-            f"• *Summary:* {summary}\n"
-            f"• *Risk:* {risk.upper()}\n"
-            f"• *Control:* {control_id or 'N/A'}\n"
-            f"• *Action Taken:* {action_result}\n"
-        )
-        send_slack_message(slack_text)
+        send_slack_message(slack_finding_text(summary, risk, control_id, action_result))
     
     return {
         "jira_key": jira_key,
@@ -251,3 +302,355 @@ def take_actions(summary: str, description: str, risk: str, control_id: Optional
         "action_result": action_result
     }
 
+
+# ---------------------------------------------------------------------
+# Analysis → Actions
+# ---------------------------------------------------------------------
+
+# (summary, risk) -> [lock, holders + waiters], so that concurrent workers
+# (pipeline act stage, screenshot service threads) cannot both pass the
+# dedup check and file the same finding twice; entries are dropped when unused
+_finding_locks: Dict[tuple, list] = {}
+_finding_locks_guard = threading.Lock()
+
+
+@contextlib.contextmanager
+def _finding_lock(key: tuple):
+    with _finding_locks_guard:
+        entry = _finding_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _finding_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _finding_locks[key]
+
+
+def act_on_analysis(data: Dict[str, Any], source: str = 'code', log=print) -> Dict[str, Any]:
+    """
+    Take actions for every issue of a Gemini analysis document and store the findings.
+
+    Shared by the Fetch.ai agent (/act) and the in-process pipeline.
+
+    Args:
+        data: Analysis document as written by analyze_with_gemini
+        source: Finding source stored in memory ('code' or 'screenshot')
+        log: Logging function (e.g. ctx.logger.info)
+
+    Returns:
+        Dict with ok, action (comma-separated action results) and error
+    """
+    # Imported here so importing actions does not require the database
+    from memory import add_cluster_member, finding_exists, store_finding
+    from finding_clusters import check_duplicate, register_finding
+
+    gemini = data.get("gemini_analysis", {})
+    risk = gemini.get("risk_level", "unknown")
+    issues = gemini.get("issues", [])
+    control_id = data.get("control_id")  # Get control_id from analysis
+    log(f"🔍 Risk level: {risk}")
+    if control_id:
+        log(f"🔍 Control ID: {control_id}")
+
+    if not issues:
+        log("✅ No issues detected — no Jira, Slack, or GitHub action taken.")
+        return {"ok": True, "action": "none", "error": None}
+
+    actions_taken = []
+    for issue in issues:
+        summary = issue.get("type", "Unknown issue")
+        desc = issue.get("description", "No description")
+        pr_number = issue.get("pr_number")
+
+        with _finding_lock((summary, risk)):
+            # 🧠 DEDUPLICATION CHECK
+            if finding_exists(summary, risk):
+                log(f"⚠️ Duplicate finding skipped: {summary}")
+                metrics.record_finding(source, "duplicate")
+                continue
+
+            # 🧭 NEAR-DUPLICATE CHECK (embedding similarity against open findings)
+            match, vector = check_duplicate(summary, risk)
+            if match:
+                add_cluster_member(match["cluster_id"], summary, risk, desc, source, match["similarity"])
+                log(f"🔗 Near-duplicate of #{match['cluster_id']} ({match['similarity']:.2f}), no new actions: {summary}")
+                actions_taken.append("clustered")
+                metrics.record_finding(source, "clustered")
+                continue
+
+            # 🎯 UNIFIED ACTION WORKFLOW
+            action_results = take_actions(
+                summary=summary,
+                description=desc,
+                risk=risk,
+                control_id=control_id,
+                pr_number=pr_number
+            )
+
+            # 🧠 Store in memory with its source
+            finding_id = store_finding(
+                summary=summary,
+                risk=risk,
+                jira_key=action_results.get("jira_key"),
+                github_link=action_results.get("github_link"),
+                slack_link=None,
+                control_id=control_id,
+                source=source,
+                description=desc,
+                recommendation=issue.get("recommendation")
+            )
+            register_finding(finding_id, vector)
+
+            actions_taken.append(action_results.get("action_result", "none"))
+            metrics.record_finding(source, action_results.get("action_result", "none"))
+
+    return {"ok": True, "action": ",".join(actions_taken), "error": None}
+
+
+# ---------------------------------------------------------------------
+# Async variants (for the Fetch.ai agent's event loop)
+# ---------------------------------------------------------------------
+# Same requests as above, sent with aiohttp (a uagents dependency) so that
+# one slow Jira/GitHub/Slack call does not freeze the agent.
+
+ACTION_HTTP_TIMEOUT = float(os.getenv("ACTION_HTTP_TIMEOUT", "20"))
+
+# (summary, risk) -> [lock, holders + waiters]; entries are dropped when unused
+_dedup_locks: Dict[tuple, list] = {}
+
+
+@contextlib.asynccontextmanager
+async def _dedup_lock(key: tuple):
+    entry = _dedup_locks.setdefault(key, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _dedup_locks[key]
+
+
+def create_http_session():
+    """aiohttp session for the async actions; create it inside the running event loop."""
+    import aiohttp
+
+    return aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=ACTION_HTTP_TIMEOUT))
+
+
+async def _post_json(session, url: str, headers: Dict[str, str], body: Dict[str, Any], auth=None):
+    """POST a JSON body; returns (status, text, parsed JSON or None)."""
+    if auth is not None:
+        import aiohttp
+
+        auth = aiohttp.BasicAuth(*auth)
+    async with session.post(url, headers=headers, json=body, auth=auth) as response:
+        text = await response.text()
+        try:
+            parsed = json.loads(text)
+        except ValueError:
+            parsed = None
+        return response.status, text, parsed
+
+
+@metrics.timed("jira_ticket")
+async def create_jira_ticket_async(session, summary: str, description: str, risk: str) -> Optional[Dict[str, Any]]:
+    if not all([JIRA_BASE_URL, JIRA_USER_EMAIL, JIRA_API_TOKEN, JIRA_PROJECT_KEY]):
+        print("❌ Jira credentials missing in .env (Check BASE_URL, EMAIL, TOKEN, PROJECT_KEY)")
+        return None
+
+    url, data, issue_type = jira_ticket_request(summary, description, risk)
+    status, text, body = await _post_json(session, url, JSON_HEADERS, data, auth=(JIRA_USER_EMAIL, JIRA_API_TOKEN))
+    if status in (200, 201) and body is not None:
+        print(f"✅ Jira {issue_type} created successfully! Key: {body.get('key', 'Unknown Key')}")
+        return body
+    print(f"❌ Jira issue creation failed with status {status}:")
+    print(text)
+    return None
+
+
+@metrics.timed("jira_comment")
+async def create_jira_comment_async(session, summary: str, description: str, risk: str) -> Optional[Dict[str, Any]]:
+    if not all([JIRA_BASE_URL, JIRA_USER_EMAIL, JIRA_API_TOKEN]):
+        print("❌ Jira credentials missing in .env")
+        return None
+
+    url, data = jira_comment_request(summary, description, risk)
+    status, text, body = await _post_json(session, url, JSON_HEADERS, data, auth=(JIRA_USER_EMAIL, JIRA_API_TOKEN))
+    if status == 201:
+        print(f"✅ Jira comment created successfully on {TARGET_ISSUE_KEY}!")
+        return body
+    print(f"❌ Jira comment creation failed with status {status}:")
+    print(text)
+    return None
+
+
+@metrics.timed("slack")
+async def send_slack_message_async(session, text: str):
+    if not SLACK_BOT_TOKEN or not SLACK_CHANNEL_ID:
+        print("⚠️ Slack credentials missing. Skipping Slack alert.")
+        return
+
+    url, headers, payload = slack_request(text)
+    status, raw, body = await _post_json(session, url, headers, payload)
+    if status != 200 or not (body or {}).get("ok"):
+        print(f"❌ Failed to send Slack message: {raw}")
+    else:
+        print("✅ Slack message sent successfully!")
+
+
+@metrics.timed("github")
+async def handle_github_action_async(session, issue_summary: str, description: str, risk: str, pr_number: Optional[int] = None):
+    if not GITHUB_TOKEN or not GITHUB_REPO:
+        print("⚠️ GitHub credentials missing. Skipping GitHub action.")
+        return None
+
+    request = github_request(issue_summary, description, risk, pr_number)
+    if request is None:
+        return None
+    kind, url, headers, data = request
+
+    status, text, body = await _post_json(session, url, headers, data)
+    if status == 201 and body is not None:
+        label = "Issue created" if kind == "issue" else "PR comment created"
+        print(f"✅ GitHub {label}: {body.get('html_url')}")
+        return body
+    label = "Issue creation" if kind == "issue" else "PR comment"
+    print(f"❌ GitHub {label} failed: {text}")
+    return None
+
+
+async def _guarded(sink: str, coro, errors: Dict[str, str]):
+    """Await one sink's request; a transport error or timeout is recorded in errors instead of raised."""
+    import aiohttp
+
+    try:
+        return await coro
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+        errors[sink] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        print(f"❌ {sink} request failed: {errors[sink]}")
+        return None
+
+
+async def take_actions_async(session, summary: str, description: str, risk: str, control_id: Optional[str] = None, pr_number: Optional[int] = None,
+                             related: Sequence[str] = ()):
+    """
+    Async take_actions: Jira and GitHub run concurrently, then Slack reports
+    the outcome. Returns the same dict as take_actions, plus errors
+    ({sink: message} for requests that failed in transport or timed out).
+
+    `related` are the crosswalk controls of control_id, resolved by the
+    caller off the event loop (a crosswalk reload reads SQLite).
+
+    One sink failing never aborts the others, so the caller can always store
+    the finding with whatever links were created (a retry would otherwise
+    file the GitHub issue again).
+    """
+    jira_key = None
+    github_link = None
+    action_result = "none"
+    errors: Dict[str, str] = {}
+
+    if risk.lower() in ('high', 'medium'):
+        ticket, gh_response = await asyncio.gather(
+            _guarded("jira", create_jira_ticket_async(session, summary, description, risk), errors),
+            _guarded("github", handle_github_action_async(session, summary, description, risk, pr_number), errors),
+        )
+        if not ticket:
+            await _guarded("jira_comment", create_jira_comment_async(session, summary, description, risk), errors)
+            action_result = "commented"
+        else:
+            jira_key = ticket.get("key")
+            action_result = "ticket_created"
+
+        if gh_response:
+            github_link = gh_response.get("html_url")
+
+        await _guarded("slack", send_slack_message_async(
+            session, slack_finding_text(summary, risk, control_id, action_result, related)), errors)
+
+    return {
+        "jira_key": jira_key,
+        "github_link": github_link,
+        "action_result": action_result,
+        "errors": errors,
+    }
+
+
+async def act_on_analysis_async(data: Dict[str, Any], session, source: str = 'code', log=print, executor=None) -> Dict[str, Any]:
+    """
+    Async act_on_analysis: SQLite work runs on `executor` (None = the loop's
+    default pool) and HTTP goes through the aiohttp `session`.
+
+    Findings with the same summary + risk are serialized, so two concurrent
+    requests cannot both pass the dedup check and file the same ticket.
+    """
+    from memory import add_cluster_member, finding_exists, store_finding
+    from finding_clusters import check_duplicate, register_finding
+    from crosswalk import related_controls
+
+    loop = asyncio.get_running_loop()
+    gemini = data.get("gemini_analysis", {})
+    risk = gemini.get("risk_level", "unknown")
+    issues = gemini.get("issues", [])
+    control_id = data.get("control_id")
+    log(f"🔍 Risk level: {risk}")
+    if control_id:
+        log(f"🔍 Control ID: {control_id}")
+
+    if not issues:
+        log("✅ No issues detected — no Jira, Slack, or GitHub action taken.")
+        return {"ok": True, "action": "none", "error": None}
+
+    # The crosswalk may reload from SQLite: keep that off the event loop
+    related = await loop.run_in_executor(executor, related_controls, control_id)
+
+    actions_taken = []
+    for issue in issues:
+        summary = issue.get("type", "Unknown issue")
+        desc = issue.get("description", "No description")
+        pr_number = issue.get("pr_number")
+
+        async with _dedup_lock((summary, risk)):
+            if await loop.run_in_executor(executor, finding_exists, summary, risk):
+                log(f"⚠️ Duplicate finding skipped: {summary}")
+                metrics.record_finding(source, "duplicate")
+                continue
+
+            match, vector = await loop.run_in_executor(executor, check_duplicate, summary, risk)
+            if match:
+                await loop.run_in_executor(executor, lambda: add_cluster_member(
+                    match["cluster_id"], summary, risk, desc, source, match["similarity"]))
+                log(f"🔗 Near-duplicate of #{match['cluster_id']} ({match['similarity']:.2f}), no new actions: {summary}")
+                actions_taken.append("clustered")
+                metrics.record_finding(source, "clustered")
+                continue
+
+            action_results = await take_actions_async(
+                session, summary=summary, description=desc, risk=risk,
+                control_id=control_id, pr_number=pr_number, related=related
+            )
+            for sink, error in action_results["errors"].items():
+                log(f"⚠️ {sink} failed for {summary} ({error}); storing the finding with the links that were created")
+
+            finding_id = await loop.run_in_executor(executor, lambda: store_finding(
+                summary=summary,
+                risk=risk,
+                jira_key=action_results.get("jira_key"),
+                github_link=action_results.get("github_link"),
+                slack_link=None,
+                control_id=control_id,
+                source=source,
+                description=desc,
+                recommendation=issue.get("recommendation")
+            ))
+            await loop.run_in_executor(executor, register_finding, finding_id, vector)
+
+        actions_taken.append(action_results.get("action_result", "none"))
+        metrics.record_finding(source, action_results.get("action_result", "none"))
+
+    return {"ok": True, "action": ",".join(actions_taken), "error": None}
@@ -17,78 +17,46 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '1'
 import json
 import re
 import textwrap
+import time
 from datetime import datetime
-from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from colorama import Fore, Style, init
-import google.generativeai as genai
-from dotenv import load_dotenv
-import chromadb
+
+import capture_store
+import metrics
+import prescan
+from clients import get_genai
+from crosswalk import related_controls
+from policy_mapper import search_policy
+from structured_output import CODE_ANALYSIS_SCHEMA, StructuredOutputError, generate_json
+from diff_chunker import chunk_diff, iter_hunks
+from hunk_cache import HunkCache, hunk_key
 
 # Initialize colorama
 init(autoreset=True)
 
-# ---------------------------------------------------------------------
-# Setup Gemini API
-# ---------------------------------------------------------------------
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-if not GEMINI_API_KEY:
-    raise EnvironmentError("❌ Missing GEMINI_API_KEY in .env")
-
-genai.configure(api_key=GEMINI_API_KEY)
-
-# ---------------------------------------------------------------------
-# Vector Search for Policy Controls
-# ---------------------------------------------------------------------
-CHROMA_DB_PATH = Path(__file__).parent / 'chroma_db'
-
-def search_policy(issue_description: str, top_k: int = 1):
-    """
-    Search for the most relevant policy control for a given issue.
-    
-    Args:
-        issue_description: Description of the security issue
-        top_k: Number of top results to return
-    
-    Returns:
-        List of matching control IDs
-    """
-    try:
-        client = chromadb.PersistentClient(path=str(CHROMA_DB_PATH))
-        collection = client.get_collection(name="policies")
-        
-        results = collection.query(
-            query_texts=[issue_description],
-            n_results=top_k
-        )
-        
-        if results['ids'] and len(results['ids'][0]) > 0:
-            return results['ids'][0]  # Return list of control IDs
-        return []
-    except Exception as e:
-        print(f"⚠️ Error searching policies: {e}")
-        return []
+# Gemini (google.generativeai) and Chroma are imported lazily on first use,
+# see clients.py; a missing GEMINI_API_KEY is reported when Gemini is called.
+# Control mapping (search_policy) is hybrid lexical + vector, see policy_mapper.py.
 
 # ---------------------------------------------------------------------
 # Core Analyzer (Gemini-based)
 # ---------------------------------------------------------------------
-def analyze_capture_with_gemini(capture_path):
-    """Send the capture JSON to Gemini for compliance/security analysis."""
-    with open(capture_path, "r", errors="ignore") as f:
-        data = json.load(f)
+MAX_CHUNK_CHARS = 8000
+MAX_PARALLEL_REQUESTS = int(os.getenv("GEMINI_MAX_PARALLEL", "4"))
+PRESCAN_ENABLED = os.getenv("PRESCAN_ENABLED", "1") != "0"
+HUNK_CACHE_ENABLED = os.getenv("HUNK_CACHE_ENABLED", "1") != "0"
+GEMINI_MODEL = "gemini-2.5-flash-lite"
+
+# Bump when the prompt or response format changes: cached hunk results and
+# existing analyses are keyed on it.
+PROMPT_VERSION = "2"
+RISK_RANK = {"unknown": 0, "low": 1, "medium": 2, "high": 3}
 
-    # Combine relevant content for Gemini context
-    prompt_content = {
-        "branch": data.get("branch"),
-        "commit_message": data.get("commit_message"),
-        "diff_content": data.get("diff_content", "")[:8000],  # truncate if too long
-        "recent_terminal_history": "\n".join(data.get("recent_terminal_history", [])[-50:]),
-        "config_snapshots": list(data.get("config_snapshots", {}).keys()),
-        "log_snippets": {k: v[:2000] for k, v in data.get("log_snippets", {}).items()},
-    }
 
-    prompt = f"""
+def build_prompt(prompt_content):
+    """Build the auditor prompt for one slice of developer activity."""
+    return f"""
 You are a security and compliance auditor AI.
 
 Analyze the following developer activity for **security, compliance, and privacy risks**.
@@ -101,6 +69,9 @@ Provide:
 Input data (JSON):
 {json.dumps(prompt_content, indent=2)}
 
+Each diff hunk is preceded by a "# hunk <id>" line. For every issue found in
+the diff, set "hunk" to the id of the hunk it was found in.
+
 Respond in this JSON format:
 
 {{
@@ -110,35 +81,253 @@ Respond in this JSON format:
       "type": "string",
       "description": "string",
       "recommendation": "string",
-      "related_control": "string (optional)"
+      "related_control": "string (optional)",
+      "hunk": "string (optional)"
     }}
   ],
   "summary": "short summary of the analysis"
 }}
     """
 
-    model = genai.GenerativeModel("gemini-2.5-flash-lite")
-    response = model.generate_content(prompt)
-
-    # ---------------------------------------------------------------------
-    # Improved JSON parsing (handles ```json ... ``` wrappers)
-    # ---------------------------------------------------------------------
-    raw_text = response.text.strip()
-    cleaned_text = re.sub(r"^```(?:json)?|```$", "", raw_text, flags=re.MULTILINE).strip()
 
+def run_gemini(prompt):
+    """Send one prompt to Gemini and return the validated JSON answer."""
+    model = get_genai().GenerativeModel(GEMINI_MODEL)
     try:
-        gemini_output = json.loads(cleaned_text)
-    except Exception:
-        gemini_output = {"raw_text": cleaned_text}
+        return generate_json(model, prompt, CODE_ANALYSIS_SCHEMA)
+    except StructuredOutputError as e:
+        print(f"{Fore.YELLOW}⚠️ {e}")
+        return {"raw_text": e.raw_text}
+
+
+def merge_analyses(results):
+    """Merge per-chunk Gemini outputs into one analysis, deduplicating issues."""
+    if len(results) == 1:
+        return results[0]
+
+    risk_level = "unknown"
+    issues, seen, summaries, raw = [], set(), [], []
+    for result in results:
+        if "raw_text" in result:
+            raw.append(result["raw_text"])
+            continue
+        risk = str(result.get("risk_level", "unknown")).lower()
+        if RISK_RANK.get(risk, 0) > RISK_RANK.get(risk_level, 0):
+            risk_level = risk
+        for issue in result.get("issues") or []:
+            if not isinstance(issue, dict):
+                continue
+            key = (
+                " ".join(str(issue.get("type", "")).lower().split()),
+                " ".join(str(issue.get("description", "")).lower().split()),
+            )
+            if key in seen:
+                continue
+            seen.add(key)
+            issues.append(issue)
+        summary = result.get("summary")
+        if summary and summary not in summaries:
+            summaries.append(summary)
+
+    merged = {"risk_level": risk_level, "issues": issues, "summary": " ".join(summaries)}
+    if raw:
+        merged["raw_text"] = "\n\n".join(raw)
+    return merged
+
+
+def _attribute_to_hunks(chunk, result):
+    """{label: [(issue, risk)]} for one chunk's answer, or None if an issue has no known hunk."""
+    if "raw_text" in result or not chunk.labels:
+        return None
+    per_hunk = {label: [] for label in chunk.labels}
+    for issue in result.get("issues") or []:
+        label = str(issue.get("hunk", "")).strip() if isinstance(issue, dict) else ""
+        if label not in per_hunk:
+            return None
+        per_hunk[label].append((issue, str(issue.get("risk_level", result.get("risk_level", "low"))).lower()))
+    return per_hunk
+
+
+def cache_chunk_results(cache, chunk_results):
+    """
+    Store Gemini's answers per hunk. Only hunks whose issues can all be
+    attributed are cached, so a cache hit never carries issues that came
+    from a neighbouring hunk or from the terminal/log context.
+
+    chunk_diff splits an oversized hunk into several chunks that share its
+    label, so the answers for every piece are merged before storing; a hunk
+    is skipped if any of its pieces could not be attributed.
+    """
+    merged, uncacheable = {}, set()
+    for chunk, result in chunk_results:
+        per_hunk = _attribute_to_hunks(chunk, result)
+        if per_hunk is None:
+            uncacheable.update(chunk.labels)
+            continue
+        for label, issues in per_hunk.items():
+            merged.setdefault(label, []).extend(issues)
+
+    entries = {}
+    for label, issues in merged.items():
+        if label in uncacheable:
+            continue
+        risk = "low"
+        for _, issue_risk in issues:
+            if RISK_RANK.get(issue_risk, 0) > RISK_RANK.get(risk, 0):
+                risk = issue_risk
+        entries[label] = {"risk_level": risk, "issues": [issue for issue, _ in issues]}
+    cache.put_many(entries)
+
+
+def cached_analysis(cached):
+    """Turn cached per-hunk results into one analysis dict for merging."""
+    risk_level, issues = "low", []
+    for entry in cached.values():
+        if RISK_RANK.get(entry.get("risk_level"), 0) > RISK_RANK.get(risk_level, 0):
+            risk_level = entry["risk_level"]
+        issues.extend(entry.get("issues", []))
+    return {
+        "risk_level": risk_level,
+        "issues": issues,
+        "summary": f"Reused cached analysis for {len(cached)} hunk(s).",
+    }
+
+
+def analyze_diff_chunks(data):
+    """
+    Analyze a capture chunk by chunk with bounded parallelism.
+
+    The diff is split per file/hunk by diff_chunker and each chunk goes
+    through the local pre-scan first; only escalated chunks reach Gemini.
+    Terminal history, config snapshots and logs are only sent with the first
+    prompt.
+
+    Returns:
+        (gemini_output, coverage)
+    """
+    diff_text = data.get("diff_content", "") or ""
+
+    # Hunks analyzed before (same change on another commit/branch) come from the cache
+    cache, cached = None, {}
+    label = lambda hunk: hunk_key(hunk, f"{GEMINI_MODEL}:{PROMPT_VERSION}")
+    hunks = [(path, hunk, label(hunk)) for path, hunk in iter_hunks(diff_text)]
+    if HUNK_CACHE_ENABLED:
+        cache = HunkCache()
+        cached = cache.get_many(key for _, _, key in hunks)
+
+    chunks, coverage = chunk_diff(diff_text, max_chars=MAX_CHUNK_CHARS, hunk_label=label,
+                                  exclude_labels=cached)
+
+    context = {
+        "branch": data.get("branch"),
+        "commit_message": data.get("commit_message"),
+    }
+    extras = {
+        "recent_terminal_history": "\n".join(data.get("recent_terminal_history", [])[-50:]),
+        "config_snapshots": list(data.get("config_snapshots", {}).keys()),
+        "log_snippets": {k: v[:2000] for k, v in data.get("log_snippets", {}).items()},
+    }
+
+    # Local pre-scan: clean chunks are skipped, obvious secrets become
+    # findings immediately, only ambiguous content is escalated to Gemini.
+    escalated, prescan_issues = [], []
+    verdicts = {prescan.CLEAN: 0, prescan.FLAGGED: 0, prescan.ESCALATE: 0}
+    for chunk in chunks:
+        if not PRESCAN_ENABLED:
+            escalated.append(chunk)
+            continue
+        result = prescan.scan_text(chunk.text)
+        verdicts[result.verdict] += 1
+        prescan_issues.extend(result.issues)
+        if result.verdict == prescan.ESCALATE:
+            escalated.append(chunk)
+
+    # Cached hunks skip Gemini, but the (cheap) pre-scan still runs on them
+    if PRESCAN_ENABLED and cached:
+        for path, hunk, key in hunks:
+            if key in cached:
+                prescan_issues.extend(prescan.scan_text(f"diff --git a/{path} b/{path}\n{hunk}").issues)
+
+    extras_needed = True
+    if PRESCAN_ENABLED:
+        extras_text = "\n".join([extras["recent_terminal_history"], *extras["log_snippets"].values()])
+        extras_scan = prescan.scan_text(extras_text)
+        prescan_issues.extend(extras_scan.issues)
+        extras_needed = extras_scan.verdict == prescan.ESCALATE
+
+    prompts = []
+    for i, chunk in enumerate(escalated or ([None] if extras_needed else [])):
+        prompt_content = dict(context)
+        if len(escalated) > 1:
+            prompt_content["diff_part"] = f"{i + 1}/{len(escalated)}"
+        prompt_content["diff_content"] = chunk.text if chunk else ""
+        if i == 0 and extras_needed:
+            prompt_content.update(extras)
+        prompts.append(build_prompt(prompt_content))
+
+    if len(chunks) > 1:
+        print(f"{Fore.CYAN}✂️  Split diff into {len(chunks)} chunks "
+              f"({coverage['analyzed_bytes']}/{coverage['diff_bytes']} bytes, "
+              f"{len(coverage['skipped_files'])} files skipped)")
+    if PRESCAN_ENABLED:
+        print(f"{Fore.CYAN}🔎 Pre-scan: {verdicts[prescan.CLEAN]} clean, {verdicts[prescan.FLAGGED]} flagged, "
+              f"{verdicts[prescan.ESCALATE]} escalated — {len(prompts)} Gemini call(s)")
+
+    results = []
+    if prompts:
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL_REQUESTS, len(prompts)))) as pool:
+            results = list(pool.map(run_gemini, prompts))
+    if cache:
+        cache_chunk_results(cache, zip(escalated, results))
+        cache.evict()
+        stats = cache.stats()
+        print(f"{Fore.CYAN}🗃️  Hunk cache: {stats['hits']} hit(s), {stats['misses']} miss(es) "
+              f"({stats['hit_rate']:.0%} hit rate)")
+    if cached:
+        results.append(cached_analysis(cached))
+    if prescan_issues or not results:
+        results.append(prescan.issues_to_analysis(prescan_issues))
+
+    coverage["llm_calls"] = len(prompts)
+    coverage["prescan"] = verdicts if PRESCAN_ENABLED else None
+    coverage["hunk_cache"] = cache.stats() if cache else None
+    return merge_analyses(results), coverage
+
+
+def analysis_path_for(capture_path):
+    """Path of the _analysis.json written for a capture (file path or store ref)."""
+    if capture_store.is_store_ref(capture_path):
+        store = capture_store.store_for(capture_path)
+        info = store.info(capture_path)
+        safe_branch = re.sub(r"[^a-zA-Z0-9_-]", "_", info["branch"] or "unknown")
+        # Store names are per-second timestamps; the id keeps them unique
+        name = f"{info['name']}_{info['id']}"
+        # captures/analysis next to the store's captures/store
+        analysis_dir = os.path.join(os.path.dirname(os.path.normpath(store.root)), "analysis")
+        return os.path.join(analysis_dir, safe_branch, f"{name}_analysis.json")
+    base_dir = os.path.dirname(capture_path).replace("commits", "analysis")
+    capture_name = os.path.basename(capture_path).replace(".json", "_analysis.json")
+    return os.path.join(base_dir, capture_name)
+
+
+@metrics.timed("analyze")
+def analyze_capture_with_gemini(capture_path, verbose=True):
+    """
+    Send a capture to Gemini for compliance/security analysis.
+    `capture_path` is a legacy JSON path or a "store:<id>" capture ref.
+    """
+    data = capture_store.load_capture(capture_path)
+
+    gemini_output, coverage = analyze_diff_chunks(data)
 
     # ---------------------------------------------------------------------
-    # Vector search for control_id mapping
+    # Control mapping (keyword short-circuit, else lexical + vector)
     # ---------------------------------------------------------------------
     issues = gemini_output.get("issues", [])
     control_id = None
     
     if issues and isinstance(issues, list):
-        # Use the first issue's description for vector search
+        # Use the first issue's description for policy mapping
         issue_desc = f"{issues[0].get('type', '')} {issues[0].get('description', '')}"
         matches = search_policy(issue_desc, top_k=1)
         if matches:
@@ -152,19 +341,22 @@ Respond in this JSON format:
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "source_capture": capture_path,
         "gemini_analysis": gemini_output,
-        "control_id": control_id
+        "control_id": control_id,
+        "related_controls": list(related_controls(control_id)),
+        "coverage": coverage,
+        "capture_sha256": capture_store.capture_sha256(capture_path),
+        "prompt_version": PROMPT_VERSION,
     }
 
-    base_dir = os.path.dirname(capture_path).replace("commits", "analysis")
-    os.makedirs(base_dir, exist_ok=True)
-
-    capture_name = os.path.basename(capture_path).replace(".json", "_analysis.json")
-    out_path = os.path.join(base_dir, capture_name)
+    out_path = analysis_path_for(capture_path)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
 
     with open(out_path, "w") as f:
         json.dump(analysis, f, indent=4)
 
     print(f"\n✅ Gemini analysis complete: {out_path}")
+    if not verbose:
+        return analysis
 
     # ---------------------------------------------------------------------
     # Display formatted summary in terminal
@@ -193,6 +385,8 @@ Respond in this JSON format:
     # --- 2. Print Summary Info ---
     print(f"{Style.BRIGHT}Control ID:{Style.NORMAL} {control_id}")
     print(f"{Style.BRIGHT}Summary:   {Style.NORMAL} {summary}")
+    print(f"{Style.BRIGHT}Coverage:  {Style.NORMAL} {coverage['analyzed_bytes']}/{coverage['diff_bytes']} diff bytes "
+          f"in {coverage['chunks']} chunk(s)")
 
     # --- 3. Print Formatted Issues ---
     if issues and isinstance(issues, list):
@@ -224,15 +418,129 @@ Respond in this JSON format:
 
 
 # ---------------------------------------------------------------------
-# Auto-run for latest capture
+# Backfill: (re-)analyze every capture that has no up-to-date analysis
+# ---------------------------------------------------------------------
+BACKFILL_CHECKPOINT = os.path.join("captures", ".backfill_checkpoint.json")
+
+
+def is_up_to_date(capture_path, sha):
+    """True if the capture already has an analysis for this content and prompt version."""
+    try:
+        with open(analysis_path_for(capture_path), "r") as f:
+            existing = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return existing.get("capture_sha256") == sha and existing.get("prompt_version") == PROMPT_VERSION
+
+
+def load_checkpoint(path=BACKFILL_CHECKPOINT):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_checkpoint(checkpoint, path=BACKFILL_CHECKPOINT):
+    """Write the checkpoint atomically so an interrupted run can resume."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, path)
+
+
+def backfill(pattern="captures/commits/**/*.json", workers=4, force=False, checkpoint_path=BACKFILL_CHECKPOINT):
+    """
+    Analyze every capture (legacy files under captures/commits and the
+    capture store) that is missing an
+    up-to-date _analysis.json (tracked by capture hash + PROMPT_VERSION).
+
+    Captures go through a bounded pool of `workers`; progress is written to a
+    checkpoint after each capture so an interrupted backfill resumes where it
+    stopped. Returns a dict of counters.
+    """
+    checkpoint = {} if force else load_checkpoint(checkpoint_path)
+    pending, skipped = [], 0
+    for path in capture_store.list_captures(pattern):
+        sha = capture_store.capture_sha256(path)
+        done = checkpoint.get(path, {})
+        if not force and (
+            (done.get("status") == "done" and done.get("sha256") == sha
+             and done.get("prompt_version") == PROMPT_VERSION)
+            or is_up_to_date(path, sha)
+        ):
+            skipped += 1
+            continue
+        pending.append((path, sha))
+
+    total = len(pending)
+    print(f"{Fore.CYAN}🧠 Backfill: {total} capture(s) to analyze, {skipped} already up to date "
+          f"(prompt v{PROMPT_VERSION}, {workers} worker(s))")
+    if not pending:
+        return {"analyzed": 0, "failed": 0, "skipped": skipped}
+
+    analyzed = failed = 0
+    started = time.monotonic()
+    queue = iter(pending)
+    in_flight = {}
+
+    def submit(pool):
+        item = next(queue, None)
+        if item:
+            in_flight[pool.submit(analyze_capture_with_gemini, item[0], False)] = item
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Keep at most 2x workers captures queued so memory stays bounded
+        for _ in range(workers * 2):
+            submit(pool)
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path, sha = in_flight.pop(future)
+                try:
+                    future.result()
+                    analyzed += 1
+                    status = "done"
+                except Exception as e:
+                    failed += 1
+                    status = "failed"
+                    print(f"{Fore.RED}❌ Failed to analyze {path}: {e}")
+                checkpoint[path] = {"sha256": sha, "prompt_version": PROMPT_VERSION, "status": status}
+                save_checkpoint(checkpoint, checkpoint_path)
+
+                completed = analyzed + failed
+                elapsed = time.monotonic() - started
+                rate = completed / elapsed if elapsed else 0.0
+                eta = (total - completed) / rate if rate else 0.0
+                print(f"{Fore.CYAN}📈 [{completed}/{total}] {rate:.2f} captures/s, ETA {eta:.0f}s — {path}")
+                submit(pool)
+
+    elapsed = time.monotonic() - started
+    print(f"\n✅ Backfill complete: {analyzed} analyzed, {failed} failed, {skipped} skipped "
+          f"in {elapsed:.1f}s ({analyzed / elapsed if elapsed else 0:.2f} captures/s)")
+    return {"analyzed": analyzed, "failed": failed, "skipped": skipped}
+
+
+# ---------------------------------------------------------------------
+# Auto-run for latest capture (or backfill)
 # ---------------------------------------------------------------------
 if __name__ == "__main__":
-    import glob
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyze commit captures with Gemini.")
+    parser.add_argument("--backfill", action="store_true",
+                        help="analyze every capture without an up-to-date analysis")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BACKFILL_WORKERS", "4")))
+    parser.add_argument("--force", action="store_true", help="re-analyze everything, ignoring the checkpoint")
+    args = parser.parse_args()
 
-    paths = sorted(glob.glob("captures/commits/**/*.json", recursive=True))
-    if not paths:
-        print("⚠️ No capture files found. Commit something first.")
+    if args.backfill:
+        backfill(workers=args.workers, force=args.force)
     else:
-        latest = paths[-1]
-        print(f"🧠 Sending latest capture to Gemini: {latest}")
-        analyze_capture_with_gemini(latest)
+        latest = capture_store.latest_capture()
+        if not latest:
+            print("⚠️ No capture files found. Commit something first.")
+        else:
+            print(f"🧠 Sending latest capture to Gemini: {latest}")
+            analyze_capture_with_gemini(latest)
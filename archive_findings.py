@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Archive resolved findings to the cold database, or restore them.
+
+    python archive_findings.py                        # archive resolved findings older than ARCHIVE_AFTER_DAYS
+    python archive_findings.py --older-than-days 30 --batch-size 1000
+    python archive_findings.py --restore-jira CA-123 CA-124
+    python archive_findings.py --stats
+
+Meant to run from cron; each batch is a short transaction, so the agent and
+the screenshot service keep writing while it runs.
+"""
+
+import argparse
+
+import memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=int, default=memory.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=memory.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=None)
+    parser.add_argument("--restore-id", type=int, nargs="+", metavar="ID")
+    parser.add_argument("--restore-jira", nargs="+", metavar="KEY")
+    parser.add_argument("--stats", action="store_true")
+    args = parser.parse_args()
+
+    memory.init_db()
+    if args.restore_id or args.restore_jira:
+        memory.restore_findings(ids=args.restore_id, jira_keys=args.restore_jira)
+    elif not args.stats:
+        moved = memory.archive_resolved(args.older_than_days, args.batch_size, args.max_batches)
+        if not moved:
+            print(f"✅ Nothing to archive (resolved more than {args.older_than_days} day(s) ago)")
+
+    stats = memory.archive_stats()
+    print(f"📊 Hot: {stats['hot']} finding(s) ({stats['hot_open']} open) | Archived: {stats['archived']}")
+
+
+if __name__ == "__main__":
+    main()
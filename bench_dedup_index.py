@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark the near-duplicate index (finding_clusters.OpenFindingIndex).
+
+Fills the index with --dim dimensional unit vectors for a growing number of
+open findings and times the startup load, nearest() lookups and
+incremental add/discard for the exact and HNSW backends. recall@1 is
+measured against the exact scan. Embedding the summary itself (sentence-transformers) is not included.
+
+    python bench_dedup_index.py --sizes 1000,10000,50000
+    python bench_dedup_index.py --backends exact
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from finding_clusters import OpenFindingIndex
+
+
+def unit_vectors(count, dim, rng):
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,5000,10000,50000")
+    parser.add_argument("--dim", type=int, default=384, help="all-MiniLM-L6-v2 is 384")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--backends", default="exact,hnsw")
+    args = parser.parse_args()
+    rng = np.random.default_rng(5)
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        vectors = unit_vectors(size, args.dim, rng)
+        # Queries close to a stored vector, like a reworded finding
+        queries = vectors[rng.integers(0, size, args.queries)] + unit_vectors(args.queries, args.dim, rng) * 0.05
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        truth = (queries @ vectors.T).argmax(axis=1) + 1
+        for backend in args.backends.split(","):
+            bench(backend, size, vectors, queries, truth)
+
+
+def bench(backend, size, vectors, queries, truth):
+    index = OpenFindingIndex(backend=backend)
+    started = time.perf_counter()
+    index.add_many(list(range(1, size)), vectors[:-1])  # startup load
+    load_s = time.perf_counter() - started
+    started = time.perf_counter()
+    index.add(size, vectors[-1])  # one newly stored head
+    add_us = (time.perf_counter() - started) * 1e6
+
+    samples, hits = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        found = index.nearest(query)
+        samples.append((time.perf_counter() - started) * 1000)
+        hits += bool(found) and found[0][0] == expected
+
+    started = time.perf_counter()
+    for finding_id in range(1, size + 1, 2):
+        index.discard(finding_id)
+    discard_us = (time.perf_counter() - started) / ((size + 1) // 2) * 1e6
+    print(f"🧭 {backend:<5} {size:>7,} open   nearest median {statistics.median(samples):6.3f} ms   "
+          f"p99 {sorted(samples)[int(len(samples) * 0.99) - 1]:6.3f} ms   recall@1 {hits / len(queries):.3f}   "
+          f"load {load_s:5.2f} s   add {add_us:6.1f} µs   discard {discard_us:5.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
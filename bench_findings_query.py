@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory.query_findings (keyset pagination) against OFFSET paging.
+
+Builds a throwaway audit_log with --rows findings (default 1,000,000), then
+times the first page, a page in the middle and the last page, with and
+without filters. Keyset page times should be flat; OFFSET grows with depth.
+
+    python bench_findings_query.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import memory
+
+RISKS = ("high", "medium", "low")
+SOURCES = ("code", "screenshot")
+CONTROLS = tuple(f"CC{n}.{m}" for n in range(1, 10) for m in range(1, 6))
+ASSIGNEES = (None,) * 6 + ("alice", "bob", "carol", "dave")
+
+
+def build(path, rows):
+    memory.DB_PATH = path
+    with open(os.devnull, "w") as devnull:
+        import contextlib
+        with contextlib.redirect_stdout(devnull):
+            memory.init_db()
+    rnd = random.Random(7)
+    start = datetime(2023, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+
+    def gen():
+        for i in range(rows):
+            resolved = rnd.random() < 0.8
+            yield (
+                (start + timedelta(seconds=i * 30 + rnd.randint(0, 29))).isoformat() + "Z",
+                f"Finding {rnd.choice(('Hardcoded secret', 'Public S3 bucket', 'Weak TLS', 'Open IAM policy'))} #{i}",
+                rnd.choice(RISKS), f"CA-{i}", None, None, int(resolved), rnd.choice(CONTROLS),
+                rnd.choice(SOURCES), rnd.choice(ASSIGNEES), "resolved" if resolved else "open",
+            )
+
+    conn.executemany("""
+        INSERT INTO audit_log (timestamp, summary, risk_level, jira_key, github_link, slack_link,
+                               resolved, control_id, source, assignee_id, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, gen())
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def timed(fn, runs=20):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def cursor_at(path, depth, filters_sql="", params=()):
+    """The keyset cursor a client would hold after paging `depth` rows in."""
+    conn = sqlite3.connect(path)
+    row = conn.execute(
+        f"SELECT timestamp, id FROM audit_log {filters_sql} ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET ?",
+        (*params, max(0, depth - 1)),
+    ).fetchone()
+    conn.close()
+    return memory.encode_cursor(*row) if row else None
+
+
+def offset_page(path, offset, limit, filters_sql="", params=()):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        f"SELECT {', '.join(memory.FINDING_COLUMNS)} FROM audit_log {filters_sql} "
+        f"ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?", (*params, limit, offset),
+    ).fetchall()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_memory.db")
+    started = time.perf_counter()
+    build(path, args.rows)
+    print(f"🧱 Built {args.rows:,} findings in {time.perf_counter() - started:.1f}s ({os.path.getsize(path) / 1e6:.0f} MB)")
+
+    scenarios = [
+        ("all findings", {}, "", ()),
+        ("unresolved", {"resolved": False}, "WHERE resolved = 0", ()),
+        ("high risk, open", {"risk": "high", "resolved": False}, "WHERE risk_level = 'high' AND resolved = 0", ()),
+        ("control CC3.2", {"control_id": "CC3.2"}, "WHERE control_id = 'CC3.2'", ()),
+        ("alice's open", {"assignee": "alice", "status": "open"}, "WHERE assignee_id = 'alice' AND status = 'open'", ()),
+    ]
+    conn = sqlite3.connect(path)
+    for label, filters, filters_sql, params in scenarios:
+        total = conn.execute(f"SELECT COUNT(*) FROM audit_log {filters_sql}", params).fetchone()[0]
+        print(f"\n📄 {label} ({total:,} rows, page size {args.limit})")
+        for depth in (0, total // 2, max(0, total - args.limit)):
+            cursor = cursor_at(path, depth, filters_sql, params) if depth else None
+            keyset = timed(lambda: memory.query_findings(limit=args.limit, cursor=cursor, **filters))
+            offset = timed(lambda: offset_page(path, depth, args.limit, filters_sql, params), runs=3)
+            print(f"   row {depth:>9,}: keyset {keyset:7.2f} ms   OFFSET {offset:8.2f} ms")
+
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM audit_log WHERE risk_level = ? AND resolved = 0 "
+        "AND (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT 51", ("high", "2024", 1),
+    ).fetchall()
+    print("\n🔍 Plan (high risk, open, after cursor):", "; ".join(r[-1] for r in plan))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory.search_findings on a synthetic audit_log.
+
+Builds a throwaway database with --rows findings (summary, description and
+recommendation drawn from realistic templates, indexed by the FTS5 triggers)
+and times common, rare, prefix and phrase queries.
+
+    python bench_findings_search.py --rows 2000000
+    python bench_findings_search.py --db /tmp/bench_search.db   # reuse a built database
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import memory
+
+SUMMARIES = [
+    "Hardcoded AWS access key", "Public S3 bucket", "Weak TLS configuration", "Open IAM policy",
+    "Secret in environment file", "SQL injection risk", "Missing encryption at rest",
+    "Overly permissive security group", "Unpinned dependency", "Debug mode enabled in production",
+    "Private key committed", "Disabled certificate verification", "Wildcard CORS origin",
+]
+OBJECTS = ["config/settings.py", "terraform/s3.tf", "deploy/values.yaml", ".env.production", "src/db/query.py",
+           "infra/iam.tf", "docker-compose.yml", "app/server.js", "charts/api/templates/ingress.yaml"]
+DETAILS = [
+    "grants {verb} to all principals", "exposes {verb} on 0.0.0.0/0", "stores the credential in plain text",
+    "allows {verb} without authentication", "uses TLS 1.0 for {verb}", "concatenates user input into {verb}",
+]
+VERBS = ["s3:GetObject", "s3:PutObject", "iam:PassRole", "port 22", "the admin API", "SELECT statements",
+         "the metrics endpoint", "kms:Decrypt"]
+FIXES = ["Rotate the key and move it to a secrets manager", "Enable S3 Block Public Access",
+         "Restrict the policy to the required principals", "Require TLS 1.2 or newer",
+         "Use parameterised queries", "Pin the dependency to a reviewed version"]
+
+
+def build(path, rows):
+    memory.DB_PATH = path
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        memory.init_db()
+    rnd = random.Random(11)
+    start = datetime(2022, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+
+    def gen():
+        for i in range(rows):
+            summary = rnd.choice(SUMMARIES)
+            detail = rnd.choice(DETAILS).format(verb=rnd.choice(VERBS))
+            description = f"{summary} in {rnd.choice(OBJECTS)}: {detail} (commit {rnd.getrandbits(40):010x})"
+            yield ((start + timedelta(seconds=i * 20)).isoformat() + "Z", summary, rnd.choice(("high", "medium", "low")),
+                   int(rnd.random() < 0.8), description, rnd.choice(FIXES))
+
+    conn.executemany("""
+        INSERT INTO audit_log (timestamp, summary, risk_level, resolved, description, recommendation)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, gen())
+    conn.commit()
+    conn.execute("INSERT INTO findings_fts(findings_fts) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+
+
+def timed(fn, runs=20):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--db", help="existing benchmark database to reuse")
+    args = parser.parse_args()
+
+    if args.db:
+        path = memory.DB_PATH = args.db
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "bench_search.db")
+        started = time.perf_counter()
+        build(path, args.rows)
+        print(f"🧱 Built {args.rows:,} findings in {time.perf_counter() - started:.1f}s "
+              f"({os.path.getsize(path) / 1e6:.0f} MB)")
+
+    conn = sqlite3.connect(path)
+    queries = [
+        ("aws key", {}), ("s3 public", {}), ('"private key committed"', {}), ("kms:decrypt", {}),
+        ("debu*", {}), ("s3 public", {"resolved": False}), ("tls", {"order": "recent"}),
+        ("0123456789", {}),
+    ]
+    for query, options in queries:
+        matches = conn.execute("SELECT COUNT(*) FROM findings_fts WHERE findings_fts MATCH ?",
+                               (memory.to_fts_query(query),)).fetchone()[0]
+        median, worst, hits = timed(lambda: memory.search_findings(query, limit=20, **options))
+        label = f"{query!r} {options or ''}"
+        print(f"🔎 {label:<38} {matches:>9,} matches   median {median:6.2f} ms   max {worst:6.2f} ms")
+        if hits:
+            print(f"      top: {hits[0].snippet[:90]}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
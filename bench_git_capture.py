@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Measure per-commit git overhead of the capture step, before and after.
+
+"before" replays the old hook: `git diff --cached > /tmp/staged.diff`, then
+three subprocesses (rev-parse, config user.name, config user.email), then
+reading the diff file back. "after" is capture_commit.get_git_info() +
+stream_staged_diff(): one `git var` and one `git diff --cached --numstat -p`.
+
+Run it inside a large repository with something staged:
+    cd /path/to/big/repo && git add -A && python /path/to/bench_git_capture.py --runs 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+from capture_commit import get_git_info, stream_staged_diff
+
+
+def before(diff_path):
+    with open(diff_path, "wb") as f:
+        subprocess.run(["git", "diff", "--cached"], stdout=f, check=False)
+    branch = subprocess.check_output(["git", "rev-parse", "--abbrev-ref", "HEAD"]).decode().strip()
+    author = subprocess.run(["git", "config", "user.name"], capture_output=True).stdout.decode().strip()
+    email = subprocess.run(["git", "config", "user.email"], capture_output=True).stdout.decode().strip()
+    with open(diff_path, "r", encoding="utf-8", errors="ignore") as f:
+        diff = f.read()
+    return branch, author, email, diff
+
+
+def after():
+    branch, author, email, _ = get_git_info()
+    diff, _ = stream_staged_diff()
+    return branch, author, email, diff
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    diff_path = os.path.join(tempfile.gettempdir(), "staged_bench.diff")
+    old, new = before(diff_path), after()
+    assert old[0] == new[0] and old[3] == new[3], "before/after disagree on branch or diff"
+    print(f"📄 Staged diff: {len(new[3].encode()) / 1024:.1f} KB on branch {new[0]}")
+
+    b_med, b_max = timed(lambda: before(diff_path), args.runs)
+    a_med, a_max = timed(after, args.runs)
+    os.remove(diff_path)
+
+    print(f"before (4 git processes + temp file): median {b_med:7.2f} ms   max {b_max:7.2f} ms")
+    print(f"after  (2 git processes, streamed):   median {a_med:7.2f} ms   max {a_max:7.2f} ms")
+    print(f"saved per commit: {b_med - a_med:.2f} ms ({(b_med - a_med) / b_med:.0%})")
+
+
+if __name__ == "__main__":
+    main()
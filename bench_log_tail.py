@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark log capture on a generated multi-GB log.
+
+Compares the old `f.readlines()[-lines:]` approach with the reverse
+block-seeking and mmap tail readers in capture_commit.
+
+Usage:
+    python bench_log_tail.py --size-mb 2048
+    python bench_log_tail.py --size-mb 4096 --skip-readlines   # avoid loading 4 GB into RAM
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from capture_commit import tail_lines
+
+
+def generate_log(path, size_mb):
+    """Write a synthetic log of roughly size_mb megabytes."""
+    line = b"2024-01-01T00:00:00Z INFO deploy worker=7 request_id=abcdef0123456789 status=200 latency_ms=12\n"
+    block = line * (1024 * 1024 // len(line))
+    target = size_mb * 1024 * 1024
+    with open(path, "wb") as f:
+        written = 0
+        while written < target:
+            f.write(block)
+            written += len(block)
+        f.write(b"2024-01-01T23:59:59Z ERROR terraform apply failed: AccessDenied\n")
+
+
+def measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {elapsed * 1000:>10.2f} ms   peak {peak / 1024 / 1024:>9.2f} MB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--path", help="existing log to use instead of generating one")
+    parser.add_argument("--skip-readlines", action="store_true", help="skip the old whole-file baseline")
+    args = parser.parse_args()
+
+    path = args.path
+    tmpdir = None
+    if not path:
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, "app.log")
+        print(f"📝 Generating {args.size_mb} MB log at {path}...")
+        generate_log(path, args.size_mb)
+
+    print(f"📄 {path}: {os.path.getsize(path) / 1024 / 1024:.0f} MB, last {args.lines} lines\n")
+    try:
+        if not args.skip_readlines:
+            def readlines():
+                with open(path, "r", errors="ignore") as f:
+                    return "".join(f.readlines()[-args.lines:])
+            baseline = measure("readlines()[-N:]", readlines)
+        block = measure("tail_lines (blocks)", lambda: tail_lines(path, args.lines))
+        mapped = measure("tail_lines (mmap)", lambda: tail_lines(path, args.lines, use_mmap=True))
+        assert block == mapped
+        if not args.skip_readlines:
+            assert block == baseline
+    finally:
+        if tmpdir:
+            os.remove(path)
+            os.rmdir(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
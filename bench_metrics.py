@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Measure the per-call overhead of metrics.timed() and the cost of render().
+
+    python bench_metrics.py
+    python bench_metrics.py --calls 500000 --threads 4
+"""
+
+import argparse
+import threading
+import time
+
+import metrics
+
+
+def noop():
+    return None
+
+
+def per_call_us(fn, calls, threads):
+    def run():
+        for _ in range(calls):
+            fn()
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) / (calls * threads) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200000, help="calls per thread")
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    decorated = metrics.timed("bench_decorated")(noop)
+
+    def with_block():
+        with metrics.timed("bench_with"):
+            pass
+
+    baseline = per_call_us(noop, args.calls, args.threads)
+    print(f"⏱️ plain call          {baseline:6.3f} µs")
+    for label, fn in (("@timed", decorated), ("with timed()", with_block)):
+        cost = per_call_us(fn, args.calls, args.threads)
+        print(f"⏱️ {label:<18} {cost:6.3f} µs  (+{cost - baseline:.3f} µs per stage, {args.threads} thread(s))")
+
+    for stage in ("capture", "llm", "policy_search", "dedup", "db_write", "jira_ticket", "github", "slack"):
+        metrics.observe_stage(stage, 0.01)
+    started = time.perf_counter()
+    text = metrics.render()
+    print(f"📈 render(): {(time.perf_counter() - started) * 1000:.3f} ms for {len(text.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    main()
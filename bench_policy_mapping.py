@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Evaluate and time policy mapping on the labeled set (policy_mapping_eval.csv).
+
+Compares the pure Chroma query (the old search_policy), BM25 alone and the
+hybrid mapper, reporting accuracy@k (a hit if any acceptable control is in
+the top k), latency, and how many findings the keyword short-circuit
+resolved without an embedding call. Needs a populated chroma_db
+(python populate_policies.py) for the chroma and hybrid rows.
+
+The set is split: QUERY_EXPANSIONS and the short-circuit thresholds were
+tuned on the "tuning" rows, so accuracy is reported on the "heldout" rows
+unless --split says otherwise. Do not tune against the held-out rows; add
+new tuning cases instead.
+
+    python bench_policy_mapping.py
+    python bench_policy_mapping.py --k 1,3,5 --runs 5 --show-misses
+    python bench_policy_mapping.py --split tuning
+"""
+
+import argparse
+import csv
+import statistics
+import time
+from pathlib import Path
+
+import policy_mapper
+
+EVAL_CSV = Path(__file__).parent / 'policy_mapping_eval.csv'
+
+
+def load_eval(path=EVAL_CSV, split='heldout'):
+    """(finding, acceptable controls) pairs of one split ("tuning", "heldout" or "all")."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(row['finding'], set(row['controls'].split('|'))) for row in csv.DictReader(f)
+                if split == 'all' or row['split'] == split]
+
+
+def evaluate(label, rank, cases, ks, runs, show_misses):
+    """rank(text, k) -> list of control ids; prints accuracy@k and latency."""
+    depth = max(ks)
+    hits = {k: 0 for k in ks}
+    samples = []
+    for text, expected in cases:
+        for _ in range(runs):
+            started = time.perf_counter()
+            ranked = rank(text, depth)
+            samples.append((time.perf_counter() - started) * 1000)
+        for k in ks:
+            hits[k] += bool(expected & set(ranked[:k]))
+        if show_misses and not (ranked[:1] and ranked[0] in expected):
+            print(f"      miss: {text[:60]!r} -> {ranked[:3]} (want {'|'.join(sorted(expected))})")
+    accuracy = "   ".join(f"acc@{k} {hits[k] / len(cases):.3f}" for k in ks)
+    p95 = sorted(samples)[int(len(samples) * 0.95) - 1]
+    print(f"📐 {label:<8} {accuracy}   median {statistics.median(samples):7.3f} ms   p95 {p95:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", default="1,3")
+    parser.add_argument("--runs", type=int, default=3, help="timed repetitions per finding")
+    parser.add_argument("--show-misses", action="store_true")
+    parser.add_argument("--split", choices=("heldout", "tuning", "all"), default="heldout")
+    args = parser.parse_args()
+    ks = [int(k) for k in args.k.split(",")]
+    cases = load_eval(split=args.split)
+    index = policy_mapper.PolicyIndex.from_csv()
+    print(f"🧪 {len(cases)} labeled findings ({args.split} split), {len(index.control_ids)} controls")
+
+    try:
+        policy_mapper.chroma_search(cases[0][0], 1)  # warm-up: model load, collection open
+        vector_ok = True
+    except Exception as e:
+        vector_ok = False
+        print(f"⚠️ Chroma unavailable ({e}); only the lexical row is meaningful")
+
+    if vector_ok:
+        evaluate("chroma", lambda text, k: [c for c, _ in policy_mapper.chroma_search(text, k)],
+                 cases, ks, args.runs, args.show_misses)
+    evaluate("bm25", lambda text, k: [c for c, _ in index.search(text, k)], cases, ks, args.runs, args.show_misses)
+    if vector_ok:
+        mapper = policy_mapper.PolicyMapper(index)
+        evaluate("hybrid", lambda text, k: [m.control_id for m in mapper.map(text, k)],
+                 cases, ks, args.runs, args.show_misses)
+
+    shortcut = [(text, expected) for text, expected in cases
+                if policy_mapper.PolicyMapper(index, None).lexical_shortcut(index.search(text))]
+    correct = sum(index.search(text, 1)[0][0] in expected for text, expected in shortcut)
+    print(f"⚡ keyword short-circuit: {len(shortcut)}/{len(cases)} findings mapped without an embedding call "
+          f"({correct}/{len(shortcut)} correct)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local pre-scan on a corpus of real diffs.
+
+Replays the last N commits of a git repository (`git show` per commit),
+chunks each diff exactly like analyze_with_gemini does, runs the pre-scan
+and reports how many Gemini calls were avoided and the end-to-end latency
+with and without the pre-scan stage.
+
+Gemini itself is not called; its latency is modelled with --llm-latency so
+the benchmark runs offline and costs nothing.
+
+Usage:
+    python bench_prescan.py --repo /path/to/repo --commits 200
+"""
+
+import argparse
+import math
+import subprocess
+import time
+
+import prescan
+from diff_chunker import chunk_diff
+
+
+def load_corpus(repo, commits):
+    """Return the diffs of the last N non-merge commits of a repository."""
+    shas = subprocess.check_output(
+        ["git", "-C", repo, "rev-list", "--no-merges", f"--max-count={commits}", "HEAD"]
+    ).decode().split()
+    diffs = []
+    for sha in shas:
+        diff = subprocess.check_output(
+            ["git", "-C", repo, "show", "--format=", "--patch", sha]
+        ).decode("utf-8", errors="ignore")
+        diffs.append(diff)
+    return diffs
+
+
+def wall_time(calls, llm_latency, parallel):
+    """Modelled wall time for `calls` Gemini requests with bounded parallelism."""
+    return math.ceil(calls / parallel) * llm_latency if calls else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", default=".", help="git repository to take diffs from")
+    parser.add_argument("--commits", type=int, default=200, help="number of commits to replay")
+    parser.add_argument("--chunk-chars", type=int, default=8000)
+    parser.add_argument("--llm-latency", type=float, default=1.5, help="modelled seconds per Gemini call")
+    parser.add_argument("--parallel", type=int, default=4, help="modelled Gemini parallelism")
+    args = parser.parse_args()
+
+    diffs = load_corpus(args.repo, args.commits)
+    print(f"📦 Loaded {len(diffs)} diffs from {args.repo}")
+
+    calls_before = calls_after = 0
+    commits_skipped = 0
+    findings = 0
+    prescan_seconds = 0.0
+    e2e_before = e2e_after = 0.0
+    verdicts = {prescan.CLEAN: 0, prescan.FLAGGED: 0, prescan.ESCALATE: 0}
+
+    for diff in diffs:
+        chunks, _ = chunk_diff(diff, max_chars=args.chunk_chars)
+        before = max(1, len(chunks))
+
+        start = time.perf_counter()
+        results = [prescan.scan_text(c.text) for c in chunks]
+        elapsed = time.perf_counter() - start
+        prescan_seconds += elapsed
+
+        after = sum(1 for r in results if r.verdict == prescan.ESCALATE)
+        for r in results:
+            verdicts[r.verdict] += 1
+            findings += len(r.issues)
+        if after == 0:
+            commits_skipped += 1
+
+        calls_before += before
+        calls_after += after
+        e2e_before += wall_time(before, args.llm_latency, args.parallel)
+        e2e_after += elapsed + wall_time(after, args.llm_latency, args.parallel)
+
+    n = max(1, len(diffs))
+    avoided = calls_before - calls_after
+    print("\n=== Pre-scan benchmark ===")
+    print(f"Chunks:                 {sum(verdicts.values())} "
+          f"(clean {verdicts[prescan.CLEAN]}, flagged {verdicts[prescan.FLAGGED]}, "
+          f"escalated {verdicts[prescan.ESCALATE]})")
+    print(f"Instant findings:       {findings}")
+    print(f"Gemini calls:           {calls_before} → {calls_after} "
+          f"({avoided} avoided, {avoided / max(1, calls_before):.0%})")
+    print(f"Commits with no call:   {commits_skipped}/{len(diffs)}")
+    print(f"Pre-scan cost:          {prescan_seconds / n * 1000:.2f} ms/commit")
+    print(f"End-to-end (modelled):  {e2e_before / n:.2f} s → {e2e_after / n:.2f} s per commit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark finding ingestion: store_finding (one commit per row) against the
+write-behind FindingWriter at several batch windows.
+
+Each scenario writes --rows findings from --producers threads into a fresh
+database, then flushes, so the reported rows/s covers durable commits.
+
+    python bench_write_behind.py --rows 20000 --producers 4
+    python bench_write_behind.py --windows 0,2,20,100 --batch-size 1000
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+import memory
+
+CONTROLS = tuple(f"CC{n}.{m}" for n in range(1, 10) for m in range(1, 6))
+
+
+def fresh_db(directory, name):
+    memory.DB_PATH = os.path.join(directory, name)
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        memory.init_db()
+    conn = sqlite3.connect(memory.DB_PATH)
+    conn.execute("CREATE TABLE IF NOT EXISTS policies (id INTEGER PRIMARY KEY, control_id TEXT UNIQUE, status TEXT)")
+    conn.executemany("INSERT OR IGNORE INTO policies (control_id, status) VALUES (?, 'passing')",
+                     [(c,) for c in CONTROLS])
+    conn.commit()
+    conn.close()
+
+
+def findings(count, seed):
+    rnd = random.Random(seed)
+    for i in range(count):
+        yield dict(summary=f"Backfilled finding {seed}-{i}", risk=rnd.choice(("high", "medium", "low")),
+                   jira_key=f"CA-{seed}-{i}", control_id=rnd.choice(CONTROLS), source="code",
+                   description="Imported from historical scan")
+
+
+def run(rows, producers, write):
+    """Spread rows over producer threads calling write(**finding); returns elapsed seconds."""
+    per_thread = rows // producers
+    threads = [threading.Thread(target=lambda s=s: [write(**f) for f in findings(per_thread, s)])
+               for s in range(producers)]
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    return time.perf_counter() - started, per_thread * producers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--producers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=memory.WRITE_BATCH_SIZE)
+    parser.add_argument("--windows", default="0,1,5,20,100", help="batch windows in ms, comma separated")
+    parser.add_argument("--direct-rows", type=int, default=2_000,
+                        help="rows for the store_finding baseline (it is slow)")
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp()
+
+    fresh_db(directory, "direct.db")
+    elapsed, written = run(args.direct_rows, args.producers, memory.store_finding)
+    print(f"🐢 store_finding          {written:>7,} rows  {written / elapsed:>9,.0f} rows/s")
+
+    for window in (float(w) for w in args.windows.split(",")):
+        fresh_db(directory, f"behind_{window:g}ms.db")
+        writer = memory.FindingWriter(batch_size=args.batch_size, batch_ms=window)
+        started = time.perf_counter()
+        _, written = run(args.rows, args.producers, writer.submit)
+        writer.flush()
+        elapsed = time.perf_counter() - started
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            writer.close()
+        stored = sqlite3.connect(memory.DB_PATH).execute("SELECT COUNT(*) FROM audit_log").fetchone()[0]
+        assert stored == written, f"expected {written} rows, found {stored}"
+        print(f"🚀 write-behind {window:>5g} ms  {written:>7,} rows  {written / elapsed:>9,.0f} rows/s  "
+              f"({writer.stats['batches']:,} commits, avg {written / max(1, writer.stats['batches']):,.0f} rows)")
+
+
+if __name__ == "__main__":
+    main()
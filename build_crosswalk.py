@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Build the cross-framework control crosswalk (control_crosswalk table).
+
+Links each control in policies.csv to its most similar control in every
+other framework, using the policy embeddings already stored in Chroma by
+populate_policies.py, then applies the manual links/unlinks from
+control_crosswalk_overrides.csv. Policy statuses are recomputed with the
+new links in the same transaction.
+
+    python build_crosswalk.py                      # build and store
+    python build_crosswalk.py --dry-run            # print the links only
+    python build_crosswalk.py --min-similarity 0.6 --per-framework 2
+"""
+
+import argparse
+import csv
+import os
+from pathlib import Path
+
+import crosswalk
+import memory
+from policy_mapper import POLICIES_CSV
+
+OVERRIDES_CSV = Path(__file__).parent / 'control_crosswalk_overrides.csv'
+CROSSWALK_MIN_SIMILARITY = float(os.getenv("CROSSWALK_MIN_SIMILARITY", "0.55"))
+
+
+def read_csv(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def policy_vectors():
+    """{control_id: embedding} from the Chroma 'policies' collection."""
+    from clients import get_policy_collection
+
+    stored = get_policy_collection().get(include=["embeddings"])
+    return dict(zip(stored["ids"], stored["embeddings"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-similarity", type=float, default=CROSSWALK_MIN_SIMILARITY)
+    parser.add_argument("--per-framework", type=int, default=1, help="links per control and other framework")
+    parser.add_argument("--overrides", default=str(OVERRIDES_CSV))
+    parser.add_argument("--no-embeddings", action="store_true", help="manual overrides only (no Chroma)")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    controls = {row["control_id"]: row["framework"] for row in read_csv(POLICIES_CSV)}
+    links = [] if args.no_embeddings else crosswalk.build_links(
+        controls, policy_vectors(), args.min_similarity, args.per_framework)
+    print(f"🧮 {len(links)} embedding link(s) at similarity >= {args.min_similarity}")
+    overrides = read_csv(args.overrides) if os.path.exists(args.overrides) else []
+    unknown = {c for row in overrides for c in (row["control_id"], row["related_id"])} - set(controls)
+    if unknown:
+        raise SystemExit(f"❌ Overrides reference unknown controls: {', '.join(sorted(unknown))}")
+    links = crosswalk.apply_overrides(links, overrides)
+    print(f"✍️ {len(overrides)} manual override(s) applied, {len(links)} link(s) total")
+
+    if args.dry_run:
+        for control_id, related_id, similarity, source in sorted(links):
+            print(f"   {control_id:<18} ↔ {related_id:<18} {similarity:5.2f}  {source}")
+        return
+    memory.init_db()
+    memory.replace_crosswalk(links)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Git hook client for capture_daemon.py.
+
+Stdlib only and no project imports, so starting it costs a few milliseconds.
+It asks the daemon to capture the commit and returns as soon as the capture
+is acknowledged; analysis and actions continue in the daemon. If no daemon
+is running it captures in-process and starts a detached
+`capture_daemon.py --analyze <ref>` for the same analysis and POST to the
+agent (output in .git/compliance-analysis.log), so a daemon outage does not
+switch analysis off. CAPTURE_FALLBACK_ANALYZE=0 makes the fallback capture
+only.
+
+Hook usage:
+    python /path/to/capture_client.py
+"""
+
+import json
+import os
+import socket
+import sys
+
+SOCKET_NAME = "compliance-capture.sock"
+TIMEOUT_SECONDS = float(os.getenv("CAPTURE_CLIENT_TIMEOUT", "5"))
+FALLBACK_ANALYZE = os.getenv("CAPTURE_FALLBACK_ANALYZE", "1") == "1"
+FALLBACK_LOG_NAME = "compliance-analysis.log"
+
+
+def find_git_dir(start="."):
+    # Same lookup as capture_commit.find_git_dir, duplicated to keep imports minimal
+    path = os.path.abspath(start)
+    while True:
+        dot_git = os.path.join(path, ".git")
+        if os.path.isdir(dot_git):
+            return dot_git
+        if os.path.isfile(dot_git):
+            with open(dot_git) as f:
+                target = f.read().strip()
+            if target.startswith("gitdir:"):
+                return os.path.normpath(os.path.join(path, target[len("gitdir:"):].strip()))
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def request(body, sock_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(TIMEOUT_SECONDS)
+        s.connect(sock_path)
+        s.sendall((json.dumps(body) + "\n").encode("utf-8"))
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = s.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data or b"{}")
+
+
+def main():
+    git_dir = find_git_dir()
+    sock_path = os.path.join(git_dir, SOCKET_NAME) if git_dir else None
+    if sock_path and os.path.exists(sock_path):
+        try:
+            # The daemon runs git for us: it needs our repository, temporary
+            # index (GIT_INDEX_FILE) and commit identity (GIT_AUTHOR_*, ...)
+            env = {k: v for k, v in os.environ.items() if k.startswith("GIT_")}
+            reply = request({"cmd": "capture", "cwd": os.getcwd(), "env": env}, sock_path)
+            if reply.get("ok"):
+                print(f"✅ Capture {reply.get('ref')} queued for analysis ({reply.get('capture_ms')} ms)")
+            else:
+                print(f"⚠️ Capture daemon error: {reply.get('error')}")
+            return 0
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            print(f"⚠️ Capture daemon unreachable ({e}); capturing in-process")
+        except OSError as e:
+            # Timed out or dropped after the request was sent: the daemon may
+            # still be capturing, so capturing again would submit it twice
+            print(f"⚠️ Capture daemon did not answer ({e}); not capturing again")
+            return 0
+
+    # No daemon: capture now (the staged diff is gone once the commit
+    # finishes), then analyze and act in a detached process like the daemon
+    # would, without holding up the commit
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    import capture_commit
+
+    ref = capture_commit.build_commit_payload().get("capture_ref")
+    if ref and FALLBACK_ANALYZE:
+        import subprocess
+
+        log_path = os.path.join(git_dir, FALLBACK_LOG_NAME) if git_dir else os.devnull
+        with open(log_path, "a") as log:
+            subprocess.Popen([sys.executable, os.path.join(here, "capture_daemon.py"), "--analyze", ref],
+                             stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                             start_new_session=True)
+        print(f"🧠 No capture daemon: analyzing {ref} in the background (log: {log_path})")
+    return 0
+
+
+if __name__ == "__main__":
+    # Never block a commit because of the compliance capture
+    try:
+        main()
+    except Exception as e:
+        print(f"⚠️ Compliance capture skipped: {e}")
+    sys.exit(0)
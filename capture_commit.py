@@ -1,48 +1,218 @@
 #!/usr/bin/env python3
 import os
+import re
 import json
 import subprocess
 from datetime import datetime
 from re import sub
 import hashlib
 import glob
+import fnmatch
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+
+import capture_store
+import metrics
+
+# "json" (one file per capture under captures/commits/, the layout existing
+# consumers read) or "store" (compressed, content-addressed; opt-in)
+CAPTURE_FORMAT = os.getenv("CAPTURE_FORMAT", "json")
 
 
 # ---------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------
-def get_git_info():
-    """Collects metadata from the local repo."""
+AUTHOR_IDENT = re.compile(r"^(?P<name>.*?) <(?P<email>[^>]*)>")
+
+
+def repo_path(cwd, path):
+    """`path` inside the repository at `cwd` (None = the current directory)."""
+    return os.path.join(cwd, path) if cwd and not os.path.isabs(path) else path
+
+
+def find_git_dir(start="."):
+    """Locate the repository's git dir without spawning git (handles worktree .git files)."""
+    path = os.path.abspath(start)
+    while True:
+        dot_git = os.path.join(path, ".git")
+        if os.path.isdir(dot_git):
+            return dot_git
+        if os.path.isfile(dot_git):
+            with open(dot_git, "r") as f:
+                target = f.read().strip()
+            if target.startswith("gitdir:"):
+                return os.path.normpath(os.path.join(path, target[len("gitdir:"):].strip()))
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def read_branch(git_dir):
+    """Current branch from .git/HEAD ('HEAD' when detached, like rev-parse --abbrev-ref)."""
     try:
-        branch = subprocess.check_output(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"]
-        ).decode("utf-8").strip()
-    except subprocess.CalledProcessError:
-        branch = "unknown"
+        with open(os.path.join(git_dir, "HEAD"), "r") as f:
+            head = f.read().strip()
+    except OSError:
+        return "unknown"
+    if head.startswith("ref:"):
+        ref = head[len("ref:"):].strip()
+        return ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+    return "HEAD"
+
+
+def get_git_info(cwd=None, env=None):
+    """
+    Collects metadata from the local repo.
+
+    Branch and commit message are read straight from the git dir; identity
+    takes a single `git var GIT_AUTHOR_IDENT` (which honours config and the
+    GIT_AUTHOR_* environment, like the commit itself).
+    """
+    git_dir = find_git_dir(cwd or ".")
+    branch = read_branch(git_dir) if git_dir else "unknown"
 
     try:
-        author = subprocess.check_output(
-            ["git", "config", "user.name"]
+        ident = subprocess.check_output(
+            ["git", "var", "GIT_AUTHOR_IDENT"], stderr=subprocess.DEVNULL, cwd=cwd, env=env
         ).decode("utf-8").strip()
-        email = subprocess.check_output(
-            ["git", "config", "user.email"]
-        ).decode("utf-8").strip()
-    except subprocess.CalledProcessError:
+        match = AUTHOR_IDENT.match(ident)
+        author, email = (match.group("name"), match.group("email")) if match else ("unknown", "unknown")
+    except (subprocess.CalledProcessError, OSError):
         author, email = "unknown", "unknown"
 
     try:
-        commit_msg = open(".git/COMMIT_EDITMSG").read().strip()
-    except FileNotFoundError:
+        with open(os.path.join(git_dir or repo_path(cwd, ".git"), "COMMIT_EDITMSG"), "r") as f:
+            commit_msg = f.read().strip()
+    except (FileNotFoundError, TypeError):
         commit_msg = "N/A"
 
     return branch, author, email, commit_msg
 
 
+def stream_staged_diff(cwd=None, env=None):
+    """
+    Staged diff and per-file stats from one `git diff --cached --numstat -p`,
+    read straight from the pipe (no temp file). `env` must carry the
+    commit's GIT_INDEX_FILE (`git commit -a` / `git commit <paths>` stage
+    into a temporary index).
+
+    Returns:
+        (diff_text, numstat) where numstat is a list of
+        {"path", "added", "deleted"} (counts are None for binary files).
+    """
+    numstat, patch = [], []
+    try:
+        proc = subprocess.Popen(
+            ["git", "diff", "--cached", "--numstat", "-p", "--no-color", "--no-ext-diff"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=cwd, env=env,
+        )
+    except OSError:
+        return "", numstat
+
+    with proc.stdout:
+        # numstat lines come first, then a blank line, then the patch
+        for line in proc.stdout:
+            if line in (b"\n", b""):
+                break
+            if line.startswith(b"diff --git "):
+                patch.append(line)
+                break
+            added, deleted, path = line.decode("utf-8", errors="ignore").rstrip("\n").split("\t", 2)
+            numstat.append({
+                "path": path,
+                "added": None if added == "-" else int(added),
+                "deleted": None if deleted == "-" else int(deleted),
+            })
+        for block in iter(lambda: proc.stdout.read(64 * 1024), b""):
+            patch.append(block)
+    proc.wait()
+    return b"".join(patch).decode("utf-8", errors="ignore"), numstat
+
+
+ZSH_META = 0x83
+HISTORY_FINGERPRINT_BYTES = 64
+ZSH_EXTENDED_HISTORY = re.compile(r"^: \d+:\d+;")
+
+
+def _load_history_checkpoint(checkpoint_path):
+    """
+    Read the history checkpoint: {"offset", "inode", "size"}.
+    Older checkpoints stored a bare line count; those are returned as
+    {"lines": N} and converted to a byte offset once.
+    """
+    try:
+        with open(checkpoint_path, "r") as c:
+            raw = c.read().strip()
+    except OSError:
+        return {}
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return {}
+    if isinstance(data, int):
+        return {"lines": data}
+    return data if isinstance(data, dict) else {}
+
+
+def _offset_after_lines(history_path, line_count):
+    """Byte offset just past the first `line_count` lines (legacy checkpoint migration)."""
+    offset = 0
+    with open(history_path, "rb") as f:
+        for i, line in enumerate(f):
+            if i >= line_count:
+                break
+            offset += len(line)
+    return offset
+
+
+def _unmetafy(data: bytes) -> bytes:
+    """Undo zsh's metafication of bytes >= 0x83 in the history file."""
+    if ZSH_META not in data:
+        return data
+    out = bytearray()
+    it = iter(data)
+    for b in it:
+        if b == ZSH_META:
+            nxt = next(it, None)
+            if nxt is not None:
+                out.append(nxt ^ 0x20)
+        else:
+            out.append(b)
+    return bytes(out)
+
+
+def _parse_history_entries(text: str):
+    """Split raw history text into commands (extended-history metadata removed, continuations joined)."""
+    entries, pending = [], ""
+    for line in text.split("\n"):
+        if pending:
+            line = pending + "\n" + line
+            pending = ""
+        elif ZSH_EXTENDED_HISTORY.match(line):
+            line = ZSH_EXTENDED_HISTORY.sub("", line, count=1)
+        # zsh writes multi-line commands with a trailing backslash per line
+        if line.endswith("\\"):
+            pending = line[:-1]
+            continue
+        entries.append(line)
+    if pending:
+        entries.append(pending)
+    return entries
+
+
 def get_new_history_lines(history_path="~/.zsh_history",
                           checkpoint_path="~/.gemini_capture_checkpoint"):
     """
     Reads only new lines added to the user's shell history file
     since the last time this function was called.
+
+    The checkpoint stores a byte offset plus the file's inode and size, so
+    each call seeks straight to the new content (O(new bytes)). A changed
+    inode or a file smaller than the offset means the history was rotated
+    or truncated, and it is read again from the start.
     """
     history_path = os.path.expanduser(history_path)
     checkpoint_path = os.path.expanduser(checkpoint_path)
@@ -50,26 +220,44 @@ def get_new_history_lines(history_path="~/.zsh_history",
     if not os.path.exists(history_path):
         return ["History file not found."]
 
-    with open(history_path, "r", errors="ignore") as f:
-        all_lines = f.readlines()
+    st = os.stat(history_path)
+    checkpoint = _load_history_checkpoint(checkpoint_path)
+    if "lines" in checkpoint:
+        offset = _offset_after_lines(history_path, checkpoint["lines"])
+    elif checkpoint.get("inode") == st.st_ino and checkpoint.get("offset", 0) <= st.st_size:
+        offset = checkpoint.get("offset", 0)
+    else:
+        # First run, rotated or truncated history
+        offset = 0
 
-    last_index = 0
-    if os.path.exists(checkpoint_path):
-        try:
-            with open(checkpoint_path, "r") as c:
-                last_index = int(c.read().strip() or 0)
-        except Exception:
-            last_index = 0
+    with open(history_path, "rb") as f:
+        # A history truncated and re-grown past the old offset keeps its
+        # inode; the bytes just before the offset tell us it changed.
+        if offset and "tail" in checkpoint:
+            f.seek(max(0, offset - HISTORY_FINGERPRINT_BYTES))
+            if hashlib.sha256(f.read(min(offset, HISTORY_FINGERPRINT_BYTES))).hexdigest() != checkpoint["tail"]:
+                offset = 0
+        f.seek(offset)
+        data = f.read()
+
+        # Leave a partially written last entry for the next call
+        end = data.rfind(b"\n") + 1
+        new_bytes = data[:end]
+        new_offset = offset + end
+
+        # Fingerprint of the bytes just before the new offset
+        f.seek(max(0, new_offset - HISTORY_FINGERPRINT_BYTES))
+        tail = hashlib.sha256(f.read(min(new_offset, HISTORY_FINGERPRINT_BYTES))).hexdigest()
 
-    # Slice only new lines
-    new_lines = all_lines[last_index:]
     # Update checkpoint
     with open(checkpoint_path, "w") as c:
-        c.write(str(len(all_lines)))
+        json.dump({"offset": new_offset, "inode": st.st_ino, "size": st.st_size, "tail": tail}, c)
+
+    text = _unmetafy(new_bytes).decode("utf-8", errors="ignore")
 
     # Clean lines
     clean = []
-    for l in new_lines:
+    for l in _parse_history_entries(text):
         line = l.strip()
         if not line:
             continue
@@ -80,73 +268,227 @@ def get_new_history_lines(history_path="~/.zsh_history",
 # ---------------------------------------------------------------------
 # New Additions: Configs + Logs + Screenshots
 # ---------------------------------------------------------------------
+HASH_CHUNK_SIZE = 1024 * 1024
+CONFIG_HASH_CACHE_PATH = os.path.join("captures", ".config_hash_cache.json")
+CONFIG_HASH_WORKERS = int(os.getenv("CONFIG_HASH_WORKERS", "8"))
+
+
 def hash_file(path):
-    """Return SHA256 hash of a file."""
+    """Return SHA256 hash of a file, streamed in fixed-size chunks."""
     try:
+        h = hashlib.sha256()
         with open(path, "rb") as f:
-            return hashlib.sha256(f.read()).hexdigest()
+            for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                h.update(block)
+        return h.hexdigest()
     except Exception:
         return None
 
 
-def capture_config_files(base_dirs=("infra", "config"), patterns=("*.yaml", "*.yml", "*.json", "*.tf", "*.toml")):
+def _walk_matching(base, patterns):
+    """
+    Single os.scandir pass over `base`, yielding (path, stat) for files
+    matching any pattern. Like the recursive glob it replaces, hidden files
+    and directories are skipped and directory symlinks are not followed.
+    """
+    stack = [base]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file() and any(fnmatch.fnmatch(entry.name, p) for p in patterns):
+                            yield entry.path, entry.stat()
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def _load_hash_cache(cache_path):
+    try:
+        with open(cache_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_hash_cache(cache, cache_path):
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp = f"{cache_path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp, cache_path)
+
+
+def capture_config_files(base_dirs=("infra", "config"), patterns=("*.yaml", "*.yml", "*.json", "*.tf", "*.toml"),
+                         cache_path=CONFIG_HASH_CACHE_PATH, root=None):
     """
     Find and hash config/infrastructure files for compliance tracking.
     Returns a dict of {filename: sha256}.
+
+    Files whose (mtime, size, inode) match the persistent stat cache reuse
+    the cached hash; changed files are hashed in parallel.
     """
-    configs = {}
+    cache_path = repo_path(root, cache_path) if cache_path else None
+    cache = _load_hash_cache(cache_path) if cache_path else {}
+    configs, stale = {}, {}
     for base in base_dirs:
+        base = repo_path(root, base)
         if not os.path.exists(base):
             continue
-        for pattern in patterns:
-            for path in glob.glob(os.path.join(base, "**", pattern), recursive=True):
-                h = hash_file(path)
+        for path, st in _walk_matching(base, patterns):
+            key = [st.st_mtime_ns, st.st_size, st.st_ino]
+            cached = cache.get(path)
+            if cached and cached[:3] == key:
+                configs[path] = cached[3]
+            else:
+                stale[path] = key
+
+    if stale:
+        with ThreadPoolExecutor(max_workers=CONFIG_HASH_WORKERS) as pool:
+            for path, h in zip(stale, pool.map(hash_file, stale)):
                 if h:
                     configs[path] = h
+
+    if cache_path:
+        # Rewrite the cache with only the files seen this run (drops deleted ones)
+        new_cache = {p: (stale[p] if p in stale else cache[p][:3]) + [h] for p, h in configs.items()}
+        if new_cache != cache:
+            _save_hash_cache(new_cache, cache_path)
+
+    if root:
+        configs = {os.path.relpath(p, root): h for p, h in configs.items()}
     return configs or {"info": "No config files found"}
 
 
-def capture_logs(log_files=("app.log", "terraform.log", "deployment.log"), lines=20):
+LOG_TAIL_BLOCK_SIZE = 4096
+LOG_TAIL_MAX_BYTES = int(os.getenv("CAPTURE_LOG_MAX_BYTES", "8192"))
+DEFAULT_LOG_SOURCES = ("app.log", "terraform.log", "deployment.log")
+
+
+def tail_lines(path, lines=20, max_bytes=LOG_TAIL_MAX_BYTES, use_mmap=False):
+    """
+    Return the last `lines` lines of a file, reading backwards from the end
+    in fixed-size blocks. At most `max_bytes` are read, so the cost does not
+    depend on the size of the log.
+    """
+    size = os.path.getsize(path)
+    if size == 0 or lines <= 0:
+        return ""
+    limit = max(0, size - max_bytes)
+
+    if use_mmap:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # A trailing newline ends the last line; it does not start a new one
+            pos = size - 1 if mm[size - 1:size] == b"\n" else size
+            for _ in range(lines):
+                nl = mm.rfind(b"\n", limit, pos)
+                if nl == -1:
+                    # Reached the byte cap (drop the cut first line) or the start of the file
+                    start = 0
+                    if limit:
+                        cut = mm.find(b"\n", limit, size)
+                        start = cut + 1 if cut != -1 else size
+                    break
+                pos = nl
+            else:
+                start = pos + 1
+            data = mm[start:size]
+    else:
+        with open(path, "rb") as f:
+            pos, data = size, b""
+            # lines + 1 newlines guarantee the first wanted line is complete
+            while pos > limit and data.count(b"\n") <= lines:
+                step = min(LOG_TAIL_BLOCK_SIZE, pos - limit)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+        parts = data.splitlines(keepends=True)
+        if pos > 0:
+            # Not at the start of the file: the first piece may be a cut line
+            parts = parts[1:]
+        data = b"".join(parts[-lines:])
+
+    return data.decode("utf-8", errors="ignore")
+
+
+def _log_sources():
+    """
+    Log sources from CAPTURE_LOG_FILES ("pattern[:max_bytes],..."), e.g.
+    "app.log,logs/*.log:16384". Defaults to the app/terraform/deployment logs.
+    """
+    raw = os.getenv("CAPTURE_LOG_FILES")
+    if not raw:
+        return DEFAULT_LOG_SOURCES
+    sources = []
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        pattern, _, cap = item.rpartition(":") if item.rsplit(":", 1)[-1].isdigit() else (item, "", "")
+        sources.append((pattern, int(cap)) if cap else pattern)
+    return tuple(sources)
+
+
+def capture_logs(log_files=None, lines=20, max_bytes=LOG_TAIL_MAX_BYTES, use_mmap=False, root=None):
     """
     Reads the last N lines of known log files if they exist.
+
+    Entries of `log_files` may be glob patterns, or (pattern, max_bytes)
+    tuples to give a source its own byte cap.
     """
     snippets = {}
-    for lf in log_files:
-        if os.path.exists(lf):
-            try:
-                with open(lf, "r", errors="ignore") as f:
-                    content = f.readlines()[-lines:]
-                    snippets[lf] = "".join(content)
-            except Exception as e:
-                snippets[lf] = f"Error reading log: {e}"
+    for source in log_files or _log_sources():
+        pattern, cap = source if isinstance(source, tuple) else (source, max_bytes)
+        pattern = repo_path(root, pattern)
+        for lf in sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]:
+            if os.path.isfile(lf):
+                name = os.path.relpath(lf, root) if root else lf
+                try:
+                    snippets[name] = tail_lines(lf, lines=lines, max_bytes=cap, use_mmap=use_mmap)
+                except Exception as e:
+                    snippets[name] = f"Error reading log: {e}"
     return snippets or {"info": "No logs found"}
 
 
 # ---------------------------------------------------------------------
 # Core logic
 # ---------------------------------------------------------------------
-def build_commit_payload(diff_path="/tmp/staged.diff"):
-    """Build JSON payload combining diff + metadata + recent terminal history."""
-    branch, author, email, commit_msg = get_git_info()
+@metrics.timed("capture")
+def build_commit_payload(diff_path=None, cwd=None, env=None):
+    """
+    Build JSON payload combining diff + metadata + recent terminal history.
 
-    # Read the diff file
-    if os.path.exists(diff_path):
-        try:
-            with open(diff_path, "r", encoding="utf-8", errors="ignore") as f:
-                diff_content = f.read()
-        except UnicodeDecodeError:
-            # If UTF-8 fails, try reading as binary and decode with errors ignored
+    The staged diff is streamed from git; pass `diff_path` to read a diff
+    that was dumped to a file instead (e.g. the old /tmp/staged.diff hook).
+    `cwd` and `env` are the hook's working directory and environment when
+    the capture runs in another process (capture_daemon.py).
+    """
+    branch, author, email, commit_msg = get_git_info(cwd, env)
+
+    numstat = []
+    if diff_path:
+        # Read the diff file
+        if os.path.exists(diff_path):
             with open(diff_path, "rb") as f:
                 diff_content = f.read().decode("utf-8", errors="ignore")
+        else:
+            diff_content = ""
     else:
-        diff_content = ""
+        diff_content, numstat = stream_staged_diff(cwd, env)
 
     # Collect recent terminal commands
     recent_history = get_new_history_lines()
 
     # Capture configs and logs
-    config_snapshots = capture_config_files()
-    log_snippets = capture_logs()
+    config_snapshots = capture_config_files(root=cwd)
+    log_snippets = capture_logs(root=cwd)
     screenshots = []  # Placeholder for future extension capture
 
     payload = {
@@ -155,8 +497,9 @@ def build_commit_payload(diff_path="/tmp/staged.diff"):
         "author": author,
         "email": email,
         "commit_message": commit_msg,
-        "diff_file": diff_path,
+        "diff_file": diff_path or "git diff --cached",
         "diff_content": diff_content,
+        "diff_numstat": numstat,
         "recent_terminal_history": recent_history,
         "config_snapshots": config_snapshots,
         "log_snippets": log_snippets,
@@ -170,16 +513,24 @@ def build_commit_payload(diff_path="/tmp/staged.diff"):
     safe_msg = sub(r"[^a-zA-Z0-9_-]", "_", commit_msg[:30])
     timestamp = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
 
-    out_dir = os.path.join("captures", "commits", safe_branch)
-    os.makedirs(out_dir, exist_ok=True)
+    if CAPTURE_FORMAT == "store":
+        # Compressed, deduplicated capture store (see capture_store.py)
+        store = capture_store.get_store(repo_path(cwd, capture_store.STORE_ROOT) if cwd else None)
+        ref = store.put(payload, name=f"{timestamp}_{safe_msg}")
+        payload["capture_ref"] = ref
+        print(f"✅ Commit payload saved as {ref}")
+    else:
+        out_dir = repo_path(cwd, os.path.join("captures", "commits", safe_branch))
+        os.makedirs(out_dir, exist_ok=True)
 
-    filename = f"{timestamp}_{safe_msg}.json"
-    out_path = os.path.join(out_dir, filename)
+        filename = f"{timestamp}_{safe_msg}.json"
+        out_path = os.path.join(out_dir, filename)
 
-    with open(out_path, "w") as f:
-        json.dump(payload, f, indent=4)
+        with open(out_path, "w") as f:
+            json.dump(payload, f, indent=4)
 
-    print(f"✅ Commit payload saved at {out_path}")
+        payload["capture_ref"] = out_path
+        print(f"✅ Commit payload saved at {out_path}")
     print(f"🧩 Captured {len(recent_history)} new terminal command(s).")
     print(f"⚙️  Captured {len(config_snapshots)} config files and {len(log_snippets)} logs.")
     return payload
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Resident capture daemon for the commit hook.
+
+Keeps the heavy modules (google.generativeai, chromadb, colorama, requests)
+and the configured Gemini client warm in one long-running process. The git
+hook talks to it over a Unix socket through capture_client.py:
+
+    1. the capture (git metadata, staged diff, history, configs, logs) is
+       taken synchronously, because the staged diff is gone once the commit
+       finishes,
+    2. the hook gets its acknowledgement immediately,
+    3. Gemini analysis and the POST to the Fetch.ai agent run in the
+       background.
+
+Captures run git in the hook's working directory and with its GIT_*
+environment (temporary index of `git commit -a`, commit identity), both
+sent by the client. One daemon serves one repository; start it from the
+repository root:
+    python capture_daemon.py
+The socket lives in the git dir (.git/compliance-capture.sock).
+
+`python capture_daemon.py --analyze <ref>` analyzes one capture and posts it
+to the agent, then exits (capture_client.py's fallback when no daemon runs).
+"""
+
+import json
+import os
+import signal
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import analyze_with_gemini
+import capture_commit
+import metrics
+from act_payload import build_act_request
+from clients import get_genai, get_policy_collection
+from policy_mapper import get_mapper
+
+SOCKET_NAME = "compliance-capture.sock"
+AGENT_URL = os.getenv("AGENT_URL", "http://localhost:8001/act")
+DAEMON_WORKERS = int(os.getenv("CAPTURE_DAEMON_WORKERS", "2"))
+CAPTURE_METRICS_PORT = int(os.getenv("CAPTURE_METRICS_PORT", "0"))  # 0 = no /metrics endpoint
+
+
+def socket_path():
+    git_dir = capture_commit.find_git_dir()
+    if not git_dir:
+        raise SystemExit("❌ capture_daemon must be started inside a git repository")
+    return os.path.join(git_dir, SOCKET_NAME)
+
+
+# ---------------------------------------------------------------------
+# Background work
+# ---------------------------------------------------------------------
+_pool = ThreadPoolExecutor(max_workers=DAEMON_WORKERS)
+_capture_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"captures": 0, "analyzed": 0, "failed": 0, "in_flight": 0, "started_at": time.time()}
+
+
+def _bump(key, delta=1):
+    with _stats_lock:
+        _stats[key] += delta
+
+
+def hook_environment(request):
+    """
+    (cwd, env) to capture with: the hook's working directory and GIT_*
+    variables (GIT_INDEX_FILE for `git commit -a` / `git commit <paths>`,
+    GIT_AUTHOR_* / GIT_COMMITTER_*) replace the daemon's own.
+    """
+    cwd = request.get("cwd")
+    if not cwd or not os.path.isdir(cwd):
+        return None, None  # older client: capture in the daemon's repository
+    env = {k: v for k, v in os.environ.items() if not k.startswith("GIT_")}
+    env.update({k: str(v) for k, v in (request.get("env") or {}).items() if k.startswith("GIT_")})
+    return cwd, env
+
+
+def analyze_and_act(ref):
+    """Analyze a capture and hand the analysis to the agent."""
+    try:
+        analysis = analyze_with_gemini.analyze_capture_with_gemini(ref, verbose=False)
+        # Sent inline (gzip'd when large): the agent need not share our filesystem
+        response = requests.post(AGENT_URL, json=build_act_request(analysis), timeout=60)
+        print(f"🤖 Agent response for {ref}: {response.status_code} {response.text[:200]}")
+        _bump("analyzed")
+        return analysis
+    except Exception as e:
+        _bump("failed")
+        print(f"❌ Background analysis failed for {ref}: {e}")
+    finally:
+        _bump("in_flight", -1)
+
+
+# ---------------------------------------------------------------------
+# Socket server
+# ---------------------------------------------------------------------
+class CaptureHandler(socketserver.StreamRequestHandler):
+    """One newline-delimited JSON request, one JSON response."""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline() or b"{}")
+        except ValueError:
+            return self._reply({"ok": False, "error": "invalid request"})
+
+        cmd = request.get("cmd")
+        if cmd == "ping":
+            return self._reply({"ok": True})
+        if cmd == "stats":
+            with _stats_lock:
+                return self._reply({"ok": True, **_stats})
+        if cmd != "capture":
+            return self._reply({"ok": False, "error": f"unknown command {cmd!r}"})
+
+        started = time.perf_counter()
+        cwd, env = hook_environment(request)
+        try:
+            # Must happen before we acknowledge: the staged diff is the commit
+            with _capture_lock:
+                payload = capture_commit.build_commit_payload(cwd=cwd, env=env)
+            ref = payload.get("capture_ref")
+        except Exception as e:
+            return self._reply({"ok": False, "error": f"capture failed: {e}"})
+
+        _bump("captures")
+        if ref and request.get("analyze", True):
+            _bump("in_flight")
+            _pool.submit(analyze_and_act, ref)
+        self._reply({"ok": True, "ref": ref, "capture_ms": round((time.perf_counter() - started) * 1000, 2)})
+
+    def _reply(self, body):
+        self.wfile.write((json.dumps(body) + "\n").encode("utf-8"))
+
+
+class CaptureServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve():
+    path = socket_path()
+    if os.path.exists(path):
+        os.remove(path)
+    server = CaptureServer(path, CaptureHandler)
+    os.chmod(path, 0o600)
+
+    def shutdown(*_):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # Pay the heavy imports and client setup once, before the first commit
+    try:
+        get_genai()
+        get_mapper()
+        get_policy_collection()
+    except Exception as e:
+        print(f"⚠️ Warm-up incomplete (will retry on first use): {e}")
+
+    if CAPTURE_METRICS_PORT:
+        metrics.start_http_server(CAPTURE_METRICS_PORT, host="127.0.0.1")
+
+    print(f"🚀 Capture daemon listening on {path} ({DAEMON_WORKERS} background worker(s))")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+        print("⏳ Waiting for background analyses to finish...")
+        _pool.shutdown(wait=True)
+        print("👋 Capture daemon stopped")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resident capture daemon for the commit hook.")
+    parser.add_argument("--analyze", metavar="REF", help="analyze one capture, post it to the agent and exit")
+    args = parser.parse_args()
+    if args.analyze:
+        analyze_and_act(args.analyze)
+    else:
+        serve()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Compressed, content-addressed store for commit captures.
+
+Instead of one pretty-printed JSON file per commit, large fields (diff, log
+snippets, terminal history, config snapshots) are written once as compressed
+blobs named by their SHA256, and each capture is a compact row in a SQLite
+index pointing at its blobs. Identical diffs/logs across commits are stored
+once.
+
+Layout:
+    captures/store/index.db                 capture index
+    captures/store/blobs/ab/abcdef....zst   blob (zstd if installed, else .gz)
+
+Opt-in with CAPTURE_FORMAT=store (the default stays one JSON file per capture).
+Captures are referenced as "store:<id>" (store under the current directory)
+or "store:<root>:<id>" (a store in another repository, e.g. written by the
+capture daemon for a hook's repo); load_capture() accepts those refs as well
+as legacy captures/commits/**/*.json paths.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+STORE_ROOT = os.getenv("CAPTURE_STORE_PATH", os.path.join("captures", "store"))
+REF_PREFIX = "store:"
+
+# Fields moved out of the index row into content-addressed blobs
+BLOB_FIELDS = ("diff_content", "log_snippets", "recent_terminal_history", "config_snapshots")
+
+
+def is_store_ref(ref: str) -> bool:
+    return isinstance(ref, str) and ref.startswith(REF_PREFIX)
+
+
+def parse_ref(ref: str) -> Tuple[Optional[str], int]:
+    """(store root or None for the default store, capture id) of a "store:..." ref."""
+    root, _, capture_id = ref[len(REF_PREFIX):].rpartition(":")
+    return root or None, int(capture_id)
+
+
+def _canonical(value) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+class CaptureStore:
+    """Content-addressed blob store plus a compact per-capture index."""
+
+    def __init__(self, root: str = STORE_ROOT):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        # Refs of a store other than the default one carry its absolute root
+        self.ref_prefix = REF_PREFIX if root == STORE_ROOT else f"{REF_PREFIX}{os.path.abspath(root)}:"
+        os.makedirs(self.blob_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS captures (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT,
+                    branch TEXT,
+                    name TEXT,
+                    sha256 TEXT,
+                    meta TEXT,
+                    blobs TEXT,
+                    raw_bytes INTEGER
+                );
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_captures_timestamp ON captures(timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_captures_branch ON captures(branch, timestamp)")
+            conn.commit()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(os.path.join(self.root, "index.db"))
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # -----------------------------------------------------------------
+    # Blobs
+    # -----------------------------------------------------------------
+    def _blob_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], f"{digest}{ext}")
+
+    def _find_blob(self, digest: str) -> Optional[str]:
+        for ext in (".zst", ".gz"):
+            path = self._blob_path(digest, ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put_blob(self, data: bytes) -> str:
+        """Store bytes once under their SHA256 and return the digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        existing = self._find_blob(digest)
+        if existing:
+            try:
+                # A fresh mtime keeps a concurrent compact() (grace period) from deleting it
+                os.utime(existing)
+                return digest
+            except FileNotFoundError:
+                pass  # removed by compact() just now: write it again
+        if zstandard is not None:
+            path, packed = self._blob_path(digest, ".zst"), zstandard.ZstdCompressor(level=10).compress(data)
+        else:
+            path, packed = self._blob_path(digest, ".gz"), gzip.compress(data, compresslevel=6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(packed)
+        os.replace(tmp, path)
+        return digest
+
+    def get_blob(self, digest: str) -> bytes:
+        path = self._find_blob(digest)
+        if path is None:
+            raise FileNotFoundError(f"Missing capture blob {digest}")
+        with open(path, "rb") as f:
+            packed = f.read()
+        if path.endswith(".zst"):
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read .zst capture blobs")
+            return zstandard.ZstdDecompressor().decompress(packed)
+        return gzip.decompress(packed)
+
+    # -----------------------------------------------------------------
+    # Captures
+    # -----------------------------------------------------------------
+    def put(self, payload: dict, name: str = "") -> str:
+        """Store a capture payload and return its "store:<id>" ref."""
+        meta = {k: v for k, v in payload.items() if k not in BLOB_FIELDS}
+        blobs = {k: self.put_blob(_canonical(payload[k])) for k in BLOB_FIELDS if k in payload}
+        raw = _canonical(payload)
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                INSERT INTO captures (timestamp, branch, name, sha256, meta, blobs, raw_bytes)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (payload.get("timestamp"), payload.get("branch"), name,
+                  hashlib.sha256(raw).hexdigest(), json.dumps(meta), json.dumps(blobs), len(raw)))
+            conn.commit()
+            return f"{self.ref_prefix}{cursor.lastrowid}"
+
+    def _row(self, ref: str):
+        capture_id = parse_ref(ref)[1] if is_store_ref(ref) else int(ref)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, timestamp, branch, name, sha256, meta, blobs FROM captures WHERE id = ?",
+                (capture_id,),
+            ).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown capture {ref}")
+        return row
+
+    def get(self, ref: str) -> dict:
+        """Rebuild the full capture payload for a ref."""
+        _, _, _, _, _, meta, blobs = self._row(ref)
+        payload = json.loads(meta)
+        for field, digest in json.loads(blobs).items():
+            payload[field] = json.loads(self.get_blob(digest))
+        return payload
+
+    def info(self, ref: str) -> dict:
+        """Index row of a capture (no blob reads)."""
+        capture_id, timestamp, branch, name, sha256, _, _ = self._row(ref)
+        return {"ref": f"{self.ref_prefix}{capture_id}", "id": capture_id, "timestamp": timestamp,
+                "branch": branch, "name": name, "sha256": sha256}
+
+    def refs(self, branch: Optional[str] = None) -> Iterator[dict]:
+        """Index rows of all captures, oldest first."""
+        query = "SELECT id, timestamp, branch, name, sha256 FROM captures"
+        args = ()
+        if branch:
+            query += " WHERE branch = ?"
+            args = (branch,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY timestamp, id", args).fetchall()
+        for capture_id, timestamp, branch_, name, sha256 in rows:
+            yield {"ref": f"{self.ref_prefix}{capture_id}", "id": capture_id, "timestamp": timestamp,
+                   "branch": branch_, "name": name, "sha256": sha256}
+
+    def latest(self) -> Optional[dict]:
+        """Index row of the newest capture, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT id FROM captures ORDER BY timestamp DESC, id DESC LIMIT 1").fetchone()
+        return self.info(str(row[0])) if row else None
+
+    # -----------------------------------------------------------------
+    # Retention
+    # -----------------------------------------------------------------
+    def compact(self, retention_days: Optional[float] = None, keep_last: int = 0) -> dict:
+        """
+        Drop captures older than `retention_days` (always keeping the newest
+        `keep_last`), then delete blobs no remaining capture references.
+        """
+        removed = 0
+        with self._connect() as conn:
+            if retention_days is not None:
+                cutoff = (datetime.utcnow() - timedelta(days=retention_days)).isoformat() + "Z"
+                removed = conn.execute("""
+                    DELETE FROM captures WHERE timestamp < ? AND id NOT IN (
+                        SELECT id FROM captures ORDER BY timestamp DESC, id DESC LIMIT ?
+                    )
+                """, (cutoff, keep_last)).rowcount
+                conn.commit()
+            live = set()
+            for (blobs,) in conn.execute("SELECT blobs FROM captures"):
+                live.update(json.loads(blobs).values())
+            if removed:
+                conn.execute("VACUUM")
+
+        deleted_blobs = freed = 0
+        grace = time.time() - 3600  # don't race a concurrent put()
+        for sub in os.listdir(self.blob_dir):
+            sub_dir = os.path.join(self.blob_dir, sub)
+            for fname in os.listdir(sub_dir):
+                path = os.path.join(sub_dir, fname)
+                digest = fname.split(".", 1)[0]
+                if digest not in live and os.path.getmtime(path) < grace:
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                    deleted_blobs += 1
+        return {"captures_removed": removed, "blobs_removed": deleted_blobs, "bytes_freed": freed}
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            count, raw = conn.execute("SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0) FROM captures").fetchone()
+        stored = sum(
+            os.path.getsize(os.path.join(root, f))
+            for root, _, files in os.walk(self.blob_dir) for f in files
+        )
+        return {"captures": count, "raw_bytes": raw, "stored_bytes": stored}
+
+
+# ---------------------------------------------------------------------
+# Reader API (file paths or store refs)
+# ---------------------------------------------------------------------
+_stores: Dict[str, CaptureStore] = {}
+
+
+def get_store(root: Optional[str] = None) -> CaptureStore:
+    """The store at `root` (default STORE_ROOT, relative to the current directory)."""
+    root = root or STORE_ROOT
+    if root not in _stores:
+        _stores[root] = CaptureStore(root)
+    return _stores[root]
+
+
+def store_for(ref: str) -> CaptureStore:
+    """The store a "store:..." ref points into."""
+    return get_store(parse_ref(ref)[0])
+
+
+def load_capture(ref: str) -> dict:
+    """Load a capture from a "store:..." ref or a legacy JSON file path."""
+    if is_store_ref(ref):
+        return store_for(ref).get(ref)
+    with open(ref, "r", errors="ignore") as f:
+        return json.load(f)
+
+
+def capture_sha256(ref: str) -> str:
+    """Content hash of a capture, without rebuilding store captures."""
+    if is_store_ref(ref):
+        return store_for(ref).info(ref)["sha256"]
+    with open(ref, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def list_captures(pattern: str = "captures/commits/**/*.json") -> List[str]:
+    """All capture refs: legacy JSON files first, then store captures (oldest first)."""
+    import glob
+
+    refs = sorted(glob.glob(pattern, recursive=True))
+    if os.path.exists(os.path.join(STORE_ROOT, "index.db")):
+        refs.extend(r["ref"] for r in get_store().refs())
+    return refs
+
+
+def latest_capture(pattern: str = "captures/commits/**/*.json") -> Optional[str]:
+    """Most recent capture ref, JSON file (by mtime) or store capture (by timestamp), whichever is newer."""
+    import glob
+
+    candidates = [(os.path.getmtime(path), path) for path in glob.glob(pattern, recursive=True)]
+    if os.path.exists(os.path.join(STORE_ROOT, "index.db")):
+        latest = get_store().latest()
+        if latest:
+            stored_at = datetime.fromisoformat(latest["timestamp"].rstrip("Z")).replace(tzinfo=timezone.utc)
+            candidates.append((stored_at.timestamp(), latest["ref"]))
+    return max(candidates)[1] if candidates else None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or compact the capture store.")
+    parser.add_argument("--compact", action="store_true", help="apply retention and delete unreferenced blobs")
+    parser.add_argument("--retention-days", type=float, default=float(os.getenv("CAPTURE_RETENTION_DAYS", "90")))
+    parser.add_argument("--keep-last", type=int, default=int(os.getenv("CAPTURE_KEEP_LAST", "100")))
+    args = parser.parse_args()
+
+    store = get_store()
+    if args.compact:
+        result = store.compact(retention_days=args.retention_days, keep_last=args.keep_last)
+        print(f"🧹 Removed {result['captures_removed']} capture(s), {result['blobs_removed']} blob(s), "
+              f"freed {result['bytes_freed'] / 1024:.1f} KB")
+    s = store.stats()
+    print(f"📦 {s['captures']} capture(s): {s['raw_bytes'] / 1024:.1f} KB raw → {s['stored_bytes'] / 1024:.1f} KB stored")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Lazily initialised heavy dependencies shared by the entry points.
+
+google.generativeai, chromadb and sentence-transformers take seconds to
+import, and most CLI paths (pre-scan hits, cache hits, backfill skips,
+--help) never touch them. They
+are imported and configured on first use instead of at module import time,
+and a missing GEMINI_API_KEY is reported when Gemini is actually needed.
+"""
+
+import os
+import threading
+from pathlib import Path
+
+CHROMA_DB_PATH = Path(__file__).parent / 'chroma_db'
+
+_lock = threading.Lock()
+_genai = None
+_policy_collection = None
+_embedders = {}
+
+
+def get_genai():
+    """Import and configure google.generativeai once; returns the module."""
+    global _genai
+    if _genai is None:
+        with _lock:
+            if _genai is None:
+                from dotenv import load_dotenv
+                import google.generativeai as genai
+
+                load_dotenv()
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise EnvironmentError("❌ Missing GEMINI_API_KEY in .env")
+                genai.configure(api_key=api_key)
+                _genai = genai
+    return _genai
+
+
+def get_policy_collection():
+    """The Chroma 'policies' collection, opened once per process."""
+    global _policy_collection
+    if _policy_collection is None:
+        with _lock:
+            if _policy_collection is None:
+                import chromadb
+
+                client = chromadb.PersistentClient(path=str(CHROMA_DB_PATH))
+                _policy_collection = client.get_collection(name="policies")
+    return _policy_collection
+
+
+def get_embedder(model_name: str):
+    """A sentence-transformers model, loaded once per process and name."""
+    with _lock:
+        if model_name not in _embedders:
+            from sentence_transformers import SentenceTransformer
+
+            _embedders[model_name] = SentenceTransformer(model_name)
+    return _embedders[model_name]
+
+
+def get_pil_image():
+    """The PIL.Image module (only the screenshot path needs Pillow)."""
+    import PIL.Image
+
+    return PIL.Image
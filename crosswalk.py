@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Cross-framework control crosswalk.
+
+A hardcoded secret violates INTERNAL-003, SOC2-CC6.1, ISO27001-A.10.1... at
+once, but mapping yields a single control_id. The crosswalk (built offline
+by build_crosswalk.py into the control_crosswalk table) links equivalent
+controls across the frameworks in policies.csv. It is cached in a dict
+(reloaded every CROSSWALK_TTL_SECONDS, so a rebuild is picked up without a
+restart) and a mapped control fans out to all related controls in O(1):
+
+    crosswalk.related_controls("INTERNAL-003")  -> ("SOC2-CC6.1", ...)
+
+Policy status follows the same links in SQL (memory.POLICY_STATUS_SQL).
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import memory
+
+CROSSWALK_TTL_SECONDS = float(os.getenv("CROSSWALK_TTL_SECONDS", "60"))
+
+_links: Optional[Dict[str, Tuple[str, ...]]] = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def get_crosswalk() -> Dict[str, Tuple[str, ...]]:
+    """{control_id: related control ids}, loaded from SQLite and refreshed once it is CROSSWALK_TTL_SECONDS old."""
+    global _links, _loaded_at
+    if _links is None or time.monotonic() - _loaded_at >= CROSSWALK_TTL_SECONDS:
+        with _lock:
+            if _links is None or time.monotonic() - _loaded_at >= CROSSWALK_TTL_SECONDS:
+                _links = memory.load_crosswalk()
+                _loaded_at = time.monotonic()
+    return _links
+
+
+def reload_crosswalk() -> Dict[str, Tuple[str, ...]]:
+    """Drop the cached crosswalk (e.g. after build_crosswalk.py ran) and load it again."""
+    global _links
+    with _lock:
+        _links = None
+    return get_crosswalk()
+
+
+def related_controls(control_id: Optional[str]) -> Tuple[str, ...]:
+    """Controls linked to control_id (most similar first); empty if none or unknown."""
+    if not control_id:
+        return ()
+    return get_crosswalk().get(control_id, ())
+
+
+def fan_out(control_ids: Sequence[str]) -> List[str]:
+    """The given controls followed by all their related controls, without duplicates."""
+    return list(dict.fromkeys(
+        related for control_id in control_ids if control_id
+        for related in (control_id, *related_controls(control_id))
+    ))
+
+
+# ---------------------------------------------------------------------
+# Offline build
+# ---------------------------------------------------------------------
+def build_links(controls: Dict[str, str], vectors: Dict[str, Sequence[float]], min_similarity: float,
+                per_framework: int = 1) -> List[tuple]:
+    """
+    Link each control to its closest controls in every other framework.
+
+    Args:
+        controls: {control_id: framework}
+        vectors: {control_id: embedding}
+        min_similarity: Cosine similarity a link needs
+        per_framework: Links kept per control and other framework
+
+    Returns:
+        (control_id, related_id, similarity, "embedding") tuples
+    """
+    import numpy as np
+
+    ids = [c for c in controls if c in vectors]
+    matrix = np.asarray([vectors[c] for c in ids], dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    similarity = matrix @ matrix.T
+    frameworks = np.asarray([controls[c] for c in ids])
+
+    links = []
+    for i, control_id in enumerate(ids):
+        for framework in set(frameworks) - {controls[control_id]}:
+            candidates = np.flatnonzero(frameworks == framework)
+            best = candidates[np.argsort(-similarity[i, candidates])[:per_framework]]
+            links += [(control_id, ids[j], float(similarity[i, j]), "embedding")
+                      for j in best if similarity[i, j] >= min_similarity]
+    return links
+
+
+def apply_overrides(links: List[tuple], overrides: List[Dict[str, str]]) -> List[tuple]:
+    """Apply manual rows {control_id, related_id, action: link|unlink} (both directions)."""
+    by_pair = {frozenset((a, b)): (a, b, sim, source) for a, b, sim, source in links}
+    for row in overrides:
+        pair = frozenset((row["control_id"], row["related_id"]))
+        if row["action"] == "unlink":
+            by_pair.pop(pair, None)
+        elif row["action"] == "link":
+            by_pair[pair] = (row["control_id"], row["related_id"], 1.0, "manual")
+        else:
+            raise ValueError(f"Unknown crosswalk override action: {row['action']!r}")
+    return list(by_pair.values())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Diff-aware chunker for large commits.
+
+Splits a unified diff per file and per hunk, drops content that is not worth
+sending to the model (lockfiles, vendored code, binary patches), and packs the
+remaining hunks into prompt-sized chunks.
+"""
+
+import fnmatch
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+# ---------------------------------------------------------------------
+# Skip rules
+# ---------------------------------------------------------------------
+LOCKFILE_NAMES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "npm-shrinkwrap.json",
+    "poetry.lock", "Pipfile.lock", "Cargo.lock", "go.sum", "composer.lock",
+    "Gemfile.lock", "mix.lock", "pubspec.lock", "packages.lock.json",
+}
+
+VENDORED_DIRS = {"vendor", "node_modules", "third_party", "bower_components", "dist", ".venv", "site-packages"}
+
+VENDORED_PATTERNS = ("*.min.js", "*.min.css", "*.map", "*.pb.go", "*_pb2.py")
+
+
+def skip_reason(path: str) -> Optional[str]:
+    """Return why a file should not be analyzed, or None to keep it."""
+    parts = path.split("/")
+    name = parts[-1]
+    if name in LOCKFILE_NAMES:
+        return "lockfile"
+    if any(p in VENDORED_DIRS for p in parts[:-1]):
+        return "vendored"
+    if any(fnmatch.fnmatch(name, pat) for pat in VENDORED_PATTERNS):
+        return "vendored"
+    return None
+
+
+# ---------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------
+@dataclass
+class FileDiff:
+    path: str
+    header: str
+    hunks: List[str] = field(default_factory=list)
+    binary: bool = False
+
+    @property
+    def size(self) -> int:
+        return len(self.header.encode("utf-8")) + sum(len(h.encode("utf-8")) for h in self.hunks)
+
+
+@dataclass
+class DiffChunk:
+    text: str
+    files: List[str]
+    labels: List[str] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return len(self.text.encode("utf-8"))
+
+
+def _path_from_header(line: str) -> str:
+    # "diff --git a/foo/bar.py b/foo/bar.py" -> "foo/bar.py"
+    parts = line.split(" b/", 1)
+    if len(parts) == 2:
+        return parts[1].strip()
+    return line[len("diff --git "):].strip()
+
+
+def parse_diff(diff_text: str) -> List[FileDiff]:
+    """Split a unified diff into per-file sections with their hunks."""
+    files: List[FileDiff] = []
+    current: Optional[FileDiff] = None
+    header_lines: List[str] = []
+    hunk_lines: List[str] = []
+
+    def close_hunk():
+        if current is not None and hunk_lines:
+            current.hunks.append("".join(hunk_lines))
+        hunk_lines.clear()
+
+    def close_file():
+        nonlocal current
+        if current is None:
+            return
+        close_hunk()
+        if not current.hunks:
+            current.header = "".join(header_lines)
+        files.append(current)
+        current = None
+
+    for line in diff_text.splitlines(keepends=True):
+        if line.startswith("diff --git "):
+            close_file()
+            current = FileDiff(path=_path_from_header(line), header="")
+            header_lines = [line]
+            continue
+
+        if current is None:
+            # Not a git diff (or leading noise) - treat it as one anonymous file
+            current = FileDiff(path="(unknown)", header="")
+            header_lines = []
+
+        if line.startswith("@@"):
+            if not current.hunks and not hunk_lines:
+                current.header = "".join(header_lines)
+            close_hunk()
+            hunk_lines.append(line)
+        elif hunk_lines:
+            hunk_lines.append(line)
+        else:
+            header_lines.append(line)
+            if line.startswith("Binary files ") or line.startswith("GIT binary patch"):
+                current.binary = True
+
+    close_file()
+    return files
+
+
+def iter_hunks(diff_text: str):
+    """Yield (path, hunk) for every hunk of a file that is not skipped."""
+    for fd in parse_diff(diff_text):
+        if fd.binary or skip_reason(fd.path):
+            continue
+        for hunk in fd.hunks:
+            yield fd.path, hunk
+
+
+# ---------------------------------------------------------------------
+# Chunking
+# ---------------------------------------------------------------------
+def _split_oversized(text: str, max_chars: int) -> List[str]:
+    """Split a single hunk that is larger than a chunk on line boundaries."""
+    pieces, buf, size = [], [], 0
+    for line in text.splitlines(keepends=True):
+        if buf and size + len(line) > max_chars:
+            pieces.append("".join(buf))
+            buf, size = [], 0
+        # A single line longer than the budget is cut hard
+        while len(line) > max_chars:
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        buf.append(line)
+        size += len(line)
+    if buf:
+        pieces.append("".join(buf))
+    return pieces
+
+
+def chunk_diff(diff_text: str, max_chars: int = 8000,
+               hunk_label: Optional[Callable[[str], str]] = None, exclude_labels=()):
+    """
+    Split a diff into prompt-sized chunks.
+
+    Args:
+        diff_text: Unified diff
+        max_chars: Maximum size of one chunk
+        hunk_label: Optional function giving each hunk an id; the id is written
+            as a "# hunk <id>" line in front of the hunk and kept on the chunk
+        exclude_labels: Hunk ids to leave out (e.g. already analyzed)
+
+    Returns:
+        (chunks, coverage) where chunks is a list of DiffChunk and coverage
+        is a dict with diff_bytes, analyzed_bytes and the skipped files.
+    """
+    chunks: List[DiffChunk] = []
+    skipped = []
+    buf: List[str] = []
+    buf_files: List[str] = []
+    buf_labels: List[str] = []
+    buf_size = 0
+    excluded = 0
+
+    def flush():
+        nonlocal buf, buf_files, buf_labels, buf_size
+        if buf:
+            chunks.append(DiffChunk(text="".join(buf), files=buf_files, labels=buf_labels))
+        buf, buf_files, buf_labels, buf_size = [], [], [], 0
+
+    def add(piece: str, path: str, header: str, label: Optional[str] = None):
+        nonlocal buf_size
+        # Consecutive hunks of the same file share one header per chunk
+        text = piece if buf_files and buf_files[-1] == path else header + piece
+        if buf and buf_size + len(text) > max_chars:
+            flush()
+            text = header + piece
+        buf.append(text)
+        if path not in buf_files:
+            buf_files.append(path)
+        if label and label not in buf_labels:
+            buf_labels.append(label)
+        buf_size += len(text)
+
+    for fd in parse_diff(diff_text):
+        reason = "binary" if fd.binary else skip_reason(fd.path)
+        if reason:
+            skipped.append({"path": fd.path, "reason": reason, "bytes": fd.size})
+            continue
+
+        # Every chunk carries the file header so the model knows where it is
+        header = fd.header if len(fd.header) < max_chars // 4 else f"diff --git a/{fd.path} b/{fd.path}\n"
+        if not fd.hunks:
+            add("", fd.path, header)
+            continue
+        for hunk in fd.hunks:
+            label = hunk_label(hunk) if hunk_label else None
+            if label in exclude_labels:
+                excluded += 1
+                continue
+            tag = f"# hunk {label}\n" if label else ""
+            budget = max_chars - len(header) - len(tag)
+            for piece in _split_oversized(hunk, budget) if len(hunk) > budget else [hunk]:
+                add(tag + piece, fd.path, header, label)
+    flush()
+
+    # Everything in the diff that was not dropped by a skip rule was analyzed
+    diff_bytes = len(diff_text.encode("utf-8"))
+    coverage = {
+        "diff_bytes": diff_bytes,
+        "analyzed_bytes": diff_bytes - sum(s["bytes"] for s in skipped),
+        "chunks": len(chunks),
+        "excluded_hunks": excluded,
+        "skipped_files": skipped,
+    }
+    return chunks, coverage
@@ -6,96 +6,143 @@ This agent receives code analysis results and triggers actions (Jira, Slack, Git
 It uses the shared actions module for external API calls.
 """
 
+import asyncio
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
 from uagents import Agent, Context, Model
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 # 🧠 Memory module (SQLite)
-from memory import init_db, store_finding, finding_exists
+from memory import init_db
 
 # 🎯 Shared actions module
 import actions
+import metrics
+from act_payload import PayloadError, decode_act_request
 
 # ---------------------------------------------------------------------
 # Agent definition
 # ---------------------------------------------------------------------
 agent = Agent(name="fetch_jira_agent", port=8001)
 
+# Concurrent /act requests, per-request deadline (seconds; decoding and waiting
+# for a slot, not the actions themselves), and the pool that
+# runs file and SQLite work off the event loop
+AGENT_MAX_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", "8"))
+AGENT_REQUEST_TIMEOUT = float(os.getenv("AGENT_REQUEST_TIMEOUT", "120"))
+AGENT_IO_WORKERS = int(os.getenv("AGENT_IO_WORKERS", "4"))
+# uagents REST handlers can only return JSON models, so Prometheus scrapes
+# /metrics from a small side server
+AGENT_METRICS_PORT = int(os.getenv("AGENT_METRICS_PORT", "8011"))
+AGENT_METRICS_HOST = os.getenv("AGENT_METRICS_HOST", metrics.METRICS_BIND_HOST)
+
+_io_pool = ThreadPoolExecutor(max_workers=AGENT_IO_WORKERS, thread_name_prefix="agent-io")
+_slots: Optional[asyncio.Semaphore] = None
+_session = None
+
 class AnalysisRequest(Model):
-    analysis_path: str
+    # Exactly one of these (see act_payload.py)
+    analysis_path: Optional[str] = None
+    analysis: Optional[Dict[str, Any]] = None
+    analyses: Optional[List[Dict[str, Any]]] = None
+    analysis_gzip: Optional[str] = None
 
 class ActionResponse(Model):
     ok: bool
     action: str
     error: Optional[str] = None
+    # Per-analysis results when the request carried more than one
+    results: Optional[List[Dict[str, Any]]] = None
 
 # ---------------------------------------------------------------------
 # Main handler
 # ---------------------------------------------------------------------
-@agent.on_rest_post("/act", AnalysisRequest, ActionResponse)
-async def handle_analysis(ctx: Context, req: AnalysisRequest) -> Dict[str, Any]:
-    """Handle incoming analysis JSON and take action."""
-    analysis_path = req.analysis_path
-    if not analysis_path:
-        return {"ok": False, "action": "none", "error": "analysis_path missing."}
-    if not os.path.exists(analysis_path):
-        return {"ok": False, "action": "none", "error": f"File not found: {analysis_path}"}
+@agent.on_event("startup")
+async def open_http_session(ctx: Context):
+    global _slots, _session
+    _slots = asyncio.Semaphore(AGENT_MAX_CONCURRENCY)
+    _session = actions.create_http_session()
+    metrics.start_http_server(AGENT_METRICS_PORT, host=AGENT_METRICS_HOST)
+
 
-    ctx.logger.info(f"\n🤖 Received analysis file: {analysis_path}")
+@agent.on_event("shutdown")
+async def close_http_session(ctx: Context):
+    if _session is not None:
+        await _session.close()
+    _io_pool.shutdown(wait=False)
 
+
+class DeadlineExceeded(Exception):
+    """The request deadline passed (not a timeout raised by an action)."""
+
+
+async def _before_deadline(awaitable, deadline: float):
+    try:
+        return await asyncio.wait_for(awaitable, max(0.0, deadline - asyncio.get_running_loop().time()))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded() from None
+
+
+async def act_bounded(ctx: Context, data: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+    # At most AGENT_MAX_CONCURRENCY analyses in flight across all requests;
+    # the deadline only covers waiting for a slot
+    await _before_deadline(_slots.acquire(), deadline)
+    # 🎯 UNIFIED ACTION WORKFLOW (dedup, actions, memory; source='code')
+    # Once started it runs to completion even if the request is cancelled:
+    # stopping between creating a Jira/GitHub ticket and storing the finding
+    # would make the client's retry file the ticket again.
+    task = asyncio.ensure_future(actions.act_on_analysis_async(
+        data, _session, source='code', log=ctx.logger.info, executor=_io_pool
+    ))
+    task.add_done_callback(lambda _: _slots.release())
+    return await asyncio.shield(task)
+
+
+async def process_request(ctx: Context, req: AnalysisRequest, deadline: float) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
     try:
-        with open(analysis_path, "r") as f:
-            data = json.load(f)
+        # File read / gunzip + JSON parse are blocking: run them on the pool
+        docs = await _before_deadline(loop.run_in_executor(
+            _io_pool, lambda: decode_act_request(req.analysis_path, req.analysis, req.analyses, req.analysis_gzip)
+        ), deadline)
+    except DeadlineExceeded:
+        raise
+    except FileNotFoundError:
+        return {"ok": False, "action": "none", "error": f"File not found: {req.analysis_path}"}
+    except PayloadError as e:
+        return {"ok": False, "action": "none", "error": str(e)}
     except Exception as e:
         return {"ok": False, "action": "none", "error": f"Failed to read analysis file: {e}"}
 
-    gemini = data.get("gemini_analysis", {})
-    risk = gemini.get("risk_level", "unknown")
-    issues = gemini.get("issues", [])
-    control_id = data.get("control_id")  # Get control_id from analysis
-    ctx.logger.info(f"🔍 Risk level: {risk}")
-    if control_id:
-        ctx.logger.info(f"🔍 Control ID: {control_id}")
-
-    if issues:
-        actions_taken = []
-        for issue in issues:
-            summary = issue.get("type", "Unknown issue")
-            desc = issue.get("description", "No description")
-            pr_number = issue.get("pr_number")
-
-            # 🧠 DEDUPLICATION CHECK
-            if finding_exists(summary, risk):
-                ctx.logger.info(f"⚠️ Duplicate finding skipped: {summary}")
-                continue
-
-            # 🎯 UNIFIED ACTION WORKFLOW (using shared actions module)
-            action_results = actions.take_actions(
-                summary=summary,
-                description=desc,
-                risk=risk,
-                control_id=control_id,
-                pr_number=pr_number
-            )
-
-            # 🧠 Store in memory with source='code'
-            store_finding(
-                summary=summary,
-                risk=risk,
-                jira_key=action_results.get("jira_key"),
-                github_link=action_results.get("github_link"),
-                slack_link=None,
-                control_id=control_id,
-                source='code'  # CRITICAL: Mark as code source
-            )
-
-            actions_taken.append(action_results.get("action_result", "none"))
-
-        return {"ok": True, "action": ",".join(actions_taken), "error": None}
-
-    ctx.logger.info("✅ No issues detected — no Jira, Slack, or GitHub action taken.")
-    return {"ok": True, "action": "none", "error": None}
+    if req.analysis_path is not None:
+        ctx.logger.info(f"\n🤖 Received analysis file: {req.analysis_path}")
+    else:
+        ctx.logger.info(f"\n🤖 Received {len(docs)} inline analysis document(s)")
+
+    results = await asyncio.gather(*(act_bounded(ctx, doc, deadline) for doc in docs))
+    if len(results) == 1:
+        return results[0]
+
+    taken = [r["action"] for r in results if r.get("action") not in (None, "", "none")]
+    errors = [r["error"] for r in results if r.get("error")]
+    return {
+        "ok": all(r.get("ok") for r in results),
+        "action": ",".join(taken) or "none",
+        "error": "; ".join(errors) or None,
+        "results": results,
+    }
+
+
+@agent.on_rest_post("/act", AnalysisRequest, ActionResponse)
+async def handle_analysis(ctx: Context, req: AnalysisRequest) -> Dict[str, Any]:
+    """Handle an analysis (path, inline, gzip'd or batch) and take action without blocking the event loop."""
+    deadline = asyncio.get_running_loop().time() + AGENT_REQUEST_TIMEOUT
+    try:
+        # The deadline covers decoding and waiting for slots, not the actions
+        return await process_request(ctx, req, deadline)
+    except DeadlineExceeded:
+        ctx.logger.info(f"⏱️ Deadline of {AGENT_REQUEST_TIMEOUT:.0f}s exceeded")
+        return {"ok": False, "action": "none", "error": f"Deadline of {AGENT_REQUEST_TIMEOUT:.0f}s exceeded"}
 
 # ---------------------------------------------------------------------
 # Run agent
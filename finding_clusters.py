@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate finding clustering by embedding similarity.
+
+Exact dedup (memory.finding_exists) only catches identical summary + risk,
+so "Hardcoded AWS Credentials" and "Hard-coded AWS credentials in config"
+used to open two tickets. Before acting, the summary of a new finding is
+embedded and looked up in an in-memory index of open cluster heads; above
+DEDUP_SIMILARITY_THRESHOLD (same risk level) the finding is attached to
+that head (memory.add_cluster_member) instead of filing Jira/GitHub/Slack
+again.
+
+The index (an exact scan, or HNSW via hnswlib once the open set is large)
+is incremental: heads are added when stored (register_finding), heads
+stored by other processes are picked up from finding_embeddings (by its
+commit-ordered seq) at most every DEDUP_SYNC_SECONDS, and resolved or
+archived heads are dropped by trigger in SQLite and lazily from memory when
+they come up as a match.
+
+Near-dup detection fails open: if the model or index errors, it is switched
+off for the process and only the exact finding_exists check applies.
+"""
+
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import memory
+import metrics
+
+SEMANTIC_DEDUP = os.getenv("SEMANTIC_DEDUP", "1") == "1"
+DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.85"))
+DEDUP_CANDIDATES = int(os.getenv("DEDUP_CANDIDATES", "5"))
+DEDUP_SYNC_SECONDS = float(os.getenv("DEDUP_SYNC_SECONDS", "1.0"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# "auto" = exact scan, moved to HNSW (if hnswlib is importable) once the open
+# set outgrows DEDUP_HNSW_MIN_SIZE; or force "hnsw" / "exact"
+DEDUP_INDEX_BACKEND = os.getenv("DEDUP_INDEX_BACKEND", "auto")
+DEDUP_HNSW_MIN_SIZE = int(os.getenv("DEDUP_HNSW_MIN_SIZE", "10000"))
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "100"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+
+
+# ---------------------------------------------------------------------
+# Embeddings
+# ---------------------------------------------------------------------
+def embed(text: str):
+    """Unit-normalised float32 embedding of a finding summary."""
+    import numpy as np
+    from clients import get_embedder
+
+    vector = get_embedder(EMBEDDING_MODEL).encode([text], normalize_embeddings=True)[0]
+    return np.asarray(vector, dtype=np.float32)
+
+
+# ---------------------------------------------------------------------
+# In-memory index of open cluster heads
+# ---------------------------------------------------------------------
+class _ExactBackend:
+    """Brute-force cosine scan over one preallocated float32 matrix (no extra dependency)."""
+
+    def __init__(self, dim: int):
+        import numpy as np
+
+        self._np = np
+        self._ids: List[int] = []
+        self._positions = {}
+        self._matrix = np.zeros((64, dim), dtype=np.float32)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, finding_id):
+        return finding_id in self._positions
+
+    def add(self, finding_id: int, vector):
+        if len(self._ids) == self._matrix.shape[0]:
+            self._matrix = self._np.concatenate([self._matrix, self._np.zeros_like(self._matrix)])
+        self._matrix[len(self._ids)] = vector
+        self._positions[finding_id] = len(self._ids)
+        self._ids.append(finding_id)
+
+    def add_many(self, finding_ids: List[int], vectors):
+        for finding_id, vector in zip(finding_ids, vectors):
+            self.add(finding_id, vector)
+
+    def discard(self, finding_id: int):
+        # Swap the last row into the freed slot
+        position = self._positions.pop(finding_id)
+        last_id = self._ids.pop()
+        if last_id != finding_id:
+            self._matrix[position] = self._matrix[len(self._ids)]
+            self._ids[position] = last_id
+            self._positions[last_id] = position
+
+    def items(self):
+        return list(self._ids), self._matrix[:len(self._ids)]
+
+    def nearest(self, vector, k: int):
+        np = self._np
+        scores = self._matrix[:len(self._ids)] @ vector
+        top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[i], float(scores[i])) for i in top]
+
+
+class _HnswBackend:
+    """Approximate (HNSW) inner-product search via hnswlib, which chromadb already installs."""
+
+    def __init__(self, dim: int):
+        import hnswlib
+
+        self._index = hnswlib.Index(space="ip", dim=dim)
+        self._index.init_index(max_elements=1024, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M,
+                               allow_replace_deleted=True)
+        self._index.set_ef(HNSW_EF_SEARCH)
+        self._live = set()
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, finding_id):
+        return finding_id in self._live
+
+    def add(self, finding_id: int, vector):
+        self.add_many([finding_id], vector[None, :])
+
+    def add_many(self, finding_ids: List[int], vectors):
+        needed = self._index.get_current_count() + len(finding_ids)
+        if needed > self._index.get_max_elements():
+            self._index.resize_index(max(needed, self._index.get_max_elements() * 2))
+        self._index.add_items(vectors, finding_ids, replace_deleted=True)
+        self._live.update(finding_ids)
+
+    def discard(self, finding_id: int):
+        self._live.remove(finding_id)
+        self._index.mark_deleted(finding_id)
+
+    def nearest(self, vector, k: int):
+        labels, distances = self._index.knn_query(vector[None, :], k=min(k, len(self._live)))
+        # "ip" distance is 1 - inner product, i.e. 1 - cosine for unit vectors
+        return [(int(label), 1.0 - float(distance)) for label, distance in zip(labels[0], distances[0])]
+
+
+class OpenFindingIndex:
+    """
+    Cosine-similarity index over the embeddings of open cluster heads.
+
+    An exact matrix scan stays sub-millisecond up to ~10k open heads and
+    loads instantly; past DEDUP_HNSW_MIN_SIZE the "auto" backend rebuilds
+    into HNSW (hnswlib). Both support incremental add and discard.
+    """
+
+    def __init__(self, model: str = EMBEDDING_MODEL, backend: Optional[str] = None):
+        self.model = model
+        self.backend = backend or DEDUP_INDEX_BACKEND
+        self._store = None
+        self._synced_seq = 0
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._store) if self._store is not None else 0
+
+    def _create(self, dim: int):
+        return _HnswBackend(dim) if self.backend == "hnsw" else _ExactBackend(dim)
+
+    def _maybe_upgrade(self):
+        """Move a large exact index to HNSW (auto backend, hnswlib installed)."""
+        if self.backend != "auto" or not isinstance(self._store, _ExactBackend):
+            return
+        if len(self._store) <= DEDUP_HNSW_MIN_SIZE:
+            return
+        try:
+            store = _HnswBackend(self._store.items()[1].shape[1])
+        except ImportError:
+            self.backend = "exact"
+            return
+        started = time.perf_counter()
+        store.add_many(*self._store.items())
+        self._store = store
+        print(f"🧭 Near-duplicate index moved to HNSW at {len(store)} open findings "
+              f"({time.perf_counter() - started:.1f}s)")
+
+    def add(self, finding_id: int, vector):
+        self.add_many([finding_id], vector[None, :])
+
+    def add_many(self, finding_ids: List[int], vectors):
+        """Add heads in one call (HNSW builds a batch on several threads)."""
+        with self._lock:
+            if self._store is None:
+                self._store = self._create(vectors.shape[1])
+            fresh = [i for i, finding_id in enumerate(finding_ids) if finding_id not in self._store]
+            if fresh:
+                self._store.add_many([finding_ids[i] for i in fresh], vectors[fresh])
+                self._maybe_upgrade()
+
+    def discard(self, finding_id: int):
+        with self._lock:
+            if self._store is not None and finding_id in self._store:
+                self._store.discard(finding_id)
+
+    def sync(self, force: bool = False):
+        """Load heads stored since the last sync (by any process)."""
+        import numpy as np
+
+        if not force and time.monotonic() - self._synced_at < DEDUP_SYNC_SECONDS:
+            return
+        self._synced_at = time.monotonic()
+        rows = memory.load_finding_embeddings(self.model, after_seq=self._synced_seq)
+        if rows:
+            self.add_many([row[0] for row in rows], np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows]))
+            self._synced_seq = rows[-1][2]
+
+    def nearest(self, vector, k: int = DEDUP_CANDIDATES) -> List[Tuple[int, float]]:
+        """Up to k (finding_id, cosine similarity) pairs, most similar first."""
+        with self._lock:
+            if not len(self):
+                return []
+            return self._store.nearest(vector, k)
+
+
+_index: Optional[OpenFindingIndex] = None
+_index_lock = threading.Lock()
+_disabled_reason: Optional[str] = None
+
+
+def get_index() -> OpenFindingIndex:
+    """The process-wide index, loaded from finding_embeddings on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = OpenFindingIndex()
+            index.sync(force=True)
+            print(f"🧭 Loaded {len(index)} open finding embedding(s) for near-duplicate detection")
+            _index = index
+    return _index
+
+
+# ---------------------------------------------------------------------
+# Dedup stage
+# ---------------------------------------------------------------------
+def _disable(error: Exception):
+    """Switch near-dup detection off for this process (logged once)."""
+    global _disabled_reason
+    if _disabled_reason:
+        return
+    _disabled_reason = f"{type(error).__name__}: {error}"
+    if isinstance(error, ImportError):
+        print(f"⚠️ Semantic dedup disabled ({error}); install sentence-transformers to enable it")
+    else:
+        print(f"⚠️ Semantic dedup disabled ({_disabled_reason}); falling back to exact dedup only")
+
+
+@metrics.timed("dedup")
+def check_duplicate(summary: str, risk: str, threshold: Optional[float] = None):
+    """
+    Look for an open finding that this one near-duplicates.
+
+    Returns:
+        (match, vector): match is None or a dict with cluster_id, similarity,
+        summary, jira_key and github_link of the head; vector is the new
+        finding's embedding (pass it to register_finding), or None when
+        semantic dedup is off or unavailable.
+    """
+    if not SEMANTIC_DEDUP or _disabled_reason:
+        return None, None
+    try:
+        return _check_duplicate(summary, risk, threshold)
+    except Exception as e:
+        _disable(e)
+        return None, None
+
+
+def _check_duplicate(summary: str, risk: str, threshold: Optional[float]):
+    vector = embed(summary)
+    index = get_index()
+    index.sync()
+    threshold = DEDUP_SIMILARITY_THRESHOLD if threshold is None else threshold
+    candidates = [(i, score) for i, score in index.nearest(vector) if score >= threshold]
+    if not candidates:
+        return None, vector
+    heads = memory.open_cluster_heads([i for i, _ in candidates])
+    for finding_id, score in candidates:
+        head = heads.get(finding_id)
+        if head is None:
+            index.discard(finding_id)  # resolved or archived since it was indexed
+        elif head["risk_level"] == risk:
+            return {"cluster_id": finding_id, "similarity": score, **head}, vector
+    return None, vector
+
+
+def register_finding(finding_id: int, vector):
+    """Make a newly stored finding the head of its own cluster."""
+    if vector is None or finding_id is None or _disabled_reason:
+        return
+    try:
+        memory.save_finding_embedding(finding_id, EMBEDDING_MODEL, vector.tobytes())
+        get_index().add(finding_id, vector)
+    except Exception as e:
+        _disable(e)
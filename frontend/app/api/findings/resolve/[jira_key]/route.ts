@@ -6,11 +6,47 @@ export async function POST(
   { params }: { params: { jira_key: string } }
 ) {
   try {
-    const result = db.prepare(
-      'UPDATE audit_log SET resolved = 1 WHERE jira_key = ?'
-    ).run(params.jira_key);
+    // Resolve and refresh the affected policies, and the controls linked to
+    // them in control_crosswalk, from the trigger-maintained
+    // control_open_counts (same as memory.mark_resolved_many)
+    const resolve = db.transaction((jiraKey: string) => {
+      const controls = db.prepare(
+        'SELECT DISTINCT control_id FROM audit_log WHERE jira_key = ? AND resolved = 0 AND control_id IS NOT NULL'
+      ).all(jiraKey) as { control_id: string }[];
+      const changed = db.prepare(
+        "UPDATE audit_log SET resolved = 1, status = 'resolved', resolved_at = ? WHERE jira_key = ? AND resolved = 0"
+      ).run(new Date().toISOString(), jiraKey);
+      if (changed.changes === 0) {
+        // Unknown or already resolved: keep resolved_at, nothing to recount
+        return changed;
+      }
+      const refresh = db.prepare(`
+        UPDATE policies
+        SET status = CASE WHEN EXISTS (
+          SELECT 1 FROM control_open_counts c
+          WHERE c.open_count > 0 AND (
+            c.control_id = policies.control_id
+            OR c.control_id IN (SELECT related_id FROM control_crosswalk x WHERE x.control_id = policies.control_id)
+          )
+        ) THEN 'failing' ELSE 'passing' END
+        WHERE control_id = ?
+          OR control_id IN (SELECT related_id FROM control_crosswalk WHERE control_id = ?)
+      `);
+      for (const { control_id } of controls) {
+        refresh.run(control_id, control_id);
+      }
+      return changed;
+    });
+    const result = resolve(params.jira_key);
 
     if (result.changes === 0) {
+      const known = db.prepare('SELECT 1 FROM audit_log WHERE jira_key = ? LIMIT 1').get(params.jira_key);
+      if (known) {
+        return NextResponse.json({
+          success: true,
+          message: 'Finding already resolved'
+        });
+      }
       return NextResponse.json(
         { error: 'Finding not found' },
         { status: 404 }
@@ -1,14 +1,68 @@
-import { NextResponse } from 'next/server';
+import { NextRequest, NextResponse } from 'next/server';
 import { db } from '@/lib/db';
 import { AuditLog } from '@/lib/types';
 
-export async function GET() {
+const COLUMNS = 'id, timestamp, summary, risk_level, jira_key, github_link, slack_link, resolved, control_id, source';
+const MAX_PAGE_SIZE = 500;
+
+// Same opaque cursor as memory.encode_cursor: base64url("<timestamp>|<id>")
+function encodeCursor(timestamp: string, id: number): string {
+  return Buffer.from(`${timestamp}|${id}`, 'utf-8').toString('base64url');
+}
+
+function decodeCursor(cursor: string): [string, number] | null {
+  const raw = Buffer.from(cursor, 'base64url').toString('utf-8');
+  const sep = raw.lastIndexOf('|');
+  const id = Number(raw.slice(sep + 1));
+  return sep > 0 && Number.isInteger(id) ? [raw.slice(0, sep), id] : null;
+}
+
+export async function GET(request: NextRequest) {
   try {
-    const findings = db.prepare(
-      'SELECT id, timestamp, summary, risk_level, jira_key, github_link, slack_link, resolved, control_id, source FROM audit_log ORDER BY id DESC'
-    ).all() as AuditLog[];
+    const params = request.nextUrl.searchParams;
 
-    return NextResponse.json(findings);
+    // Legacy shape (full list) unless the caller asks for a page
+    if (!params.has('limit') && !params.has('cursor')) {
+      const findings = db.prepare(
+        `SELECT ${COLUMNS} FROM audit_log ORDER BY id DESC`
+      ).all() as AuditLog[];
+      return NextResponse.json(findings);
+    }
+
+    // Keyset pagination on (timestamp, id), served by the memory.py indexes
+    const limit = Math.max(1, Math.min(Number(params.get('limit')) || 50, MAX_PAGE_SIZE));
+    const where: string[] = [];
+    const args: (string | number)[] = [];
+    for (const [param, column] of [['risk', 'risk_level'], ['source', 'source'], ['control_id', 'control_id'], ['status', 'status'], ['assignee', 'assignee_id']]) {
+      const value = params.get(param);
+      if (value) {
+        where.push(`${column} = ?`);
+        args.push(value);
+      }
+    }
+    const resolved = params.get('resolved');
+    if (resolved === '0' || resolved === '1') {
+      where.push(`resolved = ${resolved}`);
+    }
+    const cursor = params.get('cursor');
+    if (cursor) {
+      const position = decodeCursor(cursor);
+      if (!position) {
+        return NextResponse.json({ error: 'Invalid cursor' }, { status: 400 });
+      }
+      where.push('(timestamp, id) < (?, ?)');
+      args.push(...position);
+    }
+
+    const rows = db.prepare(
+      `SELECT ${COLUMNS} FROM audit_log ${where.length ? 'WHERE ' + where.join(' AND ') : ''} ` +
+      'ORDER BY timestamp DESC, id DESC LIMIT ?'
+    ).all(...args, limit + 1) as AuditLog[];
+
+    const findings = rows.slice(0, limit);
+    const last = findings[findings.length - 1];
+    const next_cursor = rows.length > limit && last ? encodeCursor(last.timestamp, last.id) : null;
+    return NextResponse.json({ findings, next_cursor });
   } catch (error) {
     console.error('Error fetching findings:', error);
     return NextResponse.json(
@@ -17,4 +71,3 @@ export async function GET() {
     );
   }
 }
-
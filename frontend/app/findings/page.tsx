@@ -1,7 +1,7 @@
 'use client'
 
 import { useState, useMemo } from 'react'
-import useSWR from 'swr'
+import useSWRInfinite from 'swr/infinite'
 import Link from 'next/link'
 import { Button } from '@/components/ui/button'
 import { Input } from '@/components/ui/input'
@@ -14,6 +14,11 @@ import { useToast } from '@/components/ui/use-toast'
 
 const fetcher = (url: string) => fetch(url).then((res) => res.json())
 
+// Keyset-paginated pages from /api/findings (risk/status/source filtered server-side)
+const PAGE_SIZE = 100
+
+type FindingsPage = { findings: AuditLog[]; next_cursor: string | null }
+
 export default function Findings() {
   const { toast } = useToast()
   const [searchTerm, setSearchTerm] = useState('')
@@ -29,9 +34,20 @@ export default function Findings() {
   } | null>(null)
   const [loadingFix, setLoadingFix] = useState(false)
 
-  const { data, error, isLoading, mutate } = useSWR('/api/findings', fetcher, {
+  const getKey = (pageIndex: number, previous: FindingsPage | null) => {
+    if (previous && !previous.next_cursor) return null
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) })
+    if (riskFilter !== 'all') params.set('risk', riskFilter)
+    if (sourceFilter !== 'all') params.set('source', sourceFilter)
+    if (resolvedFilter !== 'all') params.set('resolved', resolvedFilter === 'resolved' ? '1' : '0')
+    if (previous?.next_cursor) params.set('cursor', previous.next_cursor)
+    return `/api/findings?${params}`
+  }
+
+  const { data, error, isLoading, isValidating, mutate, size, setSize } = useSWRInfinite<FindingsPage>(getKey, fetcher, {
     refreshInterval: 10000,
   })
+  const hasMore = Boolean(data?.[data.length - 1]?.next_cursor)
 
   const handleResolve = async (jiraKey: string) => {
     try {
@@ -105,20 +121,12 @@ export default function Findings() {
     }
   }
 
-  const findings: AuditLog[] = data || []
+  const findings: AuditLog[] = useMemo(() => (data || []).flatMap((page) => page.findings || []), [data])
 
+  // Risk, status and source are applied by the API; search covers the loaded pages
   const filteredFindings = useMemo(() => {
-    return findings.filter((finding) => {
-      const matchesSearch = finding.summary.toLowerCase().includes(searchTerm.toLowerCase())
-      const matchesRisk = riskFilter === 'all' || finding.risk_level === riskFilter
-      const matchesResolved = resolvedFilter === 'all' || 
-        (resolvedFilter === 'open' && finding.resolved === 0) ||
-        (resolvedFilter === 'resolved' && finding.resolved === 1)
-      const matchesSource = sourceFilter === 'all' || finding.source === sourceFilter
-
-      return matchesSearch && matchesRisk && matchesResolved && matchesSource
-    })
-  }, [findings, searchTerm, riskFilter, resolvedFilter, sourceFilter])
+    return findings.filter((finding) => finding.summary.toLowerCase().includes(searchTerm.toLowerCase()))
+  }, [findings, searchTerm])
 
   const getRiskBadgeClass = (riskLevel: RiskLevel) => {
     switch (riskLevel) {
@@ -218,7 +226,7 @@ export default function Findings() {
       <div className="command-card">
         <div className="border-b border-[#DDDDDD] dark:border-[#333333] pb-3 mb-4">
           <h2 className="text-sm font-semibold text-black dark:text-white">
-            Findings ({filteredFindings.length})
+            Findings ({filteredFindings.length}{hasMore ? '+' : ''})
           </h2>
         </div>
         <div className="overflow-x-auto">
@@ -347,6 +355,19 @@ export default function Findings() {
                 No findings found matching your filters
               </div>
             )}
+            {hasMore && (
+              <div className="flex justify-center pt-4">
+                <Button
+                  size="sm"
+                  variant="outline"
+                  disabled={isValidating}
+                  onClick={() => setSize(size + 1)}
+                  className="border-black dark:border-white bg-white dark:bg-transparent text-black dark:text-white hover:bg-black dark:hover:bg-white hover:text-white dark:hover:text-black text-xs"
+                >
+                  {isValidating ? 'Loading...' : 'Load more'}
+                </Button>
+              </div>
+            )}
           </div>
         </div>
 
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of per-hunk analysis results.
+
+The same hunk is seen again on amended commits, rebases, cherry-picks and
+revert/re-apply cycles. Hunks are keyed by a hash of their added/removed
+lines only (hunk headers and context lines are ignored, so line-number and
+context drift do not change the key), plus the prompt/model version, so a
+prompt change invalidates old results automatically.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable
+
+CACHE_DB_PATH = Path(os.getenv("HUNK_CACHE_PATH", Path(__file__).parent / "hunk_cache.db"))
+MAX_ENTRIES = int(os.getenv("HUNK_CACHE_MAX_ENTRIES", "50000"))
+TTL_DAYS = float(os.getenv("HUNK_CACHE_TTL_DAYS", "30"))
+
+
+# ---------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------
+def normalize_hunk(hunk: str) -> str:
+    """Keep only the changed lines of a hunk, without trailing whitespace."""
+    lines = []
+    for line in hunk.splitlines():
+        if line.startswith(("+", "-")) and not line.startswith(("+++", "---")):
+            lines.append(line[0] + line[1:].rstrip())
+    return "\n".join(lines)
+
+
+def hunk_key(hunk: str, version: str = "") -> str:
+    """Stable 16-hex-digit id for a hunk under a given prompt/model version."""
+    digest = hashlib.sha256(f"{version}\n{normalize_hunk(hunk)}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------
+class HunkCache:
+    """SQLite-backed hunk → analysis result store with LRU/TTL eviction."""
+
+    def __init__(self, path=CACHE_DB_PATH, max_entries: int = MAX_ENTRIES, ttl_days: float = TTL_DAYS):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.ttl_days = ttl_days
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS hunk_results (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER DEFAULT 0
+                );
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_hunk_results_last_used ON hunk_results(last_used)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, dict]:
+        """Return {key: result} for the keys that are cached and count hits/misses."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, dict] = {}
+        if not keys:
+            return found
+        now = time.time()
+        conn = self._connect()
+        try:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, result FROM hunk_results WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, result in rows:
+                    found[key] = json.loads(result)
+            if found:
+                conn.executemany(
+                    "UPDATE hunk_results SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+                conn.commit()
+        finally:
+            conn.close()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, results: Dict[str, dict]):
+        """Store analysis results for freshly analyzed hunks."""
+        if not results:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.executemany("""
+                INSERT INTO hunk_results (key, result, created_at, last_used)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET result = excluded.result, last_used = excluded.last_used
+            """, [(k, json.dumps(v), now, now) for k, v in results.items()])
+            conn.commit()
+        finally:
+            conn.close()
+        self.stored += len(results)
+
+    def evict(self):
+        """Drop entries older than the TTL, then least-recently-used ones above the size cap."""
+        conn = self._connect()
+        try:
+            cutoff = time.time() - self.ttl_days * 86400
+            removed = conn.execute("DELETE FROM hunk_results WHERE last_used < ?", (cutoff,)).rowcount
+            count = conn.execute("SELECT COUNT(*) FROM hunk_results").fetchone()[0]
+            if count > self.max_entries:
+                removed += conn.execute("""
+                    DELETE FROM hunk_results WHERE key IN (
+                        SELECT key FROM hunk_results ORDER BY last_used ASC LIMIT ?
+                    )
+                """, (count - self.max_entries,)).rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        self.evicted += removed
+        return removed
+
+    def stats(self) -> dict:
+        """Hit-rate statistics for this run."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stored": self.stored,
+            "evicted": self.evicted,
+        }
@@ -30,7 +30,9 @@ def init_complete_db():
                 control_id TEXT,
                 source TEXT DEFAULT 'code',
                 assignee_id TEXT,
-                status TEXT DEFAULT 'open'
+                status TEXT DEFAULT 'open',
+                description TEXT,
+                recommendation TEXT
             );
         """)
         
@@ -1,7 +1,21 @@
 # memory.py
+import atexit
+import base64
+import os
+import queue
+import re
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
 from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import metrics
 
 DB_PATH = "compliance_memory.db"
 
@@ -20,48 +34,464 @@ def get_connection():
 # ---------------------------------------------------------------------
 # Initialization
 # ---------------------------------------------------------------------
+# Columns added over time by the migration scripts; init_db adds any that are missing
+AUDIT_LOG_COLUMNS = {
+    "control_id": "TEXT",
+    "source": "TEXT DEFAULT 'code'",
+    "assignee_id": "TEXT",
+    "status": "TEXT DEFAULT 'open'",
+    "description": "TEXT",
+    "recommendation": "TEXT",
+    "resolved_at": "TEXT",
+}
+
+# Every audit_log column after id, in table order (shared by the hot table and the archive)
+AUDIT_LOG_COLUMN_DEFS = """
+    timestamp TEXT,
+    summary TEXT,
+    risk_level TEXT,
+    jira_key TEXT,
+    github_link TEXT,
+    slack_link TEXT,
+    resolved INTEGER DEFAULT 0,
+    control_id TEXT,
+    source TEXT DEFAULT 'code',
+    assignee_id TEXT,
+    status TEXT DEFAULT 'open',
+    description TEXT,
+    recommendation TEXT,
+    resolved_at TEXT
+"""
+
+# Keyset indexes for query_findings: every filter prefix is followed by
+# timestamp (and implicitly id, the rowid), so a page is one index range
+# walk of `limit` entries. The partial indexes cover the hot open set.
+AUDIT_LOG_INDEXES = {
+    "idx_audit_ts": "(timestamp)",
+    "idx_audit_open_ts": "(timestamp) WHERE resolved = 0",
+    "idx_audit_status_ts": "(status, timestamp)",
+    "idx_audit_risk_ts": "(risk_level, timestamp)",
+    "idx_audit_risk_open_ts": "(risk_level, timestamp) WHERE resolved = 0",
+    "idx_audit_source_ts": "(source, timestamp)",
+    "idx_audit_control_ts": "(control_id, timestamp)",
+    "idx_audit_assignee_ts": "(assignee_id, status, timestamp)",
+    # mark_resolved_many, finding_exists and archive_resolved
+    "idx_audit_jira": "(jira_key)",
+    "idx_audit_github": "(github_link)",
+    "idx_audit_open_dedup": "(summary, risk_level) WHERE resolved = 0",
+    "idx_audit_resolved_age": "(COALESCE(resolved_at, timestamp)) WHERE resolved = 1",
+}
+
+
+# Full-text index over the finding text. External content: the text lives
+# only in audit_log and the triggers keep the index in step with inserts,
+# edits and deletes. Resolution state is read from audit_log at query time,
+# so resolving a finding needs no index update.
+FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS findings_fts USING fts5(
+        summary, description, recommendation,
+        content='audit_log', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_log_fts_insert AFTER INSERT ON audit_log BEGIN
+        INSERT INTO findings_fts(rowid, summary, description, recommendation)
+        VALUES (new.id, new.summary, new.description, new.recommendation);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_log_fts_delete AFTER DELETE ON audit_log BEGIN
+        INSERT INTO findings_fts(findings_fts, rowid, summary, description, recommendation)
+        VALUES ('delete', old.id, old.summary, old.description, old.recommendation);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_log_fts_update AFTER UPDATE OF summary, description, recommendation ON audit_log BEGIN
+        INSERT INTO findings_fts(findings_fts, rowid, summary, description, recommendation)
+        VALUES ('delete', old.id, old.summary, old.description, old.recommendation);
+        INSERT INTO findings_fts(rowid, summary, description, recommendation)
+        VALUES (new.id, new.summary, new.description, new.recommendation);
+    END
+    """,
+]
+
+
+def ensure_search_index(conn):
+    """Create the FTS5 index and its triggers; index existing rows the first time."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'findings_fts'").fetchone()
+    try:
+        for statement in FTS_SCHEMA:
+            conn.execute(statement)
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Full-text search unavailable (SQLite built without FTS5?): {e}")
+        return
+    if not exists:
+        conn.execute("INSERT INTO findings_fts(findings_fts) VALUES ('rebuild')")
+
+
+# Open findings per control, maintained by triggers so that every writer
+# (Python, the Next.js API routes, migrations) keeps them current. Policy
+# status is derived from these instead of a NOT EXISTS scan of audit_log.
+COUNTER_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS control_open_counts (
+        control_id TEXT PRIMARY KEY,
+        open_count INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_log_open_insert AFTER INSERT ON audit_log
+    WHEN new.resolved = 0 AND new.control_id IS NOT NULL BEGIN
+        INSERT INTO control_open_counts(control_id, open_count) VALUES (new.control_id, 1)
+        ON CONFLICT(control_id) DO UPDATE SET open_count = open_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_log_open_delete AFTER DELETE ON audit_log
+    WHEN old.resolved = 0 AND old.control_id IS NOT NULL BEGIN
+        UPDATE control_open_counts SET open_count = open_count - 1 WHERE control_id = old.control_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_log_open_update AFTER UPDATE OF resolved, control_id ON audit_log
+    WHEN (old.resolved = 0 AND old.control_id IS NOT NULL) OR (new.resolved = 0 AND new.control_id IS NOT NULL) BEGIN
+        UPDATE control_open_counts SET open_count = open_count - 1
+        WHERE old.resolved = 0 AND control_id = old.control_id;
+        INSERT INTO control_open_counts(control_id, open_count)
+        SELECT new.control_id, 1 WHERE new.resolved = 0 AND new.control_id IS NOT NULL
+        ON CONFLICT(control_id) DO UPDATE SET open_count = open_count + 1;
+    END
+    """,
+]
+
+
+def ensure_control_counters(conn):
+    """Create the per-control open counters and their triggers; seed them the first time."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'control_open_counts'").fetchone()
+    for statement in COUNTER_SCHEMA:
+        conn.execute(statement)
+    if not exists:
+        conn.execute("""
+            INSERT INTO control_open_counts(control_id, open_count)
+            SELECT control_id, COUNT(*) FROM audit_log
+            WHERE resolved = 0 AND control_id IS NOT NULL GROUP BY control_id
+        """)
+
+
+# Near-duplicate clustering (finding_clusters.py): embeddings of open cluster
+# heads, dropped by trigger when the head is resolved or archived, and the
+# findings attached to a head instead of being acted on again. seq grows in
+# commit order (never reused), so readers sync incrementally on it rather
+# than on finding_id, which an embedding can be committed after.
+CLUSTER_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS finding_embeddings (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        finding_id INTEGER NOT NULL UNIQUE,
+        model TEXT,
+        embedding BLOB
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS finding_cluster_members (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cluster_id INTEGER NOT NULL,
+        timestamp TEXT,
+        summary TEXT,
+        risk_level TEXT,
+        description TEXT,
+        source TEXT,
+        similarity REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_cluster_members_cluster ON finding_cluster_members (cluster_id)",
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_log_embedding_resolve AFTER UPDATE OF resolved ON audit_log
+    WHEN new.resolved = 1 BEGIN
+        DELETE FROM finding_embeddings WHERE finding_id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_log_embedding_delete AFTER DELETE ON audit_log BEGIN
+        DELETE FROM finding_embeddings WHERE finding_id = old.id;
+    END
+    """,
+]
+
+
+# Cross-framework control crosswalk (build_crosswalk.py): symmetric links
+# between equivalent controls. A policy fails while it or any linked control
+# has open findings, so one finding marks the whole group failing.
+CROSSWALK_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS control_crosswalk (
+        control_id TEXT NOT NULL,
+        related_id TEXT NOT NULL,
+        similarity REAL,
+        source TEXT,
+        PRIMARY KEY (control_id, related_id)
+    ) WITHOUT ROWID
+"""
+
+# policies.status for the policy row being updated, from the open counters of
+# the control and its crosswalk links
+POLICY_STATUS_SQL = """
+    CASE WHEN EXISTS (
+        SELECT 1 FROM control_open_counts c
+        WHERE c.open_count > 0 AND (
+            c.control_id = policies.control_id
+            OR c.control_id IN (SELECT related_id FROM control_crosswalk x WHERE x.control_id = policies.control_id)
+        )
+    ) THEN 'failing' ELSE 'passing' END
+"""
+
+
+def _with_related(marks: str) -> str:
+    """SQL condition matching the given controls and every control linked to them."""
+    return (f"(control_id IN ({marks}) "
+            f"OR control_id IN (SELECT related_id FROM control_crosswalk WHERE control_id IN ({marks})))")
+
+
+def ensure_schema(conn):
+    """Add missing audit_log columns, the query indexes, search index, counters and cluster tables (idempotent)."""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(audit_log)")}
+    for column, decl in AUDIT_LOG_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE audit_log ADD COLUMN {column} {decl}")
+    for name, columns in AUDIT_LOG_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON audit_log {columns}")
+    ensure_search_index(conn)
+    ensure_control_counters(conn)
+    ensure_cluster_tables(conn)
+    conn.execute(CROSSWALK_SCHEMA)
+
+
+def ensure_cluster_tables(conn):
+    """Create the cluster tables and triggers; rebuild finding_embeddings from its pre-seq layout."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(finding_embeddings)")}
+    if columns and "seq" not in columns:
+        # The triggers reference the table, so drop them across the rebuild (recreated below)
+        conn.execute("DROP TRIGGER IF EXISTS audit_log_embedding_resolve")
+        conn.execute("DROP TRIGGER IF EXISTS audit_log_embedding_delete")
+        conn.execute("ALTER TABLE finding_embeddings RENAME TO finding_embeddings_old")
+        conn.execute(CLUSTER_SCHEMA[0])
+        conn.execute("""
+            INSERT INTO finding_embeddings (finding_id, model, embedding)
+            SELECT finding_id, model, embedding FROM finding_embeddings_old ORDER BY finding_id
+        """)
+        conn.execute("DROP TABLE finding_embeddings_old")
+    for statement in CLUSTER_SCHEMA:
+        conn.execute(statement)
+
+
 def init_db():
     """Initialize SQLite database and create table if not exists."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
+        cursor.execute(f"""
             CREATE TABLE IF NOT EXISTS audit_log (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                summary TEXT,
-                risk_level TEXT,
-                jira_key TEXT,
-                github_link TEXT,
-                slack_link TEXT,
-                resolved INTEGER DEFAULT 0,
-                control_id TEXT
+                {AUDIT_LOG_COLUMN_DEFS}
             );
         """)
+        ensure_schema(conn)
         conn.commit()
     print(f"🧠 SQLite memory initialized at {DB_PATH}")
 
 # ---------------------------------------------------------------------
 # Insert new finding
 # ---------------------------------------------------------------------
-def store_finding(summary: str, risk: str, jira_key: str = None, github_link: str = None, slack_link: str = None, control_id: str = None, source: str = 'code'):
-    """Insert a new compliance finding into memory and update policy status."""
+@metrics.timed("db_write")
+def store_finding(summary: str, risk: str, jira_key: str = None, github_link: str = None, slack_link: str = None, control_id: str = None, source: str = 'code',
+                  description: str = None, recommendation: str = None) -> int:
+    """Insert a new compliance finding into memory and update policy status; returns its id."""
     timestamp = datetime.utcnow().isoformat() + "Z"
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
-            INSERT INTO audit_log (timestamp, summary, risk_level, jira_key, github_link, slack_link, control_id, source)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (timestamp, summary, risk, jira_key, github_link, slack_link, control_id, source))
+            INSERT INTO audit_log (timestamp, summary, risk_level, jira_key, github_link, slack_link, control_id, source,
+                                   description, recommendation)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (timestamp, summary, risk, jira_key, github_link, slack_link, control_id, source, description, recommendation))
+        finding_id = cursor.lastrowid
         
-        # Update policy status to 'failing' if control_id is provided
+        # Update policy status to 'failing' (with its crosswalk links) if control_id is provided
         if control_id:
-            cursor.execute("""
-                UPDATE policies SET status = 'failing' WHERE control_id = ?
-            """, (control_id,))
-            print(f"🔴 Updated policy {control_id} to FAILING status")
+            changed = cursor.execute(f"""
+                UPDATE policies SET status = 'failing' WHERE {_with_related('?')}
+            """, (control_id, control_id)).rowcount
+            print(f"🔴 Updated policy {control_id} to FAILING status"
+                  + (f" (+{changed - 1} linked)" if changed > 1 else ""))
         
         conn.commit()
     print(f"🧩 Stored finding in memory: {summary[:60]}... [{risk.upper()}] Control: {control_id or 'N/A'} Source: {source}")
+    return finding_id
+
+# ---------------------------------------------------------------------
+# Write-behind writer (group commit)
+# ---------------------------------------------------------------------
+# Off by default: store_finding commits (and fsyncs) every row. For backfills
+# and bulk ingestion, enqueue_finding hands rows to one writer thread that
+# commits them in groups of up to WRITE_BATCH_SIZE rows or WRITE_BATCH_MS.
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "500"))
+WRITE_BATCH_MS = float(os.getenv("WRITE_BATCH_MS", "20"))
+WRITE_QUEUE_SIZE = int(os.getenv("WRITE_QUEUE_SIZE", "10000"))
+
+_INSERT_FINDING = """
+    INSERT INTO audit_log (timestamp, summary, risk_level, jira_key, github_link, slack_link, control_id, source,
+                           description, recommendation)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_WRITER_STOP = object()
+
+
+class FindingWriter:
+    """
+    Single writer thread that commits queued findings in group transactions.
+
+    submit() returns a Future resolved with the new row id once its batch is
+    committed (or with the exception if the row could not be stored); flush()
+    blocks until everything submitted before it is durable.
+    """
+
+    def __init__(self, batch_size: int = WRITE_BATCH_SIZE, batch_ms: float = WRITE_BATCH_MS,
+                 maxsize: int = WRITE_QUEUE_SIZE):
+        self.batch_size = max(1, batch_size)
+        self.batch_seconds = max(0.0, batch_ms) / 1000
+        self.pending = queue.Queue(maxsize=maxsize)
+        self.stats = {"rows": 0, "batches": 0, "failed": 0}
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="finding-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, summary: str, risk: str, jira_key: str = None, github_link: str = None, slack_link: str = None,
+               control_id: str = None, source: str = 'code', description: str = None,
+               recommendation: str = None) -> Future:
+        """Queue one finding (same arguments as store_finding); blocks while the queue is full."""
+        if self._closed:
+            raise RuntimeError("FindingWriter is closed")
+        future = Future()
+        row = (datetime.utcnow().isoformat() + "Z", summary, risk, jira_key, github_link, slack_link, control_id,
+               source, description, recommendation)
+        self.pending.put((row, future))
+        return future
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait until every finding submitted so far is committed."""
+        if self._closed:
+            # close() drains the queue before the thread exits
+            self._thread.join(timeout)
+            return
+        marker = Future()
+        self.pending.put((None, marker))
+        marker.result(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Commit what is queued and stop the writer thread (idempotent)."""
+        if not self._closed:
+            self._closed = True
+            self.pending.put(_WRITER_STOP)
+        self._thread.join(timeout)
+
+    def _collect(self):
+        batch = [self.pending.get()]
+        deadline = time.monotonic() + self.batch_seconds
+        while len(batch) < self.batch_size and batch[-1] is not _WRITER_STOP:
+            try:
+                remaining = deadline - time.monotonic()
+                batch.append(self.pending.get(timeout=remaining) if remaining > 0 else self.pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @metrics.timed("db_write_batch")
+    def _commit(self, conn, rows):
+        """Insert rows in one transaction; returns the new row ids."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ids = [conn.execute(_INSERT_FINDING, row).lastrowid for row in rows]
+            controls = sorted({row[6] for row in rows if row[6]})
+            for chunk in _chunks(controls):
+                conn.execute(f"UPDATE policies SET status = 'failing' WHERE {_with_related(', '.join('?' * len(chunk)))}",
+                             chunk * 2)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return ids
+
+    def _write(self, conn, items):
+        findings = [(row, future) for row, future in items if row is not None]
+        if findings:
+            try:
+                outcomes = self._commit(conn, [row for row, _ in findings])
+            except Exception:
+                # Retry one by one so a single bad row does not fail its neighbours
+                outcomes = []
+                for row, _ in findings:
+                    try:
+                        outcomes.append(self._commit(conn, [row])[0])
+                    except Exception as e:
+                        outcomes.append(e)
+            for (_, future), outcome in zip(findings, outcomes):
+                if isinstance(outcome, Exception):
+                    self.stats["failed"] += 1
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+            self.stats["rows"] += len(findings)
+            self.stats["batches"] += 1
+        for row, marker in items:
+            if row is None:
+                marker.set_result(None)
+
+    def _run(self):
+        conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout = 5000")
+        try:
+            while True:
+                batch = self._collect()
+                stop = batch[-1] is _WRITER_STOP
+                if stop:
+                    batch.pop()
+                try:
+                    self._write(conn, batch)
+                except Exception as e:
+                    print(f"❌ Finding writer failed on a batch of {len(batch)}: {e}")
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                if stop:
+                    break
+        finally:
+            conn.close()
+            print(f"🧾 Finding writer stopped: {self.stats['rows']} row(s) in {self.stats['batches']} batch(es)")
+
+
+_writer: Optional[FindingWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_finding_writer() -> FindingWriter:
+    """The shared write-behind writer, started on first use and closed at exit."""
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer._closed:
+            _writer = FindingWriter()
+            atexit.register(_writer.close)
+        return _writer
+
+
+def enqueue_finding(*args, **kwargs) -> Future:
+    """Write-behind store_finding: returns a Future of the row id (see FindingWriter)."""
+    return get_finding_writer().submit(*args, **kwargs)
+
+
+def flush_findings(timeout: Optional[float] = None):
+    """Block until every enqueued finding is committed."""
+    if _writer is not None:
+        _writer.flush(timeout)
 
 # ---------------------------------------------------------------------
 # Fetch latest findings
@@ -77,9 +507,293 @@ def get_recent_findings(limit: int = 10):
         results = cursor.fetchall()
     return results
 
+# ---------------------------------------------------------------------
+# Paginated findings query
+# ---------------------------------------------------------------------
+FINDING_COLUMNS = ("id", "timestamp", "summary", "risk_level", "jira_key", "control_id",
+                   "source", "status", "assignee_id", "resolved")
+MAX_PAGE_SIZE = 500
+
+
+@dataclass(frozen=True)
+class Finding:
+    id: int
+    timestamp: str
+    summary: str
+    risk_level: str
+    jira_key: Optional[str]
+    control_id: Optional[str]
+    source: Optional[str]
+    status: Optional[str]
+    assignee_id: Optional[str]
+    resolved: bool
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass
+class FindingPage:
+    findings: List[Finding]
+    next_cursor: Optional[str]  # None on the last page
+
+    def to_dict(self):
+        return {"findings": [f.to_dict() for f in self.findings], "next_cursor": self.next_cursor}
+
+
+def encode_cursor(timestamp: str, finding_id: int) -> str:
+    """Opaque cursor for the position after (timestamp, id)."""
+    return base64.urlsafe_b64encode(f"{timestamp}|{finding_id}".encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        timestamp, finding_id = raw.rsplit("|", 1)
+        return timestamp, int(finding_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def _match(column: str, value, where: list, params: list):
+    """Equality filter; a list/tuple becomes IN (...)."""
+    if value is None:
+        return
+    if isinstance(value, (list, tuple, set)):
+        values = list(value)
+        where.append(f"{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    else:
+        where.append(f"{column} = ?")
+        params.append(value)
+
+
+def query_findings(limit: int = 50, cursor: Optional[str] = None,
+                   risk: Union[str, Sequence[str], None] = None,
+                   source: Union[str, Sequence[str], None] = None,
+                   control_id: Union[str, Sequence[str], None] = None,
+                   resolved: Optional[bool] = None,
+                   status: Union[str, Sequence[str], None] = None,
+                   assignee: Optional[str] = None,
+                   include_archived: bool = False) -> FindingPage:
+    """
+    One page of findings, newest first, with keyset pagination on (timestamp, id).
+
+    Each page is an index range walk starting at the cursor, so fetching
+    page 10,000 costs the same as page 1 (unlike OFFSET).
+
+    Args:
+        limit: Page size (capped at MAX_PAGE_SIZE)
+        cursor: next_cursor of the previous page, or None for the first page
+        risk, source, control_id, status: Value or list of values to match
+        resolved: True/False to filter on the resolved flag
+        assignee: assignee_id to match
+        include_archived: Also page through the archive database (history view)
+
+    Returns:
+        FindingPage with typed rows and the cursor of the next page
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    where, params = [], []
+    _match("risk_level", risk, where, params)
+    _match("source", source, where, params)
+    _match("control_id", control_id, where, params)
+    _match("status", status, where, params)
+    _match("assignee_id", assignee, where, params)
+    if resolved is not None:
+        # A literal, not a parameter, so the partial "open" indexes can be used
+        where.append(f"resolved = {1 if resolved else 0}")
+    if cursor:
+        timestamp, finding_id = decode_cursor(cursor)
+        where.append("(timestamp, id) < (?, ?)")
+        params.extend([timestamp, finding_id])
+
+    where_sql = (" WHERE " + " AND ".join(where)) if where else ""
+    sql = f"SELECT {', '.join(FINDING_COLUMNS)} FROM main.audit_log{where_sql}"
+    if include_archived:
+        # A compound ORDER BY merges the two index-ordered streams; a view would sort everything
+        sql += f" UNION ALL SELECT {', '.join(FINDING_COLUMNS)} FROM archive.audit_log{where_sql}"
+        params = params + params
+    sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    params.append(limit + 1)  # one extra row tells us whether there is a next page
+
+    with (get_history_connection() if include_archived else get_connection()) as conn:
+        rows = conn.execute(sql, params).fetchall()
+
+    findings = [Finding(*row[:-1], resolved=bool(row[-1])) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = findings[-1]
+        next_cursor = encode_cursor(last.timestamp, last.id)
+    return FindingPage(findings, next_cursor)
+
+# ---------------------------------------------------------------------
+# Full-text search
+# ---------------------------------------------------------------------
+# FTS5's bm25() needs per-term document counts over the whole index, which
+# costs O(matches) per query: 30-700 ms for common terms at millions of rows.
+# Instead the newest FTS_RANK_WINDOW matches are fetched in rowid order (FTS5
+# stops early) and scored here with a column-weighted BM25. All matches are
+# ranked when there are fewer than that; beyond it, common queries rank the
+# most recent findings, which is what triage wants.
+FTS_RANK_WINDOW = int(os.getenv("FTS_RANK_WINDOW", "300"))
+FTS_COLUMN_WEIGHTS = (10.0, 1.0, 2.0)  # summary, description, recommendation
+BM25_K1, BM25_B = 1.2, 0.75
+
+_FTS_PART = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    id: int
+    timestamp: str
+    summary: str
+    risk_level: str
+    jira_key: Optional[str]
+    control_id: Optional[str]
+    resolved: bool
+    snippet: str
+    score: float
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def parse_search(text: str):
+    """
+    Split search box text into phrases: [(terms, is_prefix), ...].
+
+    "quoted text" is a phrase, other words are ANDed, and a trailing * makes
+    a word a prefix ("creds*"). Punctuation splits words into a phrase
+    ("s3:GetObject" -> "s3 getobject"), so FTS5 operators are never passed
+    through.
+    """
+    phrases = []
+    for phrase, word in _FTS_PART.findall(text):
+        terms = tuple(t.lower() for t in _WORD.findall(phrase or word))
+        if terms:
+            phrases.append((terms, bool(word) and word.endswith("*")))
+    return phrases
+
+
+def to_fts_query(text: str) -> Optional[str]:
+    """FTS5 MATCH expression for search box text, or None when there is nothing to search."""
+    parts = ['"' + " ".join(terms) + '"' + ("*" if prefix else "") for terms, prefix in parse_search(text)]
+    return " ".join(parts) or None
+
+
+def _phrase_count(tokens: List[str], terms, prefix: bool) -> int:
+    if len(terms) == 1:
+        if prefix:
+            return sum(1 for t in tokens if t.startswith(terms[0]))
+        return tokens.count(terms[0])
+    head, n = terms[0], len(terms)
+    count = 0
+    for i, token in enumerate(tokens[:len(tokens) - n + 1]):
+        if token == head and tuple(tokens[i:i + n - 1]) == terms[:-1]:
+            last = tokens[i + n - 1]
+            count += last.startswith(terms[-1]) if prefix else last == terms[-1]
+    return count
+
+
+def _score(rows, phrases):
+    """Column-weighted BM25 over candidate rows whose [1:4] are summary, description, recommendation."""
+    tokenized = [[_WORD.findall((text or "").lower()) for text in row[1:4]] for row in rows]
+    avg_len = [max(1.0, sum(len(doc[c]) for doc in tokenized) / max(1, len(tokenized))) for c in range(3)]
+    scores = []
+    for columns in tokenized:
+        score = 0.0
+        for c, tokens in enumerate(columns):
+            if not tokens:
+                continue
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / avg_len[c])
+            for terms, prefix in phrases:
+                tf = _phrase_count(tokens, terms, prefix)
+                if tf:
+                    score += FTS_COLUMN_WEIGHTS[c] * tf * (BM25_K1 + 1) / (tf + norm)
+        scores.append(score)
+    return scores
+
+
+def _snippet(texts, phrases, highlight, size: int = 12) -> str:
+    """Up to `size` words around the first match, preferring summary, then recommendation, then description."""
+    words = {terms[i] for terms, _ in phrases for i in range(len(terms))}
+    prefixes = tuple(terms[-1] for terms, prefix in phrases if prefix)
+
+    def hit(word):
+        w = word.lower()
+        return w in words or (prefixes and w.startswith(prefixes))
+
+    candidates = [t for t in (texts[0], texts[2], texts[1]) if t]
+    # Prefer a column where a whole phrase matches, not just one of its words
+    candidates.sort(key=lambda t: not any(_phrase_count(_WORD.findall(t.lower()), terms, prefix)
+                                          for terms, prefix in phrases))
+    for text in candidates:
+        spans = [(m.start(), m.end()) for m in _WORD.finditer(text)]
+        first = next((i for i, (a, b) in enumerate(spans) if hit(text[a:b])), None)
+        if first is None:
+            continue
+        lo = max(0, min(first - size // 4, len(spans) - size))
+        hi = min(len(spans), lo + size)
+        out, pos = [], spans[lo][0]
+        for a, b in spans[lo:hi]:
+            out.append(text[pos:a])
+            out.append(f"{highlight[0]}{text[a:b]}{highlight[1]}" if hit(text[a:b]) else text[a:b])
+            pos = b
+        end = spans[hi - 1][1] if hi < len(spans) else len(text)
+        out.append(text[pos:end])
+        return ("…" if lo else "") + "".join(out) + ("…" if hi < len(spans) else "")
+    return (texts[0] or "")[:200]
+
+
+def search_findings(query: str, limit: int = 20, resolved: Optional[bool] = None,
+                    order: str = "rank", highlight=("<mark>", "</mark>")) -> List[SearchHit]:
+    """
+    Ranked full-text search over finding summary, description and recommendation.
+
+    Args:
+        query: Search box text (see parse_search)
+        limit: Maximum hits (capped at MAX_PAGE_SIZE)
+        resolved: True/False to search only resolved/open findings
+        order: "rank" (best match among the newest FTS_RANK_WINDOW matches) or "recent"
+        highlight: Markers placed around matched terms in the snippet
+
+    Returns:
+        List of SearchHit, best first
+    """
+    match = to_fts_query(query)
+    if not match:
+        return []
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    window = limit if order == "recent" else max(limit, FTS_RANK_WINDOW)
+    resolved_sql = "" if resolved is None else f"AND a.resolved = {1 if resolved else 0}"
+
+    with get_connection() as conn:
+        candidates = conn.execute(f"""
+            SELECT a.id, a.summary, a.description, a.recommendation,
+                   a.timestamp, a.risk_level, a.jira_key, a.control_id, a.resolved
+            FROM findings_fts f JOIN audit_log a ON a.id = f.rowid
+            WHERE findings_fts MATCH ? {resolved_sql}
+            ORDER BY f.rowid DESC LIMIT ?
+        """, (match, window)).fetchall()
+
+    phrases = parse_search(query)
+    scored = list(zip(_score(candidates, phrases), candidates))
+    if order != "recent":
+        scored.sort(key=lambda s: (-s[0], -s[1][0]))
+    return [
+        SearchHit(id=row[0], timestamp=row[4], summary=row[1], risk_level=row[5], jira_key=row[6],
+                  control_id=row[7], resolved=bool(row[8]), snippet=_snippet(row[1:4], phrases, highlight),
+                  score=round(score, 4))
+        for score, row in scored[:limit]
+    ]
+
 # ---------------------------------------------------------------------
 # Deduplication Check
 # ---------------------------------------------------------------------
+@metrics.timed("dedup_exact")
 def finding_exists(summary: str, risk: str) -> bool:
     """Check if a similar finding (summary + risk) already exists and is unresolved."""
     with get_connection() as conn:
@@ -94,57 +808,426 @@ def finding_exists(summary: str, risk: str) -> bool:
         return True
     return False
 
+# ---------------------------------------------------------------------
+# Near-duplicate clusters
+# ---------------------------------------------------------------------
+def save_finding_embedding(finding_id: int, model: str, embedding: bytes):
+    """Store the embedding of an open cluster head (removed by trigger on resolve)."""
+    with get_connection() as conn:
+        conn.execute("INSERT OR REPLACE INTO finding_embeddings (finding_id, model, embedding) VALUES (?, ?, ?)",
+                     (finding_id, model, embedding))
+        conn.commit()
+
+
+def load_finding_embeddings(model: str, after_seq: int = 0):
+    """(finding_id, embedding, seq) of open cluster heads stored after after_seq, in seq order."""
+    with get_connection() as conn:
+        return conn.execute("""
+            SELECT e.finding_id, e.embedding, e.seq FROM finding_embeddings e
+            JOIN audit_log a ON a.id = e.finding_id
+            WHERE e.seq > ? AND e.model = ? AND a.resolved = 0
+            ORDER BY e.seq
+        """, (after_seq, model)).fetchall()
+
+
+def open_cluster_heads(finding_ids: Sequence[int]) -> dict:
+    """{id: {risk_level, summary, jira_key, github_link}} for those ids that are still open."""
+    ids = list(finding_ids)
+    if not ids:
+        return {}
+    with get_connection() as conn:
+        rows = conn.execute(f"""
+            SELECT id, risk_level, summary, jira_key, github_link FROM audit_log
+            WHERE id IN ({', '.join('?' * len(ids))}) AND resolved = 0
+        """, ids).fetchall()
+    return {row[0]: {"risk_level": row[1], "summary": row[2], "jira_key": row[3], "github_link": row[4]}
+            for row in rows}
+
+
+def add_cluster_member(cluster_id: int, summary: str, risk: str, description: str = None, source: str = 'code',
+                       similarity: float = 1.0) -> int:
+    """Attach a near-duplicate finding to an open cluster head instead of storing a new finding."""
+    timestamp = datetime.utcnow().isoformat() + "Z"
+    with get_connection() as conn:
+        member_id = conn.execute("""
+            INSERT INTO finding_cluster_members (cluster_id, timestamp, summary, risk_level, description, source, similarity)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (cluster_id, timestamp, summary, risk, description, source, similarity)).lastrowid
+        conn.commit()
+    print(f"🔗 Attached near-duplicate to finding #{cluster_id}: {summary[:60]} (similarity {similarity:.2f})")
+    return member_id
+
 # ---------------------------------------------------------------------
 # Mark Resolved
 # ---------------------------------------------------------------------
+def _chunks(values, size=500):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def refresh_policy_status(conn, control_ids) -> List[str]:
+    """
+    Set policies.status from control_open_counts for the given controls and
+    their crosswalk links only.
+
+    Returns:
+        Controls whose policy is now passing
+    """
+    control_ids = sorted(set(c for c in control_ids if c))
+    passing = set()
+    for chunk in _chunks(control_ids):
+        affected = _with_related(", ".join("?" * len(chunk)))
+        conn.execute(f"UPDATE policies SET status = {POLICY_STATUS_SQL} WHERE {affected}", chunk * 2)
+        passing.update(row[0] for row in conn.execute(
+            f"SELECT control_id FROM policies WHERE {affected} AND status = 'passing'", chunk * 2))
+    return sorted(passing)
+
+
+@metrics.timed("db_resolve")
+def mark_resolved_many(jira_keys: Sequence[str] = (), github_links: Sequence[str] = ()) -> dict:
+    """
+    Resolve every open finding for the given Jira keys (and/or GitHub issue
+    URLs) in one transaction and recompute policy status for the affected
+    controls only. Idempotent: keys that are unknown or already resolved are
+    ignored.
+
+    Returns:
+        Dict with requested, resolved (rows changed), controls (affected) and passing (now passing)
+    """
+    keys = list(dict.fromkeys(k for k in jira_keys if k))
+    links = list(dict.fromkeys(l for l in github_links if l))
+    if not keys and not links:
+        return {"requested": 0, "resolved": 0, "controls": [], "passing": []}
+    now = datetime.utcnow().isoformat() + "Z"
+    match = """(jira_key IN (SELECT value FROM temp.resolve_keys WHERE kind = 'jira')
+                OR github_link IN (SELECT value FROM temp.resolve_keys WHERE kind = 'github'))"""
+    with get_connection() as conn:
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS resolve_keys (kind TEXT, value TEXT, PRIMARY KEY (kind, value))")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM temp.resolve_keys")
+            conn.executemany("INSERT OR IGNORE INTO temp.resolve_keys VALUES (?, ?)",
+                             [("jira", k) for k in keys] + [("github", l) for l in links])
+            controls = [row[0] for row in conn.execute(f"""
+                SELECT DISTINCT control_id FROM audit_log
+                WHERE {match} AND resolved = 0 AND control_id IS NOT NULL
+            """)]
+            resolved = conn.execute(f"""
+                UPDATE audit_log SET resolved = 1, status = 'resolved', resolved_at = ?
+                WHERE {match} AND resolved = 0
+            """, (now,)).rowcount
+            # Triggers have already decremented control_open_counts
+            passing = refresh_policy_status(conn, controls)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    for control_id in passing:
+        print(f"🟢 Updated policy {control_id} to PASSING status")
+    print(f"✅ Marked {resolved} finding(s) resolved for {len(keys)} Jira key(s), {len(links)} GitHub issue(s)")
+    return {"requested": len(keys) + len(links), "resolved": resolved, "controls": controls, "passing": passing}
+
+
 def mark_resolved(jira_key: str):
     """Mark a finding as resolved using its Jira issue key and update policy status."""
+    return mark_resolved_many([jira_key])
+
+
+# Webhook deliveries already applied (resolution_webhooks.py), for idempotency
+WEBHOOK_DELIVERY_RETENTION_DAYS = 7
+
+
+def unseen_deliveries(delivery_ids: Sequence[str]) -> set:
+    """The subset of webhook delivery ids that have not been applied yet."""
+    ids = list(set(d for d in delivery_ids if d))
+    seen = set()
     with get_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Get the control_id before marking as resolved
-        cursor.execute("SELECT control_id FROM audit_log WHERE jira_key = ?", (jira_key,))
-        result = cursor.fetchone()
-        control_id = result[0] if result else None
-        
-        # Mark finding as resolved
-        cursor.execute("""
-            UPDATE audit_log SET resolved = 1 WHERE jira_key = ?
-        """, (jira_key,))
-        
-        # Update policy status to 'passing' if no unresolved findings exist for this control
-        if control_id:
-            cursor.execute("""
-                UPDATE policies
-                SET status = 'passing'
-                WHERE control_id = ?
-                AND NOT EXISTS (
-                    SELECT 1 FROM audit_log
-                    WHERE control_id = ?
-                    AND resolved = 0
-                )
-            """, (control_id, control_id))
-            print(f"🟢 Updated policy {control_id} to PASSING status")
-        
+        conn.execute("CREATE TABLE IF NOT EXISTS webhook_deliveries (delivery_id TEXT PRIMARY KEY, source TEXT, applied_at TEXT)")
+        for chunk in _chunks(ids):
+            marks = ", ".join("?" * len(chunk))
+            seen.update(row[0] for row in conn.execute(
+                f"SELECT delivery_id FROM webhook_deliveries WHERE delivery_id IN ({marks})", chunk))
+    return set(ids) - seen
+
+
+def record_deliveries(deliveries: Sequence[tuple]):
+    """Remember applied (delivery_id, source) pairs; forgets those older than the retention."""
+    now = datetime.utcnow()
+    with get_connection() as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS webhook_deliveries (delivery_id TEXT PRIMARY KEY, source TEXT, applied_at TEXT)")
+        conn.executemany("INSERT OR IGNORE INTO webhook_deliveries VALUES (?, ?, ?)",
+                         [(d, source, now.isoformat() + "Z") for d, source in deliveries if d])
+        cutoff = (now - timedelta(days=WEBHOOK_DELIVERY_RETENTION_DAYS)).isoformat() + "Z"
+        conn.execute("DELETE FROM webhook_deliveries WHERE applied_at < ?", (cutoff,))
         conn.commit()
-    print(f"✅ Marked finding resolved for Jira key: {jira_key}")
+
+
+def reconcile_control_status(fix: bool = True) -> dict:
+    """
+    Full recount of open findings per control, compared with the maintained
+    counters and with policies.status. With fix=True any drift is repaired
+    (counters rewritten, every policy status recomputed) in one transaction.
+
+    Returns:
+        Dict with counter_drift {control: (stored, actual)} and policy_drift [control, ...]
+    """
+    with get_connection() as conn:
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("BEGIN IMMEDIATE" if fix else "BEGIN")
+        try:
+            actual = dict(conn.execute("""
+                SELECT control_id, COUNT(*) FROM audit_log
+                WHERE resolved = 0 AND control_id IS NOT NULL GROUP BY control_id
+            """).fetchall())
+            stored = dict(conn.execute("SELECT control_id, open_count FROM control_open_counts").fetchall())
+            counter_drift = {
+                c: (stored.get(c, 0), actual.get(c, 0))
+                for c in set(actual) | set(stored) if stored.get(c, 0) != actual.get(c, 0)
+            }
+            policies = conn.execute("SELECT control_id, status FROM policies").fetchall()
+            related = defaultdict(list)
+            for control_id, related_id in conn.execute("SELECT control_id, related_id FROM control_crosswalk"):
+                related[control_id].append(related_id)
+            policy_drift = [
+                c for c, status in policies
+                if (status == 'failing') != any(actual.get(r, 0) > 0 for r in [c, *related[c]])
+            ]
+
+            if fix and (counter_drift or policy_drift):
+                conn.execute("DELETE FROM control_open_counts")
+                conn.executemany("INSERT INTO control_open_counts(control_id, open_count) VALUES (?, ?)",
+                                 list(actual.items()))
+                refresh_policy_status(conn, [c for c, _ in policies])
+                conn.commit()
+            else:
+                conn.rollback()
+        except Exception:
+            conn.rollback()
+            raise
+    return {"counter_drift": counter_drift, "policy_drift": policy_drift}
 
 # ---------------------------------------------------------------------
-# View unresolved items (for debugging)
+# Control crosswalk
 # ---------------------------------------------------------------------
-def list_unresolved():
-    """List all unresolved findings."""
+def load_crosswalk() -> dict:
+    """
+    {control_id: (related_id, ...)} from control_crosswalk.
+
+    Read-only: a missing database or table (build_crosswalk.py never ran)
+    is an empty crosswalk, and nothing is created.
+    """
+    related = defaultdict(list)
+    try:
+        conn = sqlite3.connect(f"{Path(DB_PATH).resolve().as_uri()}?mode=ro", uri=True)
+    except sqlite3.OperationalError:
+        return {}
+    try:
+        rows = conn.execute(
+            "SELECT control_id, related_id FROM control_crosswalk ORDER BY control_id, similarity DESC").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+    for control_id, related_id in rows:
+        related[control_id].append(related_id)
+    return {control_id: tuple(ids) for control_id, ids in related.items()}
+
+
+def replace_crosswalk(links: Sequence[tuple]) -> dict:
+    """
+    Replace the crosswalk with (control_id, related_id, similarity, source)
+    links (stored in both directions) and recompute every policy status in
+    the same transaction.
+
+    Returns:
+        Dict with links (rows stored) and passing / failing policy counts
+    """
+    rows = {}
+    for control_id, related_id, similarity, source in links:
+        if control_id != related_id:
+            rows[(control_id, related_id)] = (control_id, related_id, similarity, source)
+            rows[(related_id, control_id)] = (related_id, control_id, similarity, source)
     with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, timestamp, summary, risk_level, jira_key, control_id
-            FROM audit_log WHERE resolved = 0
-            ORDER BY id DESC
-        """)
-        rows = cursor.fetchall()
-    if not rows:
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute(CROSSWALK_SCHEMA)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM control_crosswalk")
+            conn.executemany("INSERT INTO control_crosswalk VALUES (?, ?, ?, ?)", list(rows.values()))
+            conn.execute(f"UPDATE policies SET status = {POLICY_STATUS_SQL}")
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM policies GROUP BY status").fetchall())
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    print(f"🔀 Stored {len(rows)} crosswalk link(s); policies: {counts.get('failing', 0)} failing, "
+          f"{counts.get('passing', 0)} passing")
+    return {"links": len(rows), "failing": counts.get("failing", 0), "passing": counts.get("passing", 0)}
+
+# ---------------------------------------------------------------------
+# Hot/cold archival
+# ---------------------------------------------------------------------
+# Resolved findings older than ARCHIVE_AFTER_DAYS move to a separate SQLite
+# file, attached as "archive", so the hot table (dedup, triage, unresolved
+# lists, FTS) only holds open and recent work. History queries read both
+# through get_history_connection() / query_findings(include_archived=True).
+ARCHIVE_DB_PATH = os.getenv("ARCHIVE_DB_PATH", "compliance_archive.db")
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+ARCHIVE_INDEXES = {
+    "idx_archive_ts": "(timestamp)",
+    "idx_archive_risk_ts": "(risk_level, timestamp)",
+    "idx_archive_control_ts": "(control_id, timestamp)",
+    "idx_archive_jira": "(jira_key)",
+}
+_ARCHIVE_COLUMNS = ("id",) + tuple(
+    line.strip().split()[0] for line in AUDIT_LOG_COLUMN_DEFS.strip().splitlines()
+)
+
+
+def attach_archive(conn):
+    """Attach the archive database (creating it if needed) and the audit_log_all history view."""
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    if "archive" not in attached:
+        conn.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_DB_PATH,))
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS archive.audit_log (
+            id INTEGER PRIMARY KEY,
+            {AUDIT_LOG_COLUMN_DEFS},
+            archived_at TEXT
+        )
+    """)
+    for name, columns in ARCHIVE_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS archive.{name} ON audit_log {columns}")
+    # Views spanning attached databases must be TEMP (per connection)
+    columns = ", ".join(_ARCHIVE_COLUMNS)
+    conn.execute(f"""
+        CREATE TEMP VIEW IF NOT EXISTS audit_log_all AS
+        SELECT {columns} FROM main.audit_log
+        UNION ALL
+        SELECT {columns} FROM archive.audit_log
+    """)
+
+
+@contextmanager
+def get_history_connection():
+    """Connection with the archive attached; query audit_log_all for full history."""
+    with get_connection() as conn:
+        attach_archive(conn)
+        yield conn
+
+
+def archive_resolved(older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE,
+                     max_batches: Optional[int] = None, pause: float = 0.05) -> int:
+    """
+    Move resolved findings older than `older_than_days` into the archive database.
+
+    Each batch is one short transaction (copy, then delete), followed by a
+    pause so writers like store_finding are never blocked for long. Safe to
+    interrupt and re-run.
+
+    Args:
+        older_than_days: Age since resolution (or creation, for rows without resolved_at)
+        batch_size: Findings moved per transaction
+        max_batches: Stop after this many batches (None = until done)
+        pause: Seconds to sleep between batches
+
+    Returns:
+        Number of findings archived
+    """
+    cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).isoformat() + "Z"
+    columns = ", ".join(_ARCHIVE_COLUMNS)
+    moved = batches = 0
+    with get_connection() as conn:
+        conn.execute("PRAGMA busy_timeout = 5000")
+        attach_archive(conn)
+        while max_batches is None or batches < max_batches:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = [row[0] for row in conn.execute("""
+                    SELECT id FROM main.audit_log
+                    WHERE resolved = 1 AND COALESCE(resolved_at, timestamp) < ?
+                    LIMIT ?
+                """, (cutoff, batch_size))]
+                if not ids:
+                    conn.rollback()
+                    break
+                marks = ", ".join("?" * len(ids))
+                conn.execute(f"""
+                    INSERT OR REPLACE INTO archive.audit_log ({columns}, archived_at)
+                    SELECT {columns}, ? FROM main.audit_log WHERE id IN ({marks})
+                """, (datetime.utcnow().isoformat() + "Z", *ids))
+                conn.execute(f"DELETE FROM main.audit_log WHERE id IN ({marks})", ids)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            moved += len(ids)
+            batches += 1
+            if pause:
+                time.sleep(pause)
+    if moved:
+        print(f"🗄️ Archived {moved} resolved finding(s) older than {older_than_days} day(s) to {ARCHIVE_DB_PATH}")
+    return moved
+
+
+def restore_findings(ids: Optional[Sequence[int]] = None, jira_keys: Optional[Sequence[str]] = None) -> int:
+    """
+    Move archived findings back into the hot table (ids are preserved, search
+    indexing happens through the insert trigger).
+
+    Returns:
+        Number of findings restored
+    """
+    where, params = [], []
+    _match("id", list(ids) if ids else None, where, params)
+    _match("jira_key", list(jira_keys) if jira_keys else None, where, params)
+    if not where:
+        return 0
+    where_sql = " OR ".join(where)
+    columns = ", ".join(_ARCHIVE_COLUMNS)
+    with get_connection() as conn:
+        conn.execute("PRAGMA busy_timeout = 5000")
+        attach_archive(conn)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            restored = conn.execute(f"""
+                INSERT OR IGNORE INTO main.audit_log ({columns})
+                SELECT {columns} FROM archive.audit_log WHERE {where_sql}
+            """, params).rowcount
+            # Only drop archive rows that are now in the hot table
+            conn.execute(f"""
+                DELETE FROM archive.audit_log
+                WHERE ({where_sql}) AND id IN (SELECT id FROM main.audit_log)
+            """, params)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    print(f"♻️ Restored {restored} finding(s) from the archive")
+    return restored
+
+
+def archive_stats():
+    """Row counts of the hot table and the archive."""
+    with get_history_connection() as conn:
+        hot = conn.execute("SELECT COUNT(*), SUM(resolved = 0) FROM main.audit_log").fetchone()
+        cold = conn.execute("SELECT COUNT(*) FROM archive.audit_log").fetchone()[0]
+    return {"hot": hot[0], "hot_open": hot[1] or 0, "archived": cold}
+
+# ---------------------------------------------------------------------
+# View unresolved items (for debugging)
+# ---------------------------------------------------------------------
+def list_unresolved(limit: int = 50):
+    """List the newest unresolved findings."""
+    page = query_findings(limit=limit, resolved=False)
+    if not page.findings:
         print("🎉 No unresolved findings in memory.")
     else:
         print("🧾 Unresolved findings:")
-        for r in rows:
-            print(f"  • [{r[3].upper()}] {r[2]} (Jira: {r[4] or 'N/A'}, Control: {r[5] or 'N/A'}) @ {r[1]}")
+        for f in page.findings:
+            print(f"  • [{(f.risk_level or 'unknown').upper()}] {f.summary} (Jira: {f.jira_key or 'N/A'}, Control: {f.control_id or 'N/A'}) @ {f.timestamp}")
+        if page.next_cursor:
+            print(f"  … more (showing the newest {limit})")
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Prometheus-style metrics shared by all services.
+
+Each pipeline stage is timed into one histogram, labelled by stage:
+
+    capture, analyze, llm, policy_search, policy_vector_search, dedup_exact,
+    dedup, db_write, db_write_batch, db_resolve, jira_ticket, jira_comment,
+    github, slack
+
+    @metrics.timed("policy_search")        # sync or async function
+    def search_policy(...): ...
+
+    with metrics.timed("llm"):
+        response = model.generate_content(...)
+
+A stage that raises also counts in compliance_stage_errors_total. Findings
+are counted by source and outcome (ticket_created, commented, duplicate,
+clustered, ...). render() returns the Prometheus text format served on
+/metrics by the Flask services; the uAgent and the capture daemon serve it
+with start_http_server() on a side port, bound to METRICS_BIND_HOST
+(loopback unless set, e.g. to 0.0.0.0 for a remote Prometheus).
+
+Recording costs a couple of microseconds (two perf_counter() calls, a lock
+and a bisect); METRICS_ENABLED=0 turns it off.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+METRICS_BIND_HOST = os.getenv("METRICS_BIND_HOST", "127.0.0.1")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans SQLite writes (sub-ms) to Gemini calls (tens of seconds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_text(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ---------------------------------------------------------------------
+# Metric types
+# ---------------------------------------------------------------------
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in sorted(values):
+            yield f"{self.name}{_label_text(self.labelnames, key)} {_format(value)}"
+
+
+class Histogram:
+    """Bucketed distribution (cumulative buckets, _sum and _count on output)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][slot] += 1
+            entry[1] += value
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(tuple(str(labels[name]) for name in self.labelnames))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in sorted(values):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format(bound) + '"'
+                yield f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labelnames, key)} {_format(total)}"
+            yield f"{self.name}_count{_label_text(self.labelnames, key)} {cumulative}"
+
+
+_registry: Dict[str, object] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(metric_type, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = metric_type(name, documentation, labelnames, **kwargs)
+        elif not isinstance(metric, metric_type) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} already registered with a different type or labels")
+        return metric
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """The process-wide counter `name` (created on first use)."""
+    return _register(Counter, name, documentation, labelnames)
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    """The process-wide histogram `name` (created on first use)."""
+    return _register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+STAGE_SECONDS = histogram("compliance_stage_duration_seconds", "Time spent per pipeline stage.", ("stage",))
+STAGE_ERRORS = counter("compliance_stage_errors_total", "Pipeline stages that raised.", ("stage",))
+FINDINGS = counter("compliance_findings_total", "Findings processed, by source and outcome.", ("source", "outcome"))
+
+
+# ---------------------------------------------------------------------
+# Stage timing
+# ---------------------------------------------------------------------
+def observe_stage(stage: str, seconds: float, failed: bool = False):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if failed:
+        STAGE_ERRORS.inc(stage=stage)
+
+
+class timed:
+    """Time a stage: `with timed("llm"):` or `@timed("llm")` on a sync or async function."""
+
+    __slots__ = ("stage", "_started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe_stage(self.stage, time.perf_counter() - self._started, exc_type is not None)
+        return False
+
+    def __call__(self, fn):
+        stage = self.stage
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                failed = True
+                try:
+                    result = await fn(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    observe_stage(stage, time.perf_counter() - started, failed)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                observe_stage(stage, time.perf_counter() - started, failed)
+        return wrapper
+
+
+def record_finding(source: str, outcome: str):
+    FINDINGS.inc(source=source or "unknown", outcome=outcome or "none")
+
+
+# ---------------------------------------------------------------------
+# Exposition
+# ---------------------------------------------------------------------
+def render() -> str:
+    """All registered metrics in the Prometheus text format (version 0.0.4)."""
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+def start_http_server(port: int, host: Optional[str] = None):
+    """Serve /metrics on a daemon thread (for processes without a Flask app); None if the port is taken."""
+    # Imported here: capture_commit imports this module and has a tight startup budget
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # scrapes every few seconds would flood the console
+
+    host = host or METRICS_BIND_HOST
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        print(f"⚠️ Metrics endpoint not started on port {port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return server
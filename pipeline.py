@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+In-process pipeline: capture → analyze → act.
+
+Each stage is a pool of worker threads; stages are connected by bounded
+queues, so a slow stage (usually Gemini) back-pressures the ones before it
+instead of letting work pile up in memory. Per-stage throughput, failures
+and queue depth are tracked and printed while the pipeline runs.
+
+Replay a directory of captures (legacy JSON files) or the whole capture
+store at maximum speed:
+    python pipeline.py --replay captures/commits
+    python pipeline.py --replay store --analyze-workers 8 --no-act
+"""
+
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, List, Optional
+
+_STOP = object()
+
+
+# ---------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------
+@dataclass
+class StageMetrics:
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+
+
+@dataclass
+class Stage:
+    """A named step run by `workers` threads reading from a bounded queue."""
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+    queue_size: int = 16
+    metrics: StageMetrics = field(default_factory=StageMetrics)
+
+    def __post_init__(self):
+        self.inbox: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self.lock = threading.Lock()
+
+
+class Pipeline:
+    """Runs items through a list of stages connected by bounded queues."""
+
+    def __init__(self, stages: List[Stage], report_every: float = 5.0):
+        self.stages = stages
+        self.report_every = report_every
+        self.started_at: Optional[float] = None
+        self._threads: List[threading.Thread] = []
+        self._done = threading.Event()
+
+    def _worker(self, index: int):
+        stage = self.stages[index]
+        downstream = self.stages[index + 1].inbox if index + 1 < len(self.stages) else None
+        while True:
+            item = stage.inbox.get()
+            if item is _STOP:
+                stage.inbox.put(_STOP)  # let the other workers of this stage see it too
+                return
+            started = time.perf_counter()
+            try:
+                result = stage.fn(item)
+                ok = True
+            except Exception as e:
+                ok = False
+                print(f"❌ [{stage.name}] failed on {item!r:.80}: {e}")
+            elapsed = time.perf_counter() - started
+            with stage.lock:
+                stage.metrics.busy_seconds += elapsed
+                if ok:
+                    stage.metrics.processed += 1
+                else:
+                    stage.metrics.failed += 1
+            # A stage returning None drops the item (e.g. nothing to act on)
+            if ok and downstream is not None and result is not None:
+                downstream.put(result)  # blocks when the next stage is full: back-pressure
+
+    def _reporter(self):
+        while not self._done.wait(self.report_every):
+            print(self.format_metrics())
+
+    def start(self):
+        self.started_at = time.monotonic()
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                t = threading.Thread(target=self._worker, args=(index,), name=f"{stage.name}-{n}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        if self.report_every:
+            threading.Thread(target=self._reporter, name="pipeline-metrics", daemon=True).start()
+
+    def submit(self, item):
+        """Feed one item into the first stage (blocks when it is full)."""
+        first = self.stages[0]
+        first.inbox.put(item)
+        with first.lock:
+            first.metrics.max_queue_depth = max(first.metrics.max_queue_depth, first.inbox.qsize())
+
+    def close(self):
+        """Drain every stage in order, then stop the workers."""
+        for stage in self.stages:
+            stage.inbox.put(_STOP)
+            for t in self._threads:
+                if t.name.startswith(f"{stage.name}-"):
+                    t.join()
+            stage.inbox.get_nowait()  # the sentinel put back by the last worker
+        self._done.set()
+
+    def run(self, items: Iterable[Any]):
+        """Start, push all items, drain and return the final metrics."""
+        self.start()
+        try:
+            for item in items:
+                self.submit(item)
+                self._sample_depths()
+        finally:
+            self.close()
+        print(self.format_metrics(final=True))
+        return self.metrics()
+
+    def _sample_depths(self):
+        for stage in self.stages:
+            depth = stage.inbox.qsize()
+            if depth > stage.metrics.max_queue_depth:
+                with stage.lock:
+                    stage.metrics.max_queue_depth = max(stage.metrics.max_queue_depth, depth)
+
+    def metrics(self) -> dict:
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        out = {"elapsed_seconds": round(elapsed, 3), "stages": {}}
+        for stage in self.stages:
+            m = stage.metrics
+            out["stages"][stage.name] = {
+                "workers": stage.workers,
+                "processed": m.processed,
+                "failed": m.failed,
+                "throughput_per_s": round(m.processed / elapsed, 3) if elapsed else 0.0,
+                "avg_ms": round(m.busy_seconds / max(1, m.processed + m.failed) * 1000, 2),
+                "queue_depth": stage.inbox.qsize(),
+                "max_queue_depth": m.max_queue_depth,
+            }
+        return out
+
+    def format_metrics(self, final: bool = False) -> str:
+        m = self.metrics()
+        lines = [f"{'✅ Pipeline finished' if final else '📊 Pipeline'} after {m['elapsed_seconds']:.1f}s"]
+        for name, s in m["stages"].items():
+            lines.append(
+                f"   {name:<8} ok {s['processed']:>6}  failed {s['failed']:>4}  "
+                f"{s['throughput_per_s']:>7.2f}/s  avg {s['avg_ms']:>8.1f} ms  "
+                f"queue {s['queue_depth']:>3} (max {s['max_queue_depth']})"
+            )
+        return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------
+# Compliance stages
+# ---------------------------------------------------------------------
+def capture_stage(item):
+    """Normalize an item to a capture ref: payload dicts are stored, refs/paths pass through."""
+    import capture_store
+
+    if isinstance(item, dict):
+        return capture_store.get_store().put(item, name=item.get("timestamp", ""))
+    return item
+
+
+def analyze_stage(ref):
+    import analyze_with_gemini
+
+    return analyze_with_gemini.analyze_capture_with_gemini(ref, verbose=False)
+
+
+def act_stage(analysis):
+    import actions
+
+    result = actions.act_on_analysis(analysis, source='code', log=lambda *_: None)
+    return None if result.get("ok") else result
+
+
+def build_pipeline(capture_workers=1, analyze_workers=4, act_workers=2, queue_size=16, act=True, report_every=5.0):
+    stages = [
+        Stage("capture", capture_stage, workers=capture_workers, queue_size=queue_size),
+        Stage("analyze", analyze_stage, workers=analyze_workers, queue_size=queue_size),
+    ]
+    if act:
+        stages.append(Stage("act", act_stage, workers=act_workers, queue_size=queue_size))
+    return Pipeline(stages, report_every=report_every)
+
+
+def replay_refs(source: str):
+    """Capture refs to replay: 'store' for the capture store, else a directory of JSON captures."""
+    import capture_store
+
+    if source == "store":
+        return [r["ref"] for r in capture_store.get_store().refs()]
+    refs = []
+    for root, _, files in os.walk(source):
+        refs.extend(os.path.join(root, f) for f in files if f.endswith(".json") and not f.endswith("_analysis.json"))
+    return sorted(refs)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run captures through capture → analyze → act.")
+    parser.add_argument("--replay", required=True, metavar="DIR|store",
+                        help="directory of capture JSON files, or 'store' for the capture store")
+    parser.add_argument("--analyze-workers", type=int, default=int(os.getenv("PIPELINE_ANALYZE_WORKERS", "4")))
+    parser.add_argument("--act-workers", type=int, default=int(os.getenv("PIPELINE_ACT_WORKERS", "2")))
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--no-act", action="store_true", help="analyze only, take no Jira/Slack/GitHub actions")
+    parser.add_argument("--report-every", type=float, default=5.0)
+    args = parser.parse_args()
+
+    refs = replay_refs(args.replay)
+    print(f"🚀 Replaying {len(refs)} capture(s) from {args.replay}")
+    if not args.no_act:
+        from memory import init_db
+        init_db()
+    pipeline = build_pipeline(
+        analyze_workers=args.analyze_workers,
+        act_workers=args.act_workers,
+        queue_size=args.queue_size,
+        act=not args.no_act,
+        report_every=args.report_every,
+    )
+    pipeline.run(refs)
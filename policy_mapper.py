@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Hybrid lexical + vector mapping of findings to policy controls.
+
+search_policy used to run a Chroma (dense embedding) query for every
+finding, even ones that plainly name a control ("MFA", "encryption at
+rest", "audit logging"), and dense search alone sometimes put credential
+leaks under the wrong control family. Mapping now goes:
+
+1. BM25 over policies.csv titles and descriptions, from an inverted index
+   built once per process (sub-millisecond, no embedding call).
+2. If the best lexical hit is confident (score and margin over the
+   runner-up), it is returned directly.
+3. Otherwise the Chroma query runs and the two score lists are fused
+   (min-max normalised, weighted by HYBRID_LEXICAL_WEIGHT).
+
+Evaluate against the held-out labeled set with bench_policy_mapping.py
+(QUERY_EXPANSIONS is tuned on the separate tuning split only).
+"""
+
+import csv
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import metrics
+
+POLICIES_CSV = Path(__file__).parent / 'policies.csv'
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 2  # title terms count this many times
+
+LEXICAL_SHORTCUT_SCORE = float(os.getenv("LEXICAL_SHORTCUT_SCORE", "7.0"))
+LEXICAL_SHORTCUT_MARGIN = float(os.getenv("LEXICAL_SHORTCUT_MARGIN", "1.5"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "0.5"))
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "10"))
+# After a Chroma error, map lexically for this long before trying it again
+VECTOR_RETRY_SECONDS = float(os.getenv("VECTOR_RETRY_SECONDS", "60"))
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "into", "is", "it", "its",
+    "not", "of", "on", "or", "that", "the", "this", "to", "was", "were", "which", "with", "without", "all", "any",
+    "must", "shall", "will", "should", "can", "may", "been", "being", "their", "them", "they", "these", "those",
+    "entity", "found", "detected", "issue", "use", "used", "using",
+}
+
+# Abbreviations and phrasings that findings use but the policy text spells out
+QUERY_EXPANSIONS = {
+    "mfa": "multi-factor authentication",
+    "2fa": "multi-factor authentication",
+    "otp": "multi-factor authentication",
+    "rbac": "role-based access controls",
+    "tls": "encryption transit cryptography",
+    "ssl": "encryption transit cryptography",
+    "http": "encryption transit",
+    "https": "encryption transit",
+    "certificate": "encryption transit cryptography",
+    "cipher": "encryption cryptography",
+    "plaintext": "encryption",
+    "unencrypted": "encryption",
+    "pii": "personal data",
+    "gdpr": "personal data",
+    "pan": "primary account numbers",
+    "card": "cardholder",
+    "cvv": "sensitive authentication data cardholder",
+    "apikey": "api keys secrets",
+    "token": "secrets credentials",
+    "tokens": "secrets credentials",
+    "hardcoded": "secrets credentials source code",
+    "cve": "vulnerable dependencies",
+    "package": "dependencies",
+    "pin": "dependencies",
+    "injection": "secure development",
+    "xss": "secure development",
+    "erase": "erasure",
+    "port": "network security",
+    "audit": "audit trails log",
+    "logging": "log monitoring",
+    "firewall": "network security",
+    "ingress": "network security",
+    "virus": "malware",
+    "antivirus": "malware",
+    "ransomware": "malware",
+    "terraform": "infrastructure code",
+    "coverage": "automated tests",
+    "backup": "backup recovery",
+}
+
+_WORD = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def _stem(word: str) -> str:
+    """Very light suffix stripping (plurals, -ing, -ed) so 'keys' matches 'key' and 'logged' 'log'."""
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("es", ""), ("s", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            stem = word[:-len(suffix)] + replacement
+            if suffix in ("ing", "ed") and len(stem) > 3 and stem[-1] == stem[-2]:
+                stem = stem[:-1]
+            return stem
+    return word
+
+
+def tokenize(text: str, expand: bool = False) -> List[str]:
+    """Lowercased, stemmed terms; hyphenated words also yield their joined form ("hard-coded" -> "hardcoded")."""
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        parts = [word.replace("-", "")] + (word.split("-") if "-" in word else [])
+        for part in parts:
+            stem = _stem(part)
+            if expand and (part in QUERY_EXPANSIONS or stem in QUERY_EXPANSIONS):
+                terms += tokenize(QUERY_EXPANSIONS.get(part) or QUERY_EXPANSIONS[stem])
+            if part not in STOPWORDS:
+                terms.append(stem)
+    return terms
+
+
+@dataclass(frozen=True)
+class PolicyMatch:
+    control_id: str
+    score: float
+    method: str  # "keyword" (lexical short-circuit), "hybrid", "lexical" or "vector"
+
+
+# ---------------------------------------------------------------------
+# BM25 inverted index
+# ---------------------------------------------------------------------
+class PolicyIndex:
+    """BM25 over policy titles + descriptions, precomputed into per-term postings."""
+
+    def __init__(self, policies: List[Dict[str, str]]):
+        self.control_ids = [p["control_id"] for p in policies]
+        lengths = []
+        term_freqs = []
+        for policy in policies:
+            terms = tokenize(policy["title"]) * TITLE_WEIGHT + tokenize(policy["description"])
+            lengths.append(len(terms))
+            term_freqs.append(Counter(terms))
+        average = sum(lengths) / max(1, len(lengths))
+
+        # term -> [(doc, precomputed BM25 weight)]; a query only sums postings
+        self.postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        document_freq = Counter(term for freqs in term_freqs for term in freqs)
+        for doc, freqs in enumerate(term_freqs):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc] / average)
+            for term, tf in freqs.items():
+                idf = math.log(1 + (len(policies) - document_freq[term] + 0.5) / (document_freq[term] + 0.5))
+                self.postings[term].append((doc, idf * tf * (BM25_K1 + 1) / (tf + norm)))
+
+    @classmethod
+    def from_csv(cls, path=POLICIES_CSV):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(list(csv.DictReader(f)))
+
+    def search(self, text: str, limit: int = HYBRID_CANDIDATES) -> List[Tuple[str, float]]:
+        """(control_id, BM25 score) pairs, best first."""
+        scores = defaultdict(float)
+        for term in set(tokenize(text, expand=True)):
+            for doc, weight in self.postings.get(term, ()):
+                scores[doc] += weight
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [(self.control_ids[doc], score) for doc, score in ranked]
+
+
+# ---------------------------------------------------------------------
+# Vector search (Chroma)
+# ---------------------------------------------------------------------
+@metrics.timed("policy_vector_search")
+def chroma_search(text: str, limit: int = HYBRID_CANDIDATES) -> List[Tuple[str, float]]:
+    """(control_id, -distance) from the Chroma 'policies' collection, best first."""
+    from clients import get_policy_collection
+
+    results = get_policy_collection().query(query_texts=[text], n_results=limit, include=["distances"])
+    if not results['ids'] or not results['ids'][0]:
+        return []
+    # Only the order and relative gaps matter after min-max normalisation
+    return [(control_id, -distance) for control_id, distance in zip(results['ids'][0], results['distances'][0])]
+
+
+def _normalise(ranked: List[Tuple[str, float]]) -> Dict[str, float]:
+    if not ranked:
+        return {}
+    high = max(score for _, score in ranked)
+    low = min(score for _, score in ranked)
+    span = (high - low) or 1.0
+    return {control_id: (score - low) / span for control_id, score in ranked}
+
+
+# ---------------------------------------------------------------------
+# Hybrid mapper
+# ---------------------------------------------------------------------
+class PolicyMapper:
+    """Keyword short-circuit, then BM25 + vector fusion."""
+
+    def __init__(self, index: PolicyIndex, vector_search: Optional[Callable] = chroma_search):
+        self.index = index
+        self.vector_search = vector_search
+        self._vector_error = None
+        self._vector_retry_at = 0.0
+
+    def lexical_shortcut(self, lexical: List[Tuple[str, float]]) -> bool:
+        if not lexical or lexical[0][1] < LEXICAL_SHORTCUT_SCORE:
+            return False
+        return len(lexical) == 1 or lexical[0][1] >= LEXICAL_SHORTCUT_MARGIN * lexical[1][1]
+
+    def map(self, text: str, top_k: int = 1) -> List[PolicyMatch]:
+        """Best top_k controls for a finding description."""
+        lexical = self.index.search(text)
+        if self.lexical_shortcut(lexical):
+            return [PolicyMatch(control_id, score, "keyword") for control_id, score in lexical[:top_k]]
+
+        vector = []
+        if self.vector_search is not None and time.monotonic() >= self._vector_retry_at:
+            try:
+                vector = self.vector_search(text, max(top_k, HYBRID_CANDIDATES))
+            except Exception as e:
+                # Chroma not populated / not installed / briefly down: map lexically, retry later
+                if self._vector_error is None:
+                    print(f"⚠️ Vector policy search unavailable, using lexical mapping only "
+                          f"(retrying every {VECTOR_RETRY_SECONDS:.0f}s): {e}")
+                self._vector_error = e
+                self._vector_retry_at = time.monotonic() + VECTOR_RETRY_SECONDS
+            else:
+                if self._vector_error is not None:
+                    print("✅ Vector policy search available again")
+                self._vector_error = None
+        if not vector:
+            return [PolicyMatch(control_id, score, "lexical") for control_id, score in lexical[:top_k]]
+        if not lexical:
+            return [PolicyMatch(control_id, score, "vector") for control_id, score in vector[:top_k]]
+
+        lexical_scores, vector_scores = _normalise(lexical), _normalise(vector)
+        fused = {
+            control_id: HYBRID_LEXICAL_WEIGHT * lexical_scores.get(control_id, 0.0)
+            + (1 - HYBRID_LEXICAL_WEIGHT) * vector_scores.get(control_id, 0.0)
+            for control_id in set(lexical_scores) | set(vector_scores)
+        }
+        ranked = sorted(fused.items(), key=lambda item: -item[1])[:top_k]
+        return [PolicyMatch(control_id, score, "hybrid") for control_id, score in ranked]
+
+
+_mapper: Optional[PolicyMapper] = None
+_mapper_lock = threading.Lock()
+
+
+def get_mapper() -> PolicyMapper:
+    """The process-wide mapper (index built from policies.csv on first use)."""
+    global _mapper
+    if _mapper is None:
+        with _mapper_lock:
+            if _mapper is None:
+                _mapper = PolicyMapper(PolicyIndex.from_csv())
+    return _mapper
+
+
+@metrics.timed("policy_search")
+def search_policy(issue_description: str, top_k: int = 1) -> List[str]:
+    """
+    Search for the most relevant policy controls for a given issue.
+
+    Args:
+        issue_description: Description of the security issue
+        top_k: Number of top results to return
+
+    Returns:
+        List of matching control IDs
+    """
+    try:
+        return [match.control_id for match in get_mapper().map(issue_description, top_k)]
+    except Exception as e:
+        print(f"⚠️ Error searching policies: {e}")
+        return []
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Deterministic pre-scan for diff chunks.
+
+Runs before Gemini so that obvious cases never reach the model:
+  • known secret formats (AWS keys, GitHub/Slack/Stripe tokens, private keys)
+    become findings immediately,
+  • docs-only chunks are treated as clean and skipped,
+  • every other code or config change (added lines without a high-confidence
+    finding, and any removed line, e.g. a deleted @login_required) is
+    escalated to the LLM. Regexes cannot tell that a change is safe, only
+    that a line is certainly a leak.
+
+Text that is not a diff (terminal history, log snippets) is escalated only
+when it shows a signal (ambiguous secret patterns, high-entropy strings).
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+CLEAN = "clean"
+FLAGGED = "flagged"
+ESCALATE = "escalate"
+
+# ---------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------
+# (issue type, pattern, risk, recommendation)
+HIGH_CONFIDENCE_RULES = [
+    ("Hardcoded AWS Access Key", re.compile(r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b"), "high",
+     "Remove the key from source, rotate it in IAM and load credentials from the environment or a secrets manager."),
+    ("Hardcoded AWS Secret Key",
+     re.compile(r"(?i)aws.{0,20}secret.{0,20}[:=]\s*[\"']?[A-Za-z0-9/+=]{40}\b"), "high",
+     "Rotate the secret access key immediately and load it from a secrets manager."),
+    ("Private Key Committed", re.compile(r"-----BEGIN (?:RSA |EC |DSA |OPENSSH |PGP )?PRIVATE KEY-----"), "high",
+     "Remove the private key from the repository, revoke it and issue a new key pair."),
+    ("Hardcoded GitHub Token", re.compile(r"\b(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{60,})\b"), "high",
+     "Revoke the token in GitHub settings and use a repository secret instead."),
+    ("Hardcoded Slack Token", re.compile(r"\bxox[abposr]-[A-Za-z0-9-]{10,}\b"), "high",
+     "Revoke the Slack token and store it in a secrets manager."),
+    ("Hardcoded Stripe Live Key", re.compile(r"\b[sr]k_live_[A-Za-z0-9]{10,}\b"), "high",
+     "Roll the Stripe key from the dashboard and load it from the environment."),
+    ("Hardcoded Google API Key", re.compile(r"\bAIza[0-9A-Za-z_-]{35}\b"), "high",
+     "Restrict and regenerate the API key, then load it from the environment."),
+]
+
+# Matches that are suspicious but need the model to judge
+AMBIGUOUS_RULES = [
+    ("credential assignment",
+     re.compile(r"(?i)\b\w*(?:password|passwd|pwd|secret|token|api_?key|auth)\w*\s*[:=]\s*[\"'][^\"'\s]{4,}[\"']")),
+    ("connection string with credentials", re.compile(r"(?i)\b[a-z][a-z0-9+.-]*://[^/\s:@]+:[^/\s@]+@")),
+    ("jwt", re.compile(r"\beyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}")),
+]
+
+RISKY_CONSTRUCTS = re.compile(
+    r"(?i)verify\s*=\s*False|shell\s*=\s*True|\beval\(|\bexec\(|pickle\.loads?|yaml\.load\(|"
+    r"chmod\s+(?:-R\s+)?777|0\.0\.0\.0/0|allow_origins?\s*=|Access-Control-Allow-Origin|"
+    r"\bmd5\b|\bsha1\b|\bssl\b|\btls\b|cipher|encrypt|decrypt|\biam\b|\bpolicy|permission|\bacl\b|public[_-]?read|"
+    r"\bpassword\b|\bsecret\b|\btoken\b|credential|private[_-]?key|\bauth|\blogin\b|\bsudo\b|"
+    r"execute\(\s*f?[\"'].*(?:SELECT|INSERT|UPDATE|DELETE)"
+)
+
+STRING_LITERAL = re.compile(r"[\"']([A-Za-z0-9/+=_\-.]{20,})[\"']")
+ENTROPY_THRESHOLD = 4.0
+
+# ---------------------------------------------------------------------
+# File-type rules
+# ---------------------------------------------------------------------
+# .txt and .svg are not docs: secrets.txt, creds.txt and requirements.txt with
+# tokenised index URLs are common leaks, and SVGs can carry script
+DOC_EXTENSIONS = (".md", ".rst", ".adoc", ".png", ".jpg", ".jpeg", ".gif", ".ico", ".css")
+DOC_NAMES = ("LICENSE", "CHANGELOG", "AUTHORS", "CODEOWNERS", ".gitignore")
+
+CONFIG_EXTENSIONS = (".tf", ".tfvars", ".yaml", ".yml", ".json", ".toml", ".ini", ".cfg", ".conf",
+                     ".env", ".properties", ".xml", ".sh", ".pem", ".key")
+CONFIG_NAMES = ("Dockerfile", "docker-compose", "Makefile", "Jenkinsfile", ".env")
+
+
+def classify_path(path: str) -> str:
+    """Return 'docs', 'config' or 'code' for a file path."""
+    name = path.rsplit("/", 1)[-1]
+    if name.startswith(CONFIG_NAMES) or name.lower().endswith(CONFIG_EXTENSIONS):
+        return "config"
+    if name.startswith(DOC_NAMES) or name.lower().endswith(DOC_EXTENSIONS):
+        return "docs"
+    return "code"
+
+
+def shannon_entropy(value: str) -> float:
+    """Shannon entropy in bits per character."""
+    if not value:
+        return 0.0
+    counts: Dict[str, int] = {}
+    for ch in value:
+        counts[ch] = counts.get(ch, 0) + 1
+    n = len(value)
+    return -sum(c / n * math.log2(c / n) for c in counts.values())
+
+
+def redact(secret: str) -> str:
+    """Keep enough of a secret to recognise it without repeating it."""
+    if len(secret) <= 8:
+        return "*" * len(secret)
+    return f"{secret[:4]}…{secret[-2:]}"
+
+
+# ---------------------------------------------------------------------
+# Scanning
+# ---------------------------------------------------------------------
+@dataclass
+class PrescanResult:
+    verdict: str
+    issues: List[dict] = field(default_factory=list)
+    reasons: List[str] = field(default_factory=list)
+
+
+def changed_lines(diff_text: str):
+    """
+    Yield (path, op, line) for every changed line of a diff chunk.
+
+    op is "+" (added) or "-" (removed); text before any "diff --git" header
+    (not a diff) is yielded line by line with path None and op "".
+    """
+    path = None
+    for line in diff_text.splitlines():
+        if line.startswith("diff --git "):
+            path = line.split(" b/", 1)[-1].strip()
+        elif path is None:
+            yield None, "", line
+        elif line.startswith("+") and not line.startswith("+++"):
+            yield path, "+", line[1:]
+        elif line.startswith("-") and not line.startswith("---"):
+            yield path, "-", line[1:]
+
+
+def scan_text(diff_text: str) -> PrescanResult:
+    """Pre-scan one diff chunk and decide whether the LLM is needed."""
+    issues, reasons, seen = [], [], set()
+    paths = set()
+    unreviewed = 0  # changed code/config lines the pre-scan cannot vouch for
+
+    for path, op, line in changed_lines(diff_text):
+        kind = classify_path(path) if path else "text"
+        if path:
+            paths.add(path)
+        if op == "-":
+            # Removals (auth decorators, validation, escaping) are for the model
+            if kind != "docs" and line.strip():
+                unreviewed += 1
+            continue
+        line_flagged = False
+
+        for issue_type, pattern, risk, recommendation in HIGH_CONFIDENCE_RULES:
+            for match in pattern.finditer(line):
+                line_flagged = True
+                key = (issue_type, path, match.group(0))
+                if key in seen:
+                    continue
+                seen.add(key)
+                issues.append({
+                    "type": issue_type,
+                    "description": f"{issue_type} ({redact(match.group(0))}) added in {path or '(unknown)'}.",
+                    "recommendation": recommendation,
+                    "risk_level": risk,
+                    "detector": "prescan",
+                })
+
+        # A line that already produced a high-confidence finding does not
+        # need the model to look at it again.
+        if kind == "docs" or line_flagged:
+            continue
+        if kind != "text" and line.strip():
+            unreviewed += 1
+        path = path or "(unknown)"
+        for label, pattern in AMBIGUOUS_RULES:
+            if pattern.search(line):
+                reasons.append(f"{label} in {path}")
+        for literal in STRING_LITERAL.findall(line):
+            if shannon_entropy(literal) >= ENTROPY_THRESHOLD:
+                reasons.append(f"high-entropy string in {path}")
+        if kind == "code" and RISKY_CONSTRUCTS.search(line):
+            reasons.append(f"security-relevant construct in {path}")
+
+    # Infra/config changes always get a model review
+    reasons.extend(f"config file {p}" for p in sorted(paths) if classify_path(p) == "config")
+    # Flagged lines are final; every other code change still needs a review
+    if unreviewed:
+        reasons.append(f"{unreviewed} changed line(s) without a pre-scan finding")
+
+    reasons = list(dict.fromkeys(reasons))
+    if reasons:
+        verdict = ESCALATE
+    elif issues:
+        verdict = FLAGGED
+    else:
+        verdict = CLEAN
+    return PrescanResult(verdict=verdict, issues=issues, reasons=reasons)
+
+
+def issues_to_analysis(issues: List[dict]) -> dict:
+    """Shape pre-scan findings like a Gemini analysis so they merge cleanly."""
+    if not issues:
+        return {"risk_level": "low", "issues": [], "summary": "No issues found by local pre-scan."}
+    rank = {"low": 1, "medium": 2, "high": 3}
+    risk = max((i.get("risk_level", "medium") for i in issues), key=lambda r: rank.get(r, 0))
+    types = sorted({i["type"] for i in issues})
+    return {
+        "risk_level": risk,
+        "issues": issues,
+        "summary": f"Local pre-scan detected: {', '.join(types)}.",
+    }
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Verify (and fix) per-control open-finding counters and policy status.
+
+The counters are maintained by triggers and policy status is updated by
+mark_resolved_many / store_finding; this job is the safety net that
+recounts from audit_log and repairs any drift.
+
+    python reconcile_policies.py               # fix drift once
+    python reconcile_policies.py --check       # report only, exit 1 on drift
+    python reconcile_policies.py --every 3600  # run hourly
+"""
+
+import argparse
+import sys
+import time
+
+import memory
+
+
+def run_once(fix):
+    report = memory.reconcile_control_status(fix=fix)
+    counter_drift, policy_drift = report["counter_drift"], report["policy_drift"]
+    if not counter_drift and not policy_drift:
+        print("✅ Control counters and policy status are consistent")
+        return report
+    verb = "Fixed" if fix else "Found"
+    for control_id, (stored, actual) in sorted(counter_drift.items()):
+        print(f"⚠️ {verb} counter drift on {control_id}: stored {stored}, actual {actual}")
+    for control_id in sorted(policy_drift):
+        print(f"⚠️ {verb} wrong policy status on {control_id}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="report drift without fixing it")
+    parser.add_argument("--every", type=float, metavar="SECONDS", help="repeat forever at this interval")
+    args = parser.parse_args()
+
+    memory.init_db()
+    while True:
+        report = run_once(fix=not args.check)
+        if not args.every:
+            drifted = report["counter_drift"] or report["policy_drift"]
+            sys.exit(1 if args.check and drifted else 0)
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Webhook receiver for resolution events from Jira and GitHub.
+
+Jira issue transitions into a done status and GitHub "issue closed" events
+resolve the matching findings (by jira_key / github_link) within seconds,
+with no polling of the remote APIs:
+
+    POST /webhooks/jira     Jira Cloud webhook (jira:issue_updated), signed with JIRA_WEBHOOK_SECRET
+    POST /webhooks/github   GitHub webhook (issues), signed with GITHUB_WEBHOOK_SECRET
+
+Requests are verified (HMAC-SHA256 of the raw body), queued and acknowledged
+with 202. A background batcher applies them every WEBHOOK_BATCH_SECONDS (or
+every WEBHOOK_BATCH_SIZE events) through memory.mark_resolved_many, so a
+sprint closing 200 tickets is a handful of transactions. Delivery ids are
+remembered, and resolution is idempotent, so retried deliveries are harmless.
+
+Acknowledged events are never dropped: a failing batch is retried with
+exponential backoff, then appended to WEBHOOK_SPOOL_PATH (JSON lines),
+which is replayed when the receiver starts again.
+
+Run this service on port 8003:
+    python resolution_webhooks.py
+"""
+
+import atexit
+import hashlib
+import hmac
+import json
+import os
+import queue
+import threading
+import time
+
+from dotenv import load_dotenv
+from flask import Flask, Response, jsonify, request
+
+import memory
+import metrics
+
+load_dotenv()
+
+JIRA_WEBHOOK_SECRET = os.getenv("JIRA_WEBHOOK_SECRET")
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+# Local testing only: accept unsigned deliveries when no secret is configured
+WEBHOOK_ALLOW_UNSIGNED = os.getenv("WEBHOOK_ALLOW_UNSIGNED", "0") == "1"
+JIRA_DONE_STATUSES = {s.strip().lower() for s in os.getenv("JIRA_DONE_STATUSES", "Done,Resolved,Closed").split(",")}
+
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "200"))
+WEBHOOK_BATCH_SECONDS = float(os.getenv("WEBHOOK_BATCH_SECONDS", "1.0"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "10000"))
+WEBHOOK_RETRY_ATTEMPTS = int(os.getenv("WEBHOOK_RETRY_ATTEMPTS", "5"))
+WEBHOOK_RETRY_BASE_SECONDS = float(os.getenv("WEBHOOK_RETRY_BASE_SECONDS", "1.0"))
+WEBHOOK_SPOOL_PATH = os.getenv("WEBHOOK_SPOOL_PATH", "webhook_spool.jsonl")
+
+app = Flask(__name__)
+
+
+# ---------------------------------------------------------------------
+# Signature verification
+# ---------------------------------------------------------------------
+def verify_signature(secret, body: bytes, header_value) -> bool:
+    """Check a "sha256=<hex hmac>" header (GitHub X-Hub-Signature-256, Jira X-Hub-Signature)."""
+    if not secret:
+        return WEBHOOK_ALLOW_UNSIGNED
+    if not header_value or not header_value.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, header_value[len("sha256="):].strip())
+
+
+# ---------------------------------------------------------------------
+# Event parsing
+# ---------------------------------------------------------------------
+def jira_resolution(payload) -> str:
+    """Issue key if this Jira event moves an issue into a done status, else None."""
+    if payload.get("webhookEvent") not in ("jira:issue_updated", "issue_updated"):
+        return None
+    issue = payload.get("issue") or {}
+    status_change = next(
+        (item for item in (payload.get("changelog") or {}).get("items", []) if item.get("field") == "status"),
+        None,
+    )
+    if status_change is None:
+        return None
+    status = (issue.get("fields") or {}).get("status") or {}
+    done = (status.get("statusCategory") or {}).get("key") == "done" \
+        or (status_change.get("toString") or "").lower() in JIRA_DONE_STATUSES
+    return issue.get("key") if done else None
+
+
+def github_resolution(event, payload) -> str:
+    """Issue URL if this GitHub event closes an issue, else None."""
+    if event != "issues" or payload.get("action") != "closed":
+        return None
+    return (payload.get("issue") or {}).get("html_url")
+
+
+# ---------------------------------------------------------------------
+# Micro-batching
+# ---------------------------------------------------------------------
+class ResolutionBatcher:
+    """Applies queued resolution events in batches on a background thread."""
+
+    def __init__(self, batch_size=WEBHOOK_BATCH_SIZE, batch_seconds=WEBHOOK_BATCH_SECONDS, maxsize=WEBHOOK_QUEUE_SIZE,
+                 retry_attempts=WEBHOOK_RETRY_ATTEMPTS, retry_base=WEBHOOK_RETRY_BASE_SECONDS,
+                 spool_path=WEBHOOK_SPOOL_PATH):
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self.retry_attempts = retry_attempts
+        self.retry_base = retry_base
+        self.spool_path = spool_path
+        self.events = queue.Queue(maxsize=maxsize)
+        self.stats = {"received": 0, "duplicates": 0, "batches": 0, "resolved": 0, "retries": 0,
+                      "failed_batches": 0, "spooled": 0, "replayed": 0}
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="resolution-batcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, delivery_id, source, jira_key=None, github_link=None) -> bool:
+        """Queue one event; False when the queue is full (the sender should retry)."""
+        try:
+            self.events.put_nowait((delivery_id, source, jira_key, github_link))
+        except queue.Full:
+            return False
+        self._count("received")
+        return True
+
+    def _count(self, key, n=1):
+        # Updated from the HTTP threads and the batcher thread
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def snapshot(self) -> dict:
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.batch_seconds
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 and batch:
+                break
+            try:
+                batch.append(self.events.get(timeout=max(timeout, 0.05) if batch else self.batch_seconds))
+            except queue.Empty:
+                if batch or self._stop.is_set():
+                    break
+                deadline = time.monotonic() + self.batch_seconds
+        return batch
+
+    def apply(self, batch):
+        """Resolve one batch; deliveries seen before are skipped."""
+        fresh = memory.unseen_deliveries([d for d, _, _, _ in batch if d])
+        todo = []
+        for event in batch:
+            if not event[0] or event[0] in fresh:
+                fresh.discard(event[0])
+                todo.append(event)
+        self._count("duplicates", len(batch) - len(todo))
+        if not todo:
+            return
+        result = memory.mark_resolved_many(
+            jira_keys=[jira_key for _, _, jira_key, _ in todo if jira_key],
+            github_links=[link for _, _, _, link in todo if link],
+        )
+        # Recorded after applying: a crash in between only means a harmless re-apply
+        memory.record_deliveries([(d, source) for d, source, _, _ in todo])
+        self._count("batches")
+        self._count("resolved", result["resolved"])
+
+    def apply_with_retry(self, batch):
+        """apply() with exponential backoff; spools the batch if every attempt fails."""
+        for attempt in range(self.retry_attempts + 1):
+            try:
+                return self.apply(batch)
+            except Exception as e:
+                if attempt == self.retry_attempts or self._stop.is_set():
+                    self._count("failed_batches")
+                    print(f"❌ Failed to apply {len(batch)} resolution event(s), spooling them: {e}")
+                    try:
+                        return self.spool(batch)
+                    except OSError as spool_error:
+                        print(f"❌ Could not spool resolution events {batch}: {spool_error}")
+                        return
+                delay = self.retry_base * 2 ** attempt
+                self._count("retries")
+                print(f"⚠️ Applying {len(batch)} resolution event(s) failed ({e}); retrying in {delay:.1f}s")
+                self._stop.wait(delay)
+
+    def spool(self, batch):
+        """Append events to the spool file (replayed on the next start)."""
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            for event in batch:
+                f.write(json.dumps(event) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._count("spooled", len(batch))
+
+    def replay_spool(self):
+        """Apply events spooled by an earlier run (they are re-spooled if they fail again)."""
+        replaying = f"{self.spool_path}.replaying"
+        if os.path.exists(self.spool_path):
+            # Appended rather than renamed, in case an interrupted replay left events behind
+            with open(self.spool_path, "r", encoding="utf-8") as src, open(replaying, "a", encoding="utf-8") as dst:
+                dst.write(src.read())
+            os.remove(self.spool_path)
+        if not os.path.exists(replaying):
+            return
+        with open(replaying, "r", encoding="utf-8") as f:
+            events = [tuple(json.loads(line)) for line in f if line.strip()]
+        print(f"♻️ Replaying {len(events)} spooled resolution event(s)")
+        for i in range(0, len(events), self.batch_size):
+            self.apply_with_retry(events[i:i + self.batch_size])
+        self._count("replayed", len(events))
+        os.remove(replaying)
+
+    def _run(self):
+        try:
+            self.replay_spool()
+        except Exception as e:
+            print(f"❌ Could not replay {self.spool_path}: {e}")
+        while not (self._stop.is_set() and self.events.empty()):
+            batch = self._collect()
+            if batch:
+                self.apply_with_retry(batch)
+
+    def stop(self, timeout=10):
+        """Drain what is queued, then stop."""
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+batcher = ResolutionBatcher()
+
+
+# ---------------------------------------------------------------------
+# Routes
+# ---------------------------------------------------------------------
+def _accept(delivery_id, source, jira_key=None, github_link=None):
+    if not (jira_key or github_link):
+        return jsonify({'ok': True, 'queued': False}), 200
+    if not batcher.submit(delivery_id, source, jira_key, github_link):
+        return jsonify({'error': 'Resolution queue full, retry later'}), 503
+    return jsonify({'ok': True, 'queued': True}), 202
+
+
+@app.route('/webhooks/jira', methods=['POST'])
+def jira_webhook():
+    """Jira issue transitions into a done status resolve findings by jira_key."""
+    body = request.get_data()
+    if not verify_signature(JIRA_WEBHOOK_SECRET, body, request.headers.get('X-Hub-Signature')):
+        return jsonify({'error': 'Invalid signature'}), 401
+    payload = request.get_json(silent=True) or {}
+    delivery_id = request.headers.get('X-Atlassian-Webhook-Identifier')
+    return _accept(f"jira:{delivery_id}" if delivery_id else None, 'jira', jira_key=jira_resolution(payload))
+
+
+@app.route('/webhooks/github', methods=['POST'])
+def github_webhook():
+    """GitHub "issue closed" events resolve findings by github_link."""
+    body = request.get_data()
+    if not verify_signature(GITHUB_WEBHOOK_SECRET, body, request.headers.get('X-Hub-Signature-256')):
+        return jsonify({'error': 'Invalid signature'}), 401
+    event = request.headers.get('X-GitHub-Event', '')
+    if event == 'ping':
+        return jsonify({'ok': True}), 200
+    payload = request.get_json(silent=True) or {}
+    delivery_id = request.headers.get('X-GitHub-Delivery')
+    return _accept(f"github:{delivery_id}" if delivery_id else None, 'github',
+                   github_link=github_resolution(event, payload))
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    return jsonify({'status': 'healthy', 'service': 'resolution-webhooks',
+                    'queued': batcher.events.qsize(), **batcher.snapshot()})
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
+
+
+if __name__ == '__main__':
+    memory.init_db()
+    batcher.start()
+    atexit.register(batcher.stop)
+    port = int(os.getenv("WEBHOOK_PORT", "8003"))
+    print(f"🚀 Resolution webhook receiver running on port {port}")
+    print(f"🔐 Jira signature: {'on' if JIRA_WEBHOOK_SECRET else 'OFF'} | GitHub signature: {'on' if GITHUB_WEBHOOK_SECRET else 'OFF'}")
+    app.run(host='0.0.0.0', port=port, debug=False)
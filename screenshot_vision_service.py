@@ -9,54 +9,24 @@ Run this service on port 8002:
     python screenshot_vision_service.py
 """
 
-import os
-import json
 import base64
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from dotenv import load_dotenv
-import google.generativeai as genai
-
-# Load environment variables
-load_dotenv()
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Next.js frontend
 
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise EnvironmentError("❌ Missing GEMINI_API_KEY in .env")
-
-genai.configure(api_key=GEMINI_API_KEY)
+# Gemini, Chroma and Pillow are loaded on first use (see clients.py), so the
+# service starts in well under a second and /health works without them.
 
 # Import shared modules
 import memory
 import actions
-
-# Import vector search function from populate_policies.py
-from pathlib import Path
-import chromadb
-
-CHROMA_DB_PATH = Path(__file__).parent / 'chroma_db'
-
-def search_policy(issue_description: str, top_k: int = 1):
-    """Search for the most relevant policy control for a given issue."""
-    try:
-        client = chromadb.PersistentClient(path=str(CHROMA_DB_PATH))
-        collection = client.get_collection(name="policies")
-        
-        results = collection.query(
-            query_texts=[issue_description],
-            n_results=top_k
-        )
-        
-        if results['ids'] and len(results['ids'][0]) > 0:
-            return results['ids'][0]
-        return []
-    except Exception as e:
-        print(f"⚠️ Error searching policies: {e}")
-        return []
+import metrics
+import structured_output
+from clients import get_genai, get_pil_image
+from crosswalk import related_controls
+from policy_mapper import search_policy
 
 @app.route('/analyze-image', methods=['POST'])
 def analyze_image():
@@ -104,37 +74,25 @@ Be thorough and specific. If no issues are found, set risk_level to "low" and pr
 """
         
         # Call Gemini Vision API
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
+        model = get_genai().GenerativeModel('gemini-2.5-flash-lite')
         
         # Create image part
-        import PIL.Image
         from io import BytesIO
-        image = PIL.Image.open(BytesIO(image_bytes))
-        
-        # Generate content
-        response = model.generate_content([prompt, image])
-        
-        # Parse response
-        response_text = response.text.strip()
-        
-        # Extract JSON from response (handle markdown code blocks)
-        if '```json' in response_text:
-            response_text = response_text.split('```json')[1].split('```')[0].strip()
-        elif '```' in response_text:
-            response_text = response_text.split('```')[1].split('```')[0].strip()
+        image = get_pil_image().open(BytesIO(image_bytes))
         
+        # Generate structured JSON (validated; never act on an unparsed answer)
         try:
-            analysis = json.loads(response_text)
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            analysis = {
-                "risk_level": "medium",
-                "summary": "Screenshot analyzed",
-                "description": response_text[:500],
-                "issues": []
-            }
+            analysis = structured_output.generate_json(
+                model, [prompt, image], structured_output.SCREENSHOT_ANALYSIS_SCHEMA
+            )
+        except structured_output.StructuredOutputError as e:
+            print(f"❌ Invalid analysis from Gemini for {filename}: {e}")
+            return jsonify({
+                'error': 'Failed to analyze image',
+                'details': str(e)
+            }), 502
         
-        # Perform vector search to find matching control
+        # Map to a control (keyword short-circuit, else lexical + vector)
         control_id = None
         if analysis.get('summary'):
             matches = search_policy(analysis['summary'], top_k=1)
@@ -142,8 +100,9 @@ Be thorough and specific. If no issues are found, set risk_level to "low" and pr
                 control_id = matches[0]
                 print(f"🔍 Mapped to control: {control_id}")
         
-        # Add control_id to analysis
+        # Add control_id (and its crosswalk-linked controls) to analysis
         analysis['control_id'] = control_id
+        analysis['related_controls'] = list(related_controls(control_id))
         
         print(f"✅ Analysis complete for {filename}: {analysis['risk_level']} risk")
         
@@ -160,6 +119,7 @@ Be thorough and specific. If no issues are found, set risk_level to "low" and pr
         # Check for duplicates
         if memory.finding_exists(summary, risk):
             print(f"⚠️ Duplicate finding: {summary}. Skipping actions.")
+            metrics.record_finding('screenshot', 'duplicate')
             return jsonify({
                 'ok': True,
                 'action_taken': 'duplicate',
@@ -183,10 +143,15 @@ Be thorough and specific. If no issues are found, set risk_level to "low" and pr
             github_link=action_results.get('github_link'),
             slack_link=None,
             control_id=control_id,
-            source='screenshot'  # CRITICAL: Mark as screenshot source
+            source='screenshot',  # CRITICAL: Mark as screenshot source
+            description=desc,
+            recommendation="\n".join(
+                i.get('recommendation', '') for i in analysis.get('issues', []) if i.get('recommendation')
+            ) or None
         )
         
         print(f"✅ Finding saved to database with source='screenshot'")
+        metrics.record_finding('screenshot', action_results.get('action_result'))
         
         # Return full analysis with action results
         return jsonify({
@@ -245,30 +210,20 @@ Important:
 """
 
         # Use Gemini to generate the fix
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        response = model.generate_content(prompt)
-        
-        # Parse the response
-        response_text = response.text.strip()
-        
-        # Try to extract JSON from the response
-        if '```json' in response_text:
-            response_text = response_text.split('```json')[1].split('```')[0].strip()
-        elif '```' in response_text:
-            response_text = response_text.split('```')[1].split('```')[0].strip()
-        
+        model = get_genai().GenerativeModel('gemini-2.5-flash-lite')
         try:
-            result = json.loads(response_text)
-            return jsonify({
-                'explanation': result.get('explanation', 'Code fix generated'),
-                'fixed_code': result.get('fixed_code', ''),
-            })
-        except json.JSONDecodeError:
-            # If JSON parsing fails, return the raw response
+            result = structured_output.generate_json(model, prompt, structured_output.CODE_FIX_SCHEMA)
+        except structured_output.StructuredOutputError as e:
+            print(f"❌ Invalid fix from Gemini: {e}")
             return jsonify({
-                'explanation': 'AI-generated fix',
-                'fixed_code': response_text,
-            })
+                'error': 'Failed to generate fix',
+                'details': str(e)
+            }), 502
+
+        return jsonify({
+            'explanation': result.get('explanation', 'Code fix generated'),
+            'fixed_code': result.get('fixed_code', ''),
+        })
 
     except Exception as e:
         print(f"❌ Error generating fix: {e}")
@@ -283,9 +238,15 @@ def health():
     return jsonify({
         'status': 'healthy',
         'service': 'Gemini Vision Analysis Service',
-        'port': 8002
+        'port': 8002,
+        'structured_output': structured_output.get_metrics()
     })
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Stage timings and finding counters in the Prometheus text format."""
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
+
 if __name__ == '__main__':
     print("🚀 Gemini Vision Service starting on port 8002...")
     print("📸 Ready to analyze screenshots for compliance!")
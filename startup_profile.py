@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Startup-time profiler and budget check for the Python entry points.
+
+Runs `python -X importtime -c "import <entry point>"` in a fresh interpreter
+for each entry point, summarizes the slowest imports and compares the
+cumulative import time against a budget.
+
+Usage:
+    python startup_profile.py                 # report
+    python startup_profile.py --top 15        # more detail
+    python startup_profile.py --check         # exit 1 if any entry point is over budget (for CI)
+
+Budgets (ms) can be overridden per entry point with STARTUP_BUDGET_<MODULE>,
+e.g. STARTUP_BUDGET_ANALYZE_WITH_GEMINI=250.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Cumulative import time budget per entry point, in milliseconds
+STARTUP_BUDGET_MS = {
+    "capture_client": 30,
+    "capture_commit": 80,
+    "analyze_with_gemini": 250,
+    "screenshot_vision_service": 800,
+    "fetch_jira_agent": 3000,
+}
+
+
+def budget_for(module):
+    return float(os.getenv(f"STARTUP_BUDGET_{module.upper()}", STARTUP_BUDGET_MS[module]))
+
+
+def profile_import(module, cwd):
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+
+    Returns:
+        (total_ms, [(cumulative_ms, self_ms, name), ...]) for the top-level
+        imports triggered by the module, or raises RuntimeError on failure.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        last = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        raise RuntimeError(last)
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        name = name[1:]  # one separator space, then two spaces per nesting level
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((depth, int(cumulative_us) / 1000, int(self_us) / 1000, name.strip()))
+
+    top_level = [(cum, self_ms, name) for depth, cum, self_ms, name in entries if depth == 0]
+    total = next((cum for cum, _, name in top_level if name == module), sum(c for c, _, _ in top_level))
+    return total, sorted(entries, key=lambda e: e[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=list(STARTUP_BUDGET_MS))
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per entry point (median is reported)")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list per entry point")
+    parser.add_argument("--check", action="store_true", help="exit non-zero when over budget")
+    args = parser.parse_args()
+
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    failures = 0
+    for module in args.modules:
+        budget = budget_for(module)
+        try:
+            runs = [profile_import(module, cwd) for _ in range(args.runs)]
+        except RuntimeError as e:
+            failures += 1
+            print(f"❌ {module}: import failed — {e}")
+            continue
+
+        total = statistics.median(r[0] for r in runs)
+        status = "✅" if total <= budget else "🚨"
+        if total > budget:
+            failures += 1
+        print(f"{status} {module}: {total:.1f} ms cumulative import (budget {budget:.0f} ms)")
+        for depth, cum, self_ms, name in runs[-1][1][:args.top]:
+            print(f"     {cum:9.1f} ms  {'  ' * depth}{name}")
+
+    if args.check and failures:
+        print(f"\n🚨 {failures} entry point(s) over budget or failing to import")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Shared structured-output layer for Gemini calls.
+
+Asks Gemini for JSON directly (response_mime_type + response_schema) instead
+of stripping markdown fences with regexes, validates the answer against a
+small typed schema, and only on failure tries a local repair and then one
+re-ask with the validation error. Parse outcomes and latency are counted so
+the fallback rate is visible.
+"""
+
+import json
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+
+import metrics
+
+# ---------------------------------------------------------------------
+# Schemas (OpenAPI subset understood by Gemini; "enum" is checked locally)
+# ---------------------------------------------------------------------
+RISK_LEVELS = ["low", "medium", "high"]
+
+ISSUE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "type": {"type": "string"},
+        "description": {"type": "string"},
+        "recommendation": {"type": "string"},
+        "related_control": {"type": "string"},
+        "hunk": {"type": "string"},
+    },
+    "required": ["type", "description"],
+}
+
+CODE_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "risk_level": {"type": "string", "enum": RISK_LEVELS},
+        "issues": {"type": "array", "items": ISSUE_SCHEMA},
+        "summary": {"type": "string"},
+    },
+    "required": ["risk_level", "issues", "summary"],
+}
+
+SCREENSHOT_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "risk_level": {"type": "string", "enum": RISK_LEVELS},
+        "summary": {"type": "string"},
+        "description": {"type": "string"},
+        "issues": {"type": "array", "items": ISSUE_SCHEMA},
+    },
+    "required": ["risk_level", "summary", "issues"],
+}
+
+CODE_FIX_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "explanation": {"type": "string"},
+        "fixed_code": {"type": "string"},
+    },
+    "required": ["explanation", "fixed_code"],
+}
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when Gemini's answer cannot be turned into a valid document."""
+
+    def __init__(self, message: str, raw_text: str = ""):
+        super().__init__(message)
+        self.raw_text = raw_text
+
+
+# ---------------------------------------------------------------------
+# Validation
+# ---------------------------------------------------------------------
+def validate(value: Any, schema: dict, path: str = "$") -> List[str]:
+    """Return a list of validation errors (empty when valid)."""
+    expected = _JSON_TYPES.get(schema.get("type"))
+    if expected and (not isinstance(value, expected) or (expected is not bool and isinstance(value, bool))):
+        return [f"{path}: expected {schema['type']}, got {type(value).__name__}"]
+
+    errors = []
+    if "enum" in schema and isinstance(value, str) and value.lower() not in schema["enum"]:
+        errors.append(f"{path}: {value!r} is not one of {schema['enum']}")
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing required field '{key}'")
+        for key, sub in schema.get("properties", {}).items():
+            if key in value and value[key] is not None:
+                errors.extend(validate(value[key], sub, f"{path}.{key}"))
+    elif isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+
+def normalize(value: Any, schema: dict) -> Any:
+    """Lower-case enum strings (e.g. 'HIGH' → 'high') in place."""
+    if isinstance(value, dict):
+        for key, sub in schema.get("properties", {}).items():
+            if key in value:
+                value[key] = normalize(value[key], sub)
+    elif isinstance(value, list) and "items" in schema:
+        return [normalize(v, schema["items"]) for v in value]
+    elif isinstance(value, str) and "enum" in schema:
+        return value.lower()
+    return value
+
+
+def api_schema(schema: dict) -> dict:
+    """Strip the keys Gemini's response_schema does not accept."""
+    out = {k: v for k, v in schema.items() if k in ("type", "required")}
+    if "properties" in schema:
+        out["properties"] = {k: api_schema(v) for k, v in schema["properties"].items()}
+    if "items" in schema:
+        out["items"] = api_schema(schema["items"])
+    return out
+
+
+def repair(text: str) -> Optional[Any]:
+    """
+    Best-effort local repair of a near-JSON answer: take the outermost
+    {...} object (drops fences and chatter around it) and retry.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        return json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------
+_metrics_lock = threading.Lock()
+_metrics = {
+    "calls": 0,            # generate_json invocations
+    "model_requests": 0,   # requests sent to Gemini, including re-asks
+    "parsed": 0,           # valid on the first answer
+    "repaired": 0,         # valid after local repair
+    "reasked": 0,          # valid only after a re-ask
+    "fallbacks": 0,        # no valid document at all
+    "parse_seconds_total": 0.0,
+    "parse_seconds_max": 0.0,
+}
+
+
+def _record(outcome: Optional[str] = None, requests: int = 0, parse_seconds: float = 0.0):
+    with _metrics_lock:
+        if outcome:
+            _metrics["calls"] += 1
+            _metrics[outcome] += 1
+        _metrics["model_requests"] += requests
+        _metrics["parse_seconds_total"] += parse_seconds
+        _metrics["parse_seconds_max"] = max(_metrics["parse_seconds_max"], parse_seconds)
+
+
+def get_metrics() -> dict:
+    """Snapshot of parse outcomes, fallback rate and parse latency."""
+    with _metrics_lock:
+        m = dict(_metrics)
+    calls = m["calls"] or 1
+    m["fallback_rate"] = round(m["fallbacks"] / calls, 4)
+    m["parse_ms_avg"] = round(m["parse_seconds_total"] / calls * 1000, 3)
+    m["parse_ms_max"] = round(m["parse_seconds_max"] * 1000, 3)
+    return m
+
+
+# ---------------------------------------------------------------------
+# Generation
+# ---------------------------------------------------------------------
+def _generation_config(genai, schema: dict):
+    try:
+        return genai.GenerationConfig(response_mime_type="application/json", response_schema=api_schema(schema))
+    except (AttributeError, TypeError, ValueError):
+        # Older SDKs without response_schema support
+        try:
+            return genai.GenerationConfig(response_mime_type="application/json")
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+
+def _parse(text: str, schema: dict) -> Tuple[Optional[Any], str, List[str]]:
+    """Return (document, how, errors) for one model answer."""
+    try:
+        doc = json.loads(text)
+        how = "parsed"
+    except ValueError as e:
+        doc = repair(text)
+        how = "repaired"
+        if doc is None:
+            return None, how, [f"invalid JSON: {e}"]
+    errors = validate(doc, schema)
+    if errors:
+        return None, how, errors
+    return normalize(doc, schema), how, []
+
+
+def generate_json(model, contents, schema: dict, max_reasks: int = 1) -> dict:
+    """
+    Ask a Gemini model for a JSON document matching `schema`.
+
+    Args:
+        model: genai.GenerativeModel instance
+        contents: Prompt string or list of parts (e.g. [prompt, image])
+        schema: One of the *_SCHEMA dicts above
+        max_reasks: How many times to re-ask with the validation error
+
+    Returns:
+        The validated document.
+
+    Raises:
+        StructuredOutputError: if no valid document could be obtained.
+    """
+    import google.generativeai as genai
+
+    config = _generation_config(genai, schema)
+    parts = contents if isinstance(contents, list) else [contents]
+    text, errors = "", []
+
+    for attempt in range(max_reasks + 1):
+        if attempt:
+            parts = parts + [
+                f"Your previous answer was not valid for the required JSON schema: {'; '.join(errors[:5])}. "
+                "Reply again with only the corrected JSON document."
+            ]
+        with metrics.timed("llm"):
+            response = model.generate_content(parts if len(parts) > 1 else parts[0], generation_config=config)
+        text = (response.text or "").strip()
+
+        started = time.perf_counter()
+        doc, how, errors = _parse(text, schema)
+        elapsed = time.perf_counter() - started
+
+        if doc is not None:
+            _record("reasked" if attempt else how, requests=1, parse_seconds=elapsed)
+            return doc
+        _record(requests=1, parse_seconds=elapsed)
+
+    _record("fallbacks")
+    raise StructuredOutputError(f"Invalid structured output: {'; '.join(errors[:5])}", raw_text=text)
@@ -0,0 +1,46 @@
+"""Hunk cache: results for a hunk split across several chunks must all be kept."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from analyze_with_gemini import cache_chunk_results, cached_analysis  # noqa: E402
+from diff_chunker import chunk_diff  # noqa: E402
+from hunk_cache import HunkCache, hunk_key  # noqa: E402
+
+
+def new_file_diff(path, lines):
+    body = "".join(f"+line {i}: value = compute({i})\n" for i in range(lines))
+    return (f"diff --git a/{path} b/{path}\nnew file mode 100644\n--- /dev/null\n+++ b/{path}\n"
+            f"@@ -0,0 +1,{lines} @@\n{body}")
+
+
+def answer(label, issue_type):
+    return {"risk_level": "high", "issues": [
+        {"type": issue_type, "description": f"{issue_type} found", "risk_level": "high", "hunk": label}]}
+
+
+def test_split_hunk_results_are_merged(tmp_path):
+    chunks, _ = chunk_diff(new_file_diff("app/big.py", 300), max_chars=4000, hunk_label=hunk_key)
+    labels = {label for chunk in chunks for label in chunk.labels}
+    assert len(chunks) >= 3 and len(labels) == 1
+    label = labels.pop()
+
+    cache = HunkCache(path=tmp_path / "cache.db")
+    cache_chunk_results(cache, [(chunk, answer(label, f"Issue {i}")) for i, chunk in enumerate(chunks)])
+
+    restored = cached_analysis(cache.get_many([label]))
+    assert sorted(issue["type"] for issue in restored["issues"]) == [f"Issue {i}" for i in range(len(chunks))]
+
+
+def test_split_hunk_not_cached_if_a_piece_is_unattributed(tmp_path):
+    chunks, _ = chunk_diff(new_file_diff("app/big.py", 300), max_chars=4000, hunk_label=hunk_key)
+    label = chunks[0].labels[0]
+
+    cache = HunkCache(path=tmp_path / "cache.db")
+    results = [answer(label, "Issue") for _ in chunks]
+    results[-1] = {"risk_level": "high", "issues": [{"type": "From logs", "description": "x"}]}
+    cache_chunk_results(cache, zip(chunks, results))
+
+    assert cache.get_many([label]) == {}